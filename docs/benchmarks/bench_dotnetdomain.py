@@ -0,0 +1,423 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2019-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+r"""
+=================================
+Benchmarks for the :dn: domain
+=================================
+
+Generates a synthetic API reference shaped like ``docs/api.rst`` and runs
+the read, resolve and write phases of a Sphinx build over it, reporting
+wall time, peak memory and the size and load time of the pickled
+environment after each phase.
+
+::
+
+    python docs/benchmarks/bench_dotnetdomain.py \
+        --namespaces 4 --classes 50 --methods 10 --output bench.json
+
+Everything runs offline; the corpus is written to a temporary directory.
+
+With ``--check-parallel 1,2,4,8`` the corpus is instead built from scratch
+once per number of parallel readers, and the script fails unless every
+build writes identical output, the same :dn: objects and the same warnings::
+
+    python docs/benchmarks/bench_dotnetdomain.py \
+        --guides 16 --duplicates 4 --check-parallel 1,2,4,8
+
+With ``--builder dn-linkcheck`` there is no write phase, the resolve phase
+is the link check.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import pickle
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DOCS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONF_PY = '''\
+import sys
+sys.path.insert(0, {docs_dir!r})
+
+project = 'dn-bench'
+extensions = ['dotnetdomain']
+master_doc = 'index'
+exclude_patterns = ['_build']
+'''
+
+ARG_TYPES = [
+    'string', 'int', 'bool', 'CancellationToken', 'Capabilities?',
+    'IDictionary<string,object>', 'IEnumerable<string>',
+    'Dictionary<string, List<int>>', 'Func<Transaction,Task>',
+]
+
+RETURN_TYPES = ['Task', 'Task<TResult>', 'Task<IReadOnlyCollection<TResult>>',
+                'ValueTask', 'string', 'bool']
+
+
+class Corpus:
+    """A synthetic reST corpus: N namespaces of M classes with K methods,
+    each method in two overloads, plus guide pages cross-referencing them."""
+
+    def __init__(self, namespaces: int, classes: int, methods: int,
+                 refs: int, guides: int, seed: int, duplicates: int = 0) -> None:
+        self.namespaces = namespaces
+        self.classes = classes
+        self.methods = methods
+        self.refs = refs
+        self.guides = guides
+        self.duplicates = duplicates
+        self.random = random.Random(seed)
+        self.class_names: List[str] = []
+        self.method_targets: List[str] = []
+
+        for n in range(namespaces):
+            for c in range(classes):
+                self.class_names.append(f'Bench.Ns{n}.{self.class_name(c)}')
+
+    @staticmethod
+    def class_name(index: int) -> str:
+        # every fifth class is generic, like Group<TKey, TElement>
+        if index % 5 == 4:
+            return f'Class{index}<TKey, TElement>'
+        return f'Class{index}'
+
+    def overloads(self, method: int) -> List[List[Tuple[str, str]]]:
+        first = ARG_TYPES[method % len(ARG_TYPES)]
+        second = ARG_TYPES[(method * 7 + 3) % len(ARG_TYPES)]
+        return [
+            [('string', 'query'), (first, 'value')],
+            [('string', 'query'), (first, 'value'), (second, 'other'),
+             ('CancellationToken', 'token')],
+        ]
+
+    def xref(self) -> str:
+        if self.method_targets and self.random.random() < 0.4:
+            return f':dn:method:`{self.random.choice(self.method_targets)}`'
+        return f':dn:class:`{self.random.choice(self.class_names)}`'
+
+    def xrefs(self) -> str:
+        return ', '.join(self.xref() for _ in range(self.refs))
+
+    def api_page(self) -> str:
+        lines = ['.. _bench-api:', '', '=================', 'API Documentation',
+                 '=================', '']
+        for n in range(self.namespaces):
+            lines.append(f'- :dn:namespace:`Bench.Ns{n}`')
+        lines.append('')
+
+        for n in range(self.namespaces):
+            lines.extend([f'.. dn:namespace:: Bench.Ns{n}', ''])
+            for c in range(self.classes):
+                class_name = self.class_name(c)
+                lines.extend([
+                    f'    .. dn:class:: {class_name}', '',
+                    f'        Summary of {class_name}, see {self.xrefs()}.', '',
+                    f'        :property int Count:',
+                    f'            The number of items.', '',
+                    f'        :property IReadOnlyDictionary<string, object> Globals:',
+                    f'            The globals.', '',
+                ])
+                for m in range(self.methods):
+                    for args in self.overloads(m):
+                        sig_args = ', '.join(f'{typ} {name}' for typ, name in args)
+                        rettype = RETURN_TYPES[m % len(RETURN_TYPES)]
+                        method_name = f'Method{m}<TResult>' if m % 3 == 0 else f'Method{m}'
+                        lines.extend([
+                            f'        .. dn:method:: {method_name}({sig_args}): {rettype}', '',
+                            f'            Does things, see {self.xrefs()}.', '',
+                        ])
+                        for typ, name in args:
+                            lines.extend([f'            :param {typ} {name}:',
+                                          f'                The {name}.', ''])
+                        lines.extend(['            :returns:',
+                                      '                The result.', ''])
+                        owner = f'Bench.Ns{n}.{class_name}'
+                        arg_types = ', '.join(typ.replace(' ', '') for typ, _ in args)
+                        self.method_targets.append(f'{owner}.{method_name}({arg_types})')
+        return '\n'.join(lines) + '\n'
+
+    def guide_page(self, index: int) -> str:
+        lines = [f'Guide {index}', '=' * (len(str(index)) + 6), '']
+        for _ in range(self.classes):
+            lines.extend([f'Use {self.xrefs()} to do things.', ''])
+        if index < self.duplicates:
+            # describe an API class a second time, so reading this page and
+            # api.rst in different processes yields a duplicate definition
+            lines.extend([f'.. dn:class:: {self.class_names[index]}', '',
+                          f'    Described again in guide {index}.', ''])
+        return '\n'.join(lines) + '\n'
+
+    def write(self, srcdir: str) -> None:
+        pages = {'api': self.api_page()}
+        for i in range(self.guides):
+            pages[f'guide{i}'] = self.guide_page(i)
+
+        index = ['Bench', '=====', '', '.. toctree::', '']
+        index.extend(f'   {name}' for name in pages)
+        pages['index'] = '\n'.join(index) + '\n'
+
+        for name, content in pages.items():
+            with open(os.path.join(srcdir, f'{name}.rst'), 'w', encoding='utf-8') as f:
+                f.write(content)
+        with open(os.path.join(srcdir, 'conf.py'), 'w', encoding='utf-8') as f:
+            f.write(CONF_PY.format(docs_dir=DOCS_DIR))
+
+
+def measure(phase: Callable[[], Any], memory: bool) -> Dict[str, float]:
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    phase()
+    elapsed = time.perf_counter() - start
+    result = {'seconds': round(elapsed, 4)}
+    if memory:
+        result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def env_pickle_stats(app: Any) -> Dict[str, float]:
+    data = pickle.dumps(app.env, pickle.HIGHEST_PROTOCOL)
+    start = time.perf_counter()
+    pickle.loads(data)
+    elapsed = time.perf_counter() - start
+    return {'env_pickle_bytes': len(data), 'env_pickle_load_seconds': round(elapsed, 4)}
+
+
+def run_build(srcdir: str, builder: str, jobs: int, memory: bool) -> Dict[str, Any]:
+    from sphinx.application import Sphinx
+    from sphinx.util.parallel import SerialTasks
+
+    outdir = os.path.join(srcdir, '_build', builder)
+    doctreedir = os.path.join(srcdir, '_build', 'doctrees')
+    warnings = io.StringIO()
+    app = Sphinx(srcdir, srcdir, outdir, doctreedir, builder,
+                 status=None, warning=warnings, freshenv=True, parallel=jobs)
+    builder_obj = app.builder
+    env = app.env
+    phases: Dict[str, Dict[str, Any]] = {}
+    doctrees: Dict[str, Any] = {}
+
+    def read() -> None:
+        builder_obj.read()
+
+    def resolve() -> None:
+        for docname in sorted(env.found_docs):
+            doctrees[docname] = env.get_and_resolve_doctree(docname, builder_obj)
+
+    def write() -> None:
+        docnames = sorted(doctrees)
+        builder_obj.finish_tasks = SerialTasks()
+        builder_obj.prepare_writing(set(docnames))
+        for docname in docnames:
+            builder_obj.write_doc_serialized(docname, doctrees[docname])
+            builder_obj.write_doc(docname, doctrees[docname])
+        builder_obj.finish()
+        builder_obj.finish_tasks.join()
+
+    def check() -> None:
+        # dn-linkcheck resolves the dn references itself and writes nothing
+        builder_obj.write(sorted(env.found_docs), [])
+        builder_obj.finish()
+
+    if builder == 'dn-linkcheck':
+        build_phases = (('read', read), ('resolve', check))
+    else:
+        build_phases = (('read', read), ('resolve', resolve), ('write', write))
+    for name, phase in build_phases:
+        phases[name] = measure(phase, memory)
+        phases[name].update(env_pickle_stats(app))
+
+    app.emit('build-finished', None)
+    return {
+        'phases': phases,
+        'documents': len(env.found_docs),
+        'dn_objects': len(env.get_domain('dn').objects),
+        'warnings': warnings.getvalue().count('WARNING'),
+    }
+
+
+def hash_outputs(outdir: str) -> Dict[str, str]:
+    digests = {}
+    for root, dirs, files in os.walk(outdir):
+        dirs[:] = [d for d in dirs if d != '.doctrees']
+        for name in files:
+            if name == '.buildinfo':
+                continue
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+            if name == 'searchindex.js':
+                # Sphinx fills the title map in the order parallel writers
+                # finish, compare the index contents rather than its bytes
+                index = json.loads(data[data.index(b'(') + 1:data.rindex(b')')])
+                data = json.dumps(index, sort_keys=True).encode()
+            digests[os.path.relpath(path, outdir)] = hashlib.sha256(data).hexdigest()
+    return digests
+
+
+def check_parallel(srcdir: str, builder: str, jobs: List[int]) -> Dict[str, Any]:
+    """Builds the corpus from scratch with each number of parallel readers
+    and compares the results against the first build."""
+    from sphinx.application import Sphinx
+    from sphinx.util.docutils import docutils_namespace
+
+    results: Dict[str, Any] = {}
+    reference = None
+    mismatches = []
+    for n in jobs:
+        shutil.rmtree(os.path.join(srcdir, '_build'), ignore_errors=True)
+        outdir = os.path.join(srcdir, '_build', builder)
+        doctreedir = os.path.join(srcdir, '_build', 'doctrees')
+        warnings = io.StringIO()
+        with docutils_namespace():
+            app = Sphinx(srcdir, srcdir, outdir, doctreedir, builder,
+                         status=None, warning=warnings, freshenv=True, parallel=n)
+            start = time.perf_counter()
+            app.build()
+            elapsed = time.perf_counter() - start
+
+        outcome = (
+            hash_outputs(outdir),
+            dict(app.env.get_domain('dn').objects),
+            # parallel readers can't tell the line of a duplicate
+            # definition found while merging, so compare the messages only
+            sorted(line.split(' WARNING: ', 1)[-1]
+                   for line in warnings.getvalue().splitlines()),
+        )
+        if reference is None:
+            reference = outcome
+        else:
+            for what, ours, theirs in zip(('output', 'objects', 'warnings'),
+                                          outcome, reference):
+                if ours != theirs:
+                    mismatches.append(f'-j {n}: {what} differs from -j {jobs[0]}')
+        results[str(n)] = {
+            'seconds': round(elapsed, 4),
+            'files': len(outcome[0]),
+            'dn_objects': len(outcome[1]),
+            'warnings': len(outcome[2]),
+        }
+        print(f'-j {n}: {elapsed:.2f}s', file=sys.stderr)
+    return {'jobs': results, 'mismatches': mismatches}
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=DOCS_DIR, stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--namespaces', type=int, default=4)
+    parser.add_argument('--classes', type=int, default=50,
+                        help='classes per namespace')
+    parser.add_argument('--methods', type=int, default=10,
+                        help='methods per class, each in two overloads')
+    parser.add_argument('--refs', type=int, default=2,
+                        help='cross-references per paragraph')
+    parser.add_argument('--guides', type=int, default=5,
+                        help='number of guide pages cross-referencing the API')
+    parser.add_argument('--duplicates', type=int, default=0,
+                        help='number of guide pages describing an API class again')
+    parser.add_argument('--builder', default='html')
+    parser.add_argument('--jobs', '-j', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help="don't trace memory, it slows the phases down")
+    parser.add_argument('--keep', action='store_true',
+                        help='keep the generated corpus and print its location')
+    parser.add_argument('--check-parallel', metavar='N,N,...',
+                        type=lambda value: [int(n) for n in value.split(',')],
+                        help='compare full builds with these numbers of parallel readers')
+    parser.add_argument('--output', '-o', default='dn-bench.json')
+    args = parser.parse_args(argv)
+
+    import sphinx
+
+    srcdir = tempfile.mkdtemp(prefix='dn-bench-')
+    try:
+        Corpus(args.namespaces, args.classes, args.methods, args.refs,
+               args.guides, args.seed, args.duplicates).write(srcdir)
+        runs = []
+        parallel = None
+        if args.check_parallel:
+            parallel = check_parallel(srcdir, args.builder, args.check_parallel)
+        for i in range(0 if parallel else args.repeat):
+            shutil.rmtree(os.path.join(srcdir, '_build'), ignore_errors=True)
+            run = run_build(srcdir, args.builder, args.jobs, args.memory)
+            runs.append(run)
+            print(f'run {i + 1}: ' + ', '.join(
+                f"{name} {phase['seconds']:.2f}s" for name, phase in run['phases'].items()),
+                file=sys.stderr)
+    finally:
+        if args.keep:
+            print(f'corpus kept in {srcdir}', file=sys.stderr)
+        else:
+            shutil.rmtree(srcdir, ignore_errors=True)
+
+    report = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'sphinx': sphinx.__display_version__,
+        'parameters': {key: value for key, value in vars(args).items()
+                       if key not in ('output', 'keep')},
+    }
+    if parallel:
+        report['parallel'] = parallel
+    else:
+        report['runs'] = runs
+        report['best'] = {
+            name: min((run['phases'][name] for run in runs), key=lambda p: p['seconds'])
+            for name in runs[0]['phases']
+        }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+        f.write('\n')
+
+    if parallel and parallel['mismatches']:
+        for mismatch in parallel['mismatches']:
+            print(mismatch, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2019-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+r"""
+=========================================
+Documentation of several releases at once
+=========================================
+
+Builds the documentation of several releases of the driver, each to a
+directory of its own::
+
+    python docs/build_versions.py 0.1=git:v0.1.0 0.2=git:v0.2.0 dev=docs
+
+A release is given as ``name=source``, the source being the directory of
+its ``conf.py`` or ``git:<revision>``, whose ``docs`` directory is then
+exported from this repository first.
+
+The builds run one after another, each in a process of its own that
+imports the ``dotnetdomain.py`` of its release, and share a cache on disk,
+see ``dn_shared_cache`` in ``dotnetdomain.py``. A type documented the same
+way as in a release built before isn't parsed, transformed or highlighted
+again: its rendering is loaded from the cache and the objects it declares
+are replayed to the object table of the release. Building several releases
+costs about one build plus the parsing of what changed between them.
+
+``versions.json`` in the output directory lists the releases built, in
+the order given, for a version switcher.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+import time
+
+from typing import Any, Dict, List, Optional, Tuple
+
+DOCS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def export_revision(revision: str, dest: str) -> str:
+    """Exports the ``docs`` directory of a git revision of this repository
+    to ``dest``, returns the directory of its ``conf.py``."""
+    root = subprocess.run(['git', 'rev-parse', '--show-toplevel'], cwd=DOCS_DIR, check=True,
+                          capture_output=True, text=True).stdout.strip()
+    docs = os.path.relpath(DOCS_DIR, root).replace(os.sep, '/')
+    archive = subprocess.run(['git', 'archive', '--format=tar', revision, docs], cwd=root,
+                             check=True, capture_output=True).stdout
+    if os.path.isdir(dest):
+        shutil.rmtree(dest)
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(dest, filter='data')
+    return os.path.join(dest, docs)
+
+
+def build(srcdir: str, outdir: str, doctreedir: str, builder: str, shared_cache: str,
+          jobs: int, quiet: bool) -> int:
+    """Builds a release in a new process, so that it uses the extension of
+    the release rather than one imported for a release built before."""
+    process = multiprocessing.get_context('spawn').Process(
+        target=build_release,
+        args=(srcdir, outdir, doctreedir, builder, shared_cache, jobs, quiet))
+    process.start()
+    process.join()
+    return process.exitcode
+
+
+def build_release(srcdir: str, outdir: str, doctreedir: str, builder: str,
+                  shared_cache: str, jobs: int, quiet: bool) -> None:
+    from sphinx.application import Sphinx
+    from sphinx.util.docutils import docutils_namespace, patch_docutils
+
+    with patch_docutils(srcdir), docutils_namespace():
+        app = Sphinx(srcdir, srcdir, outdir, doctreedir, builder,
+                     confoverrides={'dn_shared_cache': shared_cache},
+                     status=None if quiet else sys.stdout, warning=sys.stderr,
+                     parallel=jobs)
+        app.build()
+    sys.exit(app.statuscode)
+
+
+def parse_release(spec: str) -> Tuple[str, str]:
+    name, sep, source = spec.partition('=')
+    if not sep or not name or not source or name.startswith('.') or '/' in name:
+        raise argparse.ArgumentTypeError(f'expected name=source, got {spec!r}')
+    return name, source
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('releases', nargs='+', type=parse_release, metavar='name=source')
+    parser.add_argument('--outdir', help='defaults to _build/versions in this directory')
+    parser.add_argument('--builder', '-b', default='html')
+    parser.add_argument('--jobs', '-j', type=int, default=1)
+    parser.add_argument('--quiet', '-q', action='store_true',
+                        help='only print warnings and build times')
+    args = parser.parse_args(argv)
+
+    outdir = os.path.abspath(args.outdir or os.path.join(DOCS_DIR, '_build', 'versions'))
+    doctrees = os.path.join(outdir, '.doctrees')
+    shared_cache = os.path.join(doctrees, 'shared')
+    status = 0
+    versions: List[Dict[str, Any]] = []
+    for name, source in args.releases:
+        if source.startswith('git:'):
+            srcdir = export_revision(source[4:], os.path.join(outdir, '.sources', name))
+        else:
+            srcdir = os.path.abspath(source)
+        start = time.perf_counter()
+        code = build(srcdir, os.path.join(outdir, name), os.path.join(doctrees, name),
+                     args.builder, shared_cache, args.jobs, args.quiet)
+        print(f'{name}: built in {time.perf_counter() - start:.2f}s', file=sys.stderr)
+        status = status or code
+        versions.append({'name': name, 'path': f'{name}/'})
+
+    with open(os.path.join(outdir, 'versions.json'), 'w', encoding='utf-8') as f:
+        json.dump(versions, f, indent=2)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -26,35 +26,545 @@ r"""
 
 from __future__ import annotations
 
+from array import array
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from copy import copy
+import functools
+import gc
+import hashlib
+import json
+import logging as pylogging
+import os
+import pickle
+import posixpath
+import textwrap
+import time
+from xml.etree import ElementTree
+from pygments import __version__ as pygments_version
 from docutils import nodes as d_nodes
 from docutils.nodes import Element, Node, literal, bullet_list, list_item, field_list, Text, reference
 from docutils.parsers.rst import directives  # type: ignore
+from docutils.statemachine import StringList
+from docutils.utils import relative_path
 import re
+from sphinx import __version__ as sphinx_version
 from sphinx.builders import Builder
 from sphinx import addnodes
 from sphinx.addnodes import desc_signature, pending_xref, index
-from sphinx.domains.python import _pseudo_parse_arglist
 from sphinx.application import Sphinx
-from sphinx.domains import javascript as js
-from sphinx.locale import _
+from sphinx.domains import Index, IndexEntry, javascript as js
+from sphinx.locale import _, __
 from sphinx.util import docfields, logging
-from sphinx.util.nodes import make_id
+try:
+    from sphinx.util.display import status_iterator
+except ImportError:  # Sphinx < 6.1
+    from sphinx.util import status_iterator
+from sphinx.util.docutils import SphinxDirective
+from sphinx.util.console import bold  # type: ignore
+from sphinx.util.nodes import make_id, make_refnode, nested_parse_with_titles, traverse_parent
+from sphinx.util.parallel import ParallelTasks, make_chunks, parallel_available
 from sphinx.util.typing import OptionSpec
 from sphinx.roles import XRefRole
-from sphinx.environment import BuildEnvironment
+from sphinx.transforms import SphinxTransform
+from sphinx.transforms.post_transforms import SphinxPostTransform
+from sphinx.environment import BuildEnvironment, CONFIG_OK
+from sphinx.highlighting import PygmentsBridge
+from sphinx.errors import NoUri
 from sphinx.directives import ObjectDescription
 from sphinx import addnodes as s_nodes
 
-from typing import Any, Dict, List, Tuple, cast, Optional
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Sequence, Set,
+                    Tuple, cast, Optional)
 
 logger = logging.getLogger(__name__)
 
+
+#: the characters :py:func:`parse_signature` has to look at, everything else
+#: is part of an identifier or type name
+_SIG_DELIMITERS = re.compile(r'[<>()\[\]{},.:\s]')
+
+#: objtypes that are members rather than types
+CALLABLE_OBJTYPES = frozenset(('function', 'method', 'constructor'))
+#: the objtypes listed under the type declaring them
+MEMBER_OBJTYPES = CALLABLE_OBJTYPES | {'property'}
+
+#: modifiers that can precede the type of a parameter
+ARGUMENT_MODIFIERS = frozenset(('this', 'ref', 'out', 'in', 'params', 'readonly', 'scoped'))
+#: the C# keywords naming built-in types, they are never linked
+TYPE_KEYWORDS = frozenset((
+    'bool', 'byte', 'sbyte', 'char', 'decimal', 'double', 'float', 'int', 'uint', 'nint',
+    'nuint', 'long', 'ulong', 'short', 'ushort', 'object', 'string', 'void', 'dynamic',
+))
+#: the objtypes a type in a signature can refer to
+TYPE_OBJTYPES = frozenset(('class', 'struct', 'interface', 'enum'))
+
+
+class DNArgument(NamedTuple):
+    """A single parameter of a parsed signature."""
+    modifier: Optional[str]
+    type: str
+    name: Optional[str]
+
+
+class DNSignature(NamedTuple):
+    """A .NET signature broken down by :py:func:`parse_signature`.
+
+    The namespace of a construct is not part of its signature, it is
+    determined by the nesting of domain directives.
+    """
+    #: the signature without the return type
+    declaration: str
+    #: dotted type path in front of the member name
+    prefix: Tuple[str, ...]
+    #: the member name, including its generic parameter list
+    name: str
+    generic_params: Tuple[str, ...]
+    #: raw text of the argument list, ``None`` when there is no argument list
+    arglist: Optional[str]
+    args: Optional[Tuple[DNArgument, ...]]
+    return_type: Optional[str]
+
+    @property
+    def arg_types(self) -> Tuple[str, ...]:
+        return tuple(arg.type for arg in self.args or ())
+
+
+def _parse_argument(words: List[str]) -> DNArgument:
+    modifiers = []
+    while len(words) > 1 and words[0] in ARGUMENT_MODIFIERS:
+        modifiers.append(words.pop(0))
+    return DNArgument(' '.join(modifiers) or None,
+                      re.sub(r'\s+', '', words[0]) if words else '',
+                      words[1] if len(words) > 1 else None)
+
+
+@functools.lru_cache(maxsize=8192)
+def parse_signature(sig: str) -> DNSignature:
+    """Parses a .NET signature in a single pass.
+
+    Only the delimiters matched by ``_SIG_DELIMITERS`` are visited. The
+    nesting depth of generic brackets and parentheses is tracked so that
+    nested generics like ``Dictionary<string, List<int>>`` stay a single
+    argument type. Results are memoized by the raw signature string.
+    """
+    sig = sig.strip()
+    depth = 0
+    dots: List[int] = []
+    generic_open = generic_close = -1
+    generic_commas: List[int] = []
+    open_paren = close_paren = -1
+    arg_breaks: List[Tuple[int, str]] = []
+
+    for match in _SIG_DELIMITERS.finditer(sig):
+        char = match.group()
+        pos = match.start()
+        if char in '<[{(':
+            if depth == 0 and open_paren < 0:
+                if char == '(':
+                    open_paren = pos
+                elif char == '<':
+                    generic_open = pos
+                    generic_commas = []
+            depth += 1
+        elif char in '>]})':
+            depth -= 1
+            if depth == 0 and open_paren >= 0:
+                if char == ')':
+                    close_paren = pos
+                    break
+            elif depth == 0 and char == '>' and generic_open >= 0:
+                generic_close = pos
+        elif open_paren < 0:
+            if depth == 0 and char == '.':
+                # the generic parameters belong to a segment of the prefix
+                dots.append(pos)
+                generic_open = generic_close = -1
+            elif depth == 1 and char == ',' and generic_open >= 0:
+                generic_commas.append(pos)
+        elif depth == 1 and (char == ',' or char.isspace()):
+            arg_breaks.append((pos, char))
+
+    if close_paren < 0:
+        # no (complete) argument list
+        open_paren = -1
+        arg_breaks = []
+
+    member = sig[:open_paren] if open_paren >= 0 else sig
+    prefix = []
+    start = 0
+    for dot in dots:
+        if dot < len(member):
+            prefix.append(member[start:dot].strip())
+            start = dot + 1
+    name = member[start:].strip()
+
+    generic_params: Tuple[str, ...] = ()
+    if generic_open >= 0 and generic_close >= 0:
+        bounds = [generic_open] + generic_commas + [generic_close]
+        generic_params = tuple(sig[bounds[i] + 1:bounds[i + 1]].strip()
+                               for i in range(len(bounds) - 1))
+
+    arglist = None
+    args = None
+    return_type = None
+    declaration = sig
+    if open_paren >= 0:
+        arglist = sig[open_paren + 1:close_paren].strip()
+        declaration = sig[:close_paren + 1]
+        rest = sig[close_paren + 1:].strip()
+        if rest.startswith(':'):
+            return_type = rest[1:].strip() or None
+
+        parsed = []
+        words: List[str] = []
+        start = open_paren + 1
+        for pos, char in arg_breaks + [(close_paren, ',')]:
+            word = sig[start:pos]
+            if word.strip():
+                words.append(word.strip())
+            start = pos + 1
+            if char == ',':
+                if words:
+                    parsed.append(_parse_argument(words))
+                words = []
+        args = tuple(parsed)
+
+    return DNSignature(declaration, tuple(prefix), name, generic_params,
+                       arglist, args, return_type)
+
+
+def split_dotted(name: str) -> List[str]:
+    """Splits a dotted .NET name on the dots that are not nested inside
+    generic brackets or an argument list.
+
+    ``EdgeDB.Foo<System.String>.Bar(System.Int32)`` gives
+    ``['EdgeDB', 'Foo<System.String>', 'Bar(System.Int32)']``.
+    """
+    parts = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(name):
+        if char in '<([{':
+            depth += 1
+        elif char in '>)]}':
+            depth -= 1
+        elif char == '.' and depth == 0:
+            parts.append(name[start:i])
+            start = i + 1
+    parts.append(name[start:])
+    return parts
+
+
+def overload_base(fullname: str) -> str:
+    """Strips the argument list off a method's fullname.
+
+    ``EdgeDB.Client.Query<T>(string, int)`` gives ``EdgeDB.Client.Query<T>``,
+    the name shared by all overloads of the method.
+    """
+    paren = fullname.find('(')
+    return fullname[:paren] if paren >= 0 else fullname
+
+
+def overload_key(name: str) -> str:
+    """Returns the key of the overload group of a method: its
+    :py:func:`overload_base` without the generic parameters of the method,
+    those of the types it is in counted like :py:func:`generic_key` does.
+
+    ``EdgeDB.Client.Query<T>(string)``, ``EdgeDB.Client.Query{T}`` and
+    ``EdgeDB.Client.Query`` all give ``EdgeDB.Client.Query``, the group of
+    the generic and non-generic overloads, as in C#.
+    """
+    parts = split_dotted(generic_key(overload_base(name)))
+    parts[-1] = parts[-1].split('`', 1)[0]
+    return '.'.join(parts)
+
+
+def method_arity(name: str) -> Optional[int]:
+    """Returns the number of generic parameters given for a method, e.g.
+    1 for ``Query<T>``, ``Query{T}`` or ``Query``1``, None if there are
+    none."""
+    last = split_dotted(generic_key(overload_base(name)))[-1]
+    arity = last.rpartition('`')[2]
+    return int(arity) if '`' in last and arity.isdigit() else None
+
+
+def _same_type(a: str, b: str) -> bool:
+    # Dictionary<string, object> is Dictionary{string,object}
+    return (re.sub(r'\s+', '', a).replace('{', '<').replace('}', '>')
+            == re.sub(r'\s+', '', b).replace('{', '<').replace('}', '>'))
+
+
+@functools.lru_cache(maxsize=8192)
+def generic_key(name: str) -> str:
+    """Replaces the generic parameters or arguments of every segment of a
+    dotted name with their number, in the backtick notation of .NET.
+
+    ``EdgeDB.Result<T>``, ``EdgeDB.Result<string>`` and the cref style
+    ``EdgeDB.Result{T}`` all give ``EdgeDB.Result`1``, the open generic they
+    name. The argument list of a method is kept as it is, names without
+    generics are returned unchanged.
+    """
+    product = []
+    depth = 0
+    arity = 0
+    for i, char in enumerate(name):
+        if char in '<{' or (depth and char in '(['):
+            if not depth:
+                arity = 1
+            depth += 1
+        elif depth and char in '>})]':
+            depth -= 1
+            if not depth:
+                product.append(f'`{arity}')
+        elif depth:
+            if depth == 1 and char == ',':
+                arity += 1
+        elif char == '(':
+            product.append(name[i:])
+            break
+        else:
+            product.append(char)
+    return ''.join(product)
+
+
+_TYPE_TOKENS = re.compile(r'[A-Za-z_@][\w.]*|\s+|.')
+
+
+@functools.lru_cache(maxsize=4096)
+def split_type(text: str) -> Tuple[Tuple[str, Optional[str]], ...]:
+    """Splits the text of a C# type into tokens, giving the names of types
+    along with their lookup key, the :py:func:`generic_key` of the open
+    generic they name.
+
+    ``Func<Transaction,Task<T>>`` gives ``Func`` with the key ``Func`2``,
+    ``<``, ``Transaction`` with the key ``Transaction``, ``,`` and so on.
+    Punctuation and whitespace have no key.
+    """
+    tokens = _TYPE_TOKENS.findall(text)
+    result = []
+    for i, token in enumerate(tokens):
+        if not (token[0].isalpha() or token[0] in '_@'):
+            result.append((token, None))
+            continue
+        arity = 0
+        j = i + 1
+        while j < len(tokens) and tokens[j].isspace():
+            j += 1
+        if j < len(tokens) and tokens[j] == '<':
+            arity = 1
+            depth = 0
+            for other in tokens[j:]:
+                if other in '<([':
+                    depth += 1
+                elif other in '>)]':
+                    depth -= 1
+                    if depth == 0:
+                        break
+                elif other == ',' and depth == 1:
+                    arity += 1
+        result.append((token, f'{token}`{arity}' if arity else token))
+    return tuple(result)
+
+
+def make_node_id(sig: str) -> str:
+    """Returns the node id of the object with the dotnet_sig_id ``sig``.
+
+    ``Test<TType>(TType thing)`` gives ``Test_TType_-TType``.
+    """
+    parsed = parse_signature(sig)
+    product = '.'.join(parsed.prefix + (parsed.name,))
+
+    args = parsed.arg_types
+    if any(args):
+        product += "-" + "-".join(args)
+
+    # keep generic brackets and whitespace out of anchors, links and
+    # inventories
+    return re.sub(r"\s+", "", product).replace("<", "_").replace(">", "_")
+
+
+def name_suffixes(fullname: str) -> List[str]:
+    """Returns every dotted tail of a fullname, shortest first.
+
+    ``EdgeDB.Bar.Foo`` gives ``['Foo', 'Bar.Foo', 'EdgeDB.Bar.Foo']``.
+    """
+    parts = split_dotted(fullname)
+    return ['.'.join(parts[i:]) for i in range(len(parts) - 1, -1, -1)]
+
+
+class DNProfiler:
+    """Counts and times the hot paths of the domain.
+
+    Profiling is off unless the ``dn_profile`` config value is set, in which
+    case a JSON report is written at ``build-finished``. Timings are
+    inclusive, e.g. the time of :py:meth:`DNDomain.resolve_xref` includes
+    the :py:meth:`DNDomain.find_obj` calls it makes. Everything is recorded
+    per document, so the read results of parallel workers can be merged.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.reset()
+
+    def reset(self) -> None:
+        # hot path -> docname -> [calls, seconds]
+        self.documents: Dict[str, Dict[str, List[Any]]] = {}
+        # (typ, target) -> docname -> failures
+        self.failed: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self._docnames: List[str] = []
+
+    @property
+    def current_docname(self) -> Optional[str]:
+        return self._docnames[-1] if self._docnames else None
+
+    def record(self, name: str, docname: str, seconds: float) -> None:
+        entry = self.documents.setdefault(name, {}).setdefault(docname, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def note_failure(self, typ: str, target: str, docname: str) -> None:
+        failures = self.failed.setdefault((typ, target), {})
+        failures[docname] = failures.get(docname, 0) + 1
+
+    def merge(self, docnames: Set[str], other: Dict[str, Any]) -> None:
+        """Merges the read phase results of a parallel worker."""
+        for name, documents in other['documents'].items():
+            for docname, (calls, seconds) in documents.items():
+                if docname in docnames:
+                    entry = self.documents.setdefault(name, {}).setdefault(docname, [0, 0.0])
+                    entry[0] += calls
+                    entry[1] += seconds
+
+    def state(self) -> Dict[str, Any]:
+        return {'documents': self.documents}
+
+    def report(self) -> Dict[str, Any]:
+        hot_paths = {}
+        for name, documents in sorted(self.documents.items()):
+            hot_paths[name] = {
+                'calls': sum(calls for calls, _ in documents.values()),
+                'seconds': round(sum(seconds for _, seconds in documents.values()), 6),
+                'documents': {
+                    docname: {'calls': calls, 'seconds': round(seconds, 6)}
+                    for docname, (calls, seconds) in sorted(documents.items())
+                },
+            }
+        return {
+            'hot_paths': hot_paths,
+            'failed_targets': [
+                {'type': typ, 'target': target, 'count': sum(documents.values()),
+                 'documents': dict(sorted(documents.items()))}
+                for (typ, target), documents in sorted(self.failed.items())
+            ],
+        }
+
+
+profiler = DNProfiler()
+
+
+def profiled(name: str, get_docname: Callable[..., Optional[str]]) -> Callable:
+    """Times the decorated hot path with :py:data:`profiler` when profiling
+    is enabled. ``get_docname`` picks the document from the call arguments."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            docname = get_docname(*args, **kwargs) or ''
+            profiler._docnames.append(docname)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.record(name, docname, time.perf_counter() - start)
+                profiler._docnames.pop()
+        return wrapper
+    return decorator
+
+
+def _directive_docname(self: Any, *args: Any, **kwargs: Any) -> Optional[str]:
+    return self.env.docname
+
+
 class DNFieldMixin:
     def make_xref(self, rolename, domain, target, *args, **kwargs):
         if rolename:
             return d_nodes.literal(target, target)
         return super().make_xref(rolename, domain, target, *args, **kwargs)
 
+
+#: bump when the nodes the directives produce change, so that cached
+#: fragments written by an older version are not reused
+FRAGMENT_CACHE_VERSION = 8
+
+
+def _fragment_cacheable(fragment: List[Node]) -> bool:
+    """Whether replaying the dn objects and targets of a rendered block is
+    enough to reproduce it, see :py:meth:`DNObject.run`.
+
+    Anything else in its content that registers itself while parsing,
+    labels, objects of other domains, version notes, or that the transforms
+    resolve against the rest of the document, named hyperlinks and
+    substitutions, makes the block render from source every time. So does
+    content that failed to parse.
+    """
+    for top in fragment:
+        for node in top.findall(Element):
+            if isinstance(node, (d_nodes.system_message, d_nodes.pending,
+                                 d_nodes.substitution_reference, addnodes.versionmodified)):
+                return False
+            if isinstance(node, addnodes.desc) and node.get('domain') != 'dn':
+                return False
+            if node.get('names') or node.get('refname') or (
+                    node.get('ids') and not isinstance(node, desc_signature)
+                    and not _is_property_target(node)):
+                return False
+    return True
+
+
+def _is_property_target(node: Node) -> bool:
+    return isinstance(node, d_nodes.target) and 'dn-property' in node['classes']
+
+
+class WarningCounter(pylogging.Handler):
+    """Counts the warnings Sphinx logs while it is installed, see
+    :py:func:`count_warnings`."""
+
+    def __init__(self) -> None:
+        super().__init__(pylogging.WARNING)
+        self.count = 0
+
+    def emit(self, record: pylogging.LogRecord) -> None:
+        self.count += 1
+
+
+@contextmanager
+def count_warnings() -> Iterator[WarningCounter]:
+    """Counts the warnings logged in the block, those the configuration
+    suppresses included, which is on the safe side for deciding whether
+    its output may be cached."""
+    counter = WarningCounter()
+    sphinx_logger = pylogging.getLogger(logging.NAMESPACE)
+    sphinx_logger.addHandler(counter)
+    try:
+        yield counter
+    finally:
+        sphinx_logger.removeHandler(counter)
+
+
+class dn_type_reference(d_nodes.inline):
+    """A type named in a dn signature, replaced by a link to the type or
+    by its name once all of them are resolved, see
+    :py:class:`DNTypeReferenceResolver`."""
+
+
+class dn_fragment(d_nodes.General, d_nodes.Element):
+    """Stands in for the nodes of a cached block until the document has
+    been transformed, see :py:class:`DNFragmentTransform`."""
+
+
 class DNObject(ObjectDescription[Tuple[str, str]]):
     """The .NET object for declared signature handling of directives and roles.
     
@@ -62,6 +572,8 @@ class DNObject(ObjectDescription[Tuple[str, str]]):
     """
     has_arguments = False
     allow_nesting = False
+    #: whether the directive renders a list of the members declared in it
+    lists_members = False
     option_spec: OptionSpec = {
         "no_link": directives.flag,
     }
@@ -72,6 +584,141 @@ class DNObject(ObjectDescription[Tuple[str, str]]):
         #: what is displayed right before the documentation entry
         return []
 
+    def run(self) -> List[Node]:
+        """Renders the directive, or reuses its rendering from the previous
+        build when its source hasn't changed.
+
+        The doc generator rewrites ``api.rst`` as a whole, so Sphinx reads
+        all of it again after any edit. The blocks of the types directly in
+        a namespace are therefore cached by the hash of their source and
+        context, see :py:meth:`fragment_key`. An unchanged block
+        skips parsing; its nodes are loaded from the fragment cache and the
+        objects, targets and member registrations it made are replayed.
+        With ``dn_shared_cache``, so are the blocks rendered by the builds of
+        other releases of the documentation.
+        """
+        frames = self.env.ref_context.get('dn:children') or []
+        if (not self.lists_members or isinstance(self, DNNamespaceDirective)
+                or (frames and frames[-1][0] != 'namespace')
+                or self.config.language not in (None, 'en')):
+            return super().run()
+
+        domain = cast(DNDomain, self.env.get_domain('dn'))
+        docname = self.env.docname
+        key = self.fragment_key()
+        record = domain.load_fragment(docname, key)
+        if record is not None:
+            fragment = self.replay_fragment(domain, record)
+            domain.note_fragment(docname, key, record['keys'])
+            return fragment
+
+        source, lineno = self.get_source_info()
+        record = {'source': source, 'lineno': lineno,
+                  'length': self.block_text.count('\n') + 1, 'objects': [], 'keys': []}
+        outer = [(members, len(members)) for _, members in frames]
+        dependencies = len(self.env.dependencies[docname])
+        domain._fragment_records.append(record)
+        try:
+            with count_warnings() as warnings:
+                fragment = super().run()
+        finally:
+            domain._fragment_records.pop()
+        # some nodes count their lines from the paragraph or field they are
+        # in, those must not be mistaken for lines of the block when it moves,
+        # see replay_fragment
+        span = max((len(node.rawsource.splitlines()) for top in fragment
+                    for node in top.findall(d_nodes.TextElement)), default=0)
+        if (warnings.count
+                or dependencies != len(self.env.dependencies[docname])
+                or record['lineno'] is None or record['lineno'] <= span + 1
+                or not _fragment_cacheable(fragment)):
+            return fragment
+
+        signodes = [signode for top in fragment for signode in top.findall(desc_signature)]
+        positions = {id(signode): i for i, signode in enumerate(signodes)}
+        record['objects'] = [(positions[id(location)], fullname, objtype, node_id)
+                             for location, fullname, objtype, node_id in record['objects']]
+        record['exports'] = [(depth, positions[id(signode)], sig_id)
+                             for depth, (members, start) in enumerate(outer)
+                             for signode, sig_id in members[start:]]
+        record['ref_context'] = {name: copy(self.env.ref_context.get(name))
+                                 for name in ('dn:module', 'dn:object', 'dn:objects')}
+        # where parsing the block left the document, for the nodes after it
+        record['current_line'] = self.state.document.current_line
+        # stored once it has been transformed, see DNFragmentTransform
+        domain._pending_fragments.append((key, fragment, record))
+        domain.note_fragment(docname, key, record['keys'])
+        return fragment
+
+    def fragment_key(self) -> str:
+        """Hashes everything the rendering of this block depends on: its
+        source, where it is and the context it is parsed in."""
+        ref_context = self.env.ref_context
+        source, _line = self.get_source_info()
+        if os.path.isabs(source):
+            # the same in every checkout, see dn_shared_cache
+            source = os.path.relpath(source, self.env.srcdir)
+        default_domain = self.env.temp_data.get('default_domain')
+        context = (
+            FRAGMENT_CACHE_VERSION, self.name, source, self.block_text,
+            cast(DNDomain, self.env.get_domain('dn')).config_digest,
+            ref_context.get('dn:module'), ref_context.get('dn:object'),
+            ref_context.get('dn:objects'),
+            [objtype for objtype, _members in ref_context.get('dn:children') or []],
+            self.env.temp_data.get('default_role'),
+            default_domain.name if default_domain else None,
+        )
+        return hashlib.sha256(repr(context).encode('utf-8')).hexdigest()
+
+    def replay_fragment(self, domain: DNDomain, record: Dict[str, Any]) -> List[Node]:
+        """Returns a placeholder for the cached nodes of this block, after
+        making the calls its rendering made on the document, the domain and
+        the enclosing directives."""
+        fragment = record['nodes']
+        source, lineno = self.get_source_info()
+        delta = lineno - record['lineno']
+        current_line = record['current_line']
+        self.state.document.current_line = current_line + delta if current_line is not None else None
+        if delta:
+            # the block moved, e.g. a block above it grew; only the lines
+            # within it are moved along, some nodes count their lines from
+            # the paragraph or field they are in
+            first = record['lineno'] - 1
+            last = record['lineno'] + record['length']
+            for top in fragment:
+                for node in top.findall(Element):
+                    if node.line is not None and first <= node.line <= last:
+                        node.line += delta
+        if source != record['source']:
+            # rendered by the build of another checkout
+            for top in fragment:
+                for node in top.findall(Element):
+                    if node.source == record['source']:
+                        node.source = source
+        for top in fragment:
+            if isinstance(top, addnodes.desc):
+                top.document = self.state.document
+
+        signodes = [signode for top in fragment for signode in top.findall(desc_signature)]
+        for signode in signodes:
+            if signode['ids']:
+                self.state.document.note_explicit_target(signode)
+        for top in fragment:
+            for target in top.findall(_is_property_target):
+                self.state.document.note_explicit_target(target)
+        for position, fullname, objtype, node_id in record['objects']:
+            domain.note_object(fullname, objtype, node_id, location=signodes[position])
+        frames = self.env.ref_context.get('dn:children') or []
+        for depth, position, sig_id in record['exports']:
+            frames[depth][1].append((signodes[position], sig_id))
+        for name, value in record['ref_context'].items():
+            self.env.ref_context[name] = copy(value)
+        self.env.temp_data['object'] = None
+        placeholder = dn_fragment()
+        placeholder.fragment = fragment
+        return [placeholder]
+
+    @profiled('handle_signature', _directive_docname)
     def handle_signature(self, sig: str, signode: desc_signature) -> Tuple[str, str]:
         """Breaks down construct signatures
 
@@ -80,32 +727,20 @@ class DNObject(ObjectDescription[Tuple[str, str]]):
         directives.
         """
 
-        self.sig_name = sig
-        
-        sig = sig.strip()
-        if '(' in sig and sig[-1:] == ')':
-            member, arglist = sig.split('(', 1)
-            member = member.strip()
-            arglist = arglist[:-1].strip()
-        else:
-            member = sig
-            arglist = None
+        parsed = parse_signature(sig)
+        self.sig_name = parsed.declaration
+
+        arglist = parsed.arglist
         # If construct is nested, prefix the current prefix
         prefix = self.env.ref_context.get('dn:object', None)
         mod_name = self.env.ref_context.get('dn:module')
 
-        name = member
-        try:
-            member_prefix, member_name = member.rsplit('.', 1)
-        except ValueError:
-            member_name = name
-            member_prefix = ''
-        finally:
-            name = member_name
-            if prefix and member_prefix:
-                prefix = '.'.join([prefix, member_prefix])
-            elif prefix is None and member_prefix:
-                prefix = member_prefix
+        name = parsed.name
+        member_prefix = '.'.join(parsed.prefix)
+        if prefix and member_prefix:
+            prefix = '.'.join([prefix, member_prefix])
+        elif prefix is None and member_prefix:
+            prefix = member_prefix
         fullname = name
         if prefix:
             fullname = '.'.join([prefix, name])
@@ -125,20 +760,62 @@ class DNObject(ObjectDescription[Tuple[str, str]]):
             actual_prefix = mod_name
         if actual_prefix:
             addName = addnodes.desc_addname('', '')
-            for p in actual_prefix.split('.'):
+            for p in split_dotted(actual_prefix):
                 addName += addnodes.desc_sig_name(p, p)
                 addName += addnodes.desc_sig_punctuation('.', '.')
             signode += addName
         signode += addnodes.desc_name('', '', addnodes.desc_sig_name(name, name))
         if self.has_arguments:
-            if not arglist:
-                signode += addnodes.desc_parameterlist()
-            else:
-                _pseudo_parse_arglist(signode, arglist)
+            paramlist = addnodes.desc_parameterlist()
+            scope = self.generic_scope(parsed, prefix)
+            for arg in parsed.args or ():
+                param = addnodes.desc_parameter('', '')
+                for modifier in (arg.modifier or '').split():
+                    param += addnodes.desc_sig_keyword(modifier, modifier)
+                    param += addnodes.desc_sig_space()
+                param.extend(self.make_type_nodes(arg.type, scope, mod_name, prefix))
+                if arg.name:
+                    param += addnodes.desc_sig_space()
+                    param += addnodes.desc_sig_name(arg.name, arg.name)
+                paramlist += param
+            signode += paramlist
 
-        
         return fullname, prefix
 
+    @staticmethod
+    def generic_scope(parsed: DNSignature, prefix: Optional[str]) -> Set[str]:
+        """Returns the generic parameters a signature can use, its own and
+        those of the types it is nested in."""
+        scope = set(parsed.generic_params)
+        for part in split_dotted(prefix) if prefix else ():
+            scope.update(parse_signature(part).generic_params)
+        return scope
+
+    def make_type_nodes(self, text: str, scope: Set[str], mod_name: Optional[str],
+                        prefix: Optional[str]) -> List[Node]:
+        """Renders the text of a type. The names of types other than the
+        built-in ones and the generic parameters in ``scope`` become
+        :py:class:`dn_type_reference` nodes, looked up from ``prefix``."""
+        result: List[Node] = []
+        for token, key in split_type(text):
+            if key is None:
+                if token.isspace():
+                    result.append(addnodes.desc_sig_space())
+                else:
+                    result.append(addnodes.desc_sig_punctuation(token, token))
+            elif token in TYPE_KEYWORDS:
+                result.append(addnodes.desc_sig_keyword_type(token, token))
+            elif token in scope:
+                result.append(addnodes.desc_sig_name(token, token))
+            else:
+                ref = dn_type_reference('', '', addnodes.desc_sig_name(token, token),
+                                        reftarget=key)
+                ref['dn:module'] = mod_name
+                ref['dn:object'] = prefix
+                result.append(ref)
+        return result
+
+    @profiled('add_target_and_index', _directive_docname)
     def add_target_and_index(self, name_obj: Tuple[str, str], sig: str,
                              signode: desc_signature) -> None:
         """MIT(c) edit, 2022 quinchs"""
@@ -150,6 +827,7 @@ class DNObject(ObjectDescription[Tuple[str, str]]):
 
         signode['ids'].append(node_id)
         self.state.document.note_explicit_target(signode)
+        self.register_with_parent(signode, dotnet_sig_id)
 
         domain = cast(DNDomain, self.env.get_domain('dn'))
 
@@ -162,77 +840,43 @@ class DNObject(ObjectDescription[Tuple[str, str]]):
                 self.indexnode['entries'].append(('single', indextext, node_id, '', None))
 
     # Test<TType>(TType thing)
-    # Test_TType-TType
+    # Test_TType_-TType
     def node_id_from_sig_id(self, sig: str):
-        paren_index = sig.find("(")
-        product = sig[:paren_index] if paren_index != -1 else sig
-
-        args = []
-        if "(" in sig:
-            args = sig.split("(")[1].split(")")[0].split(", ")
-        
-        # generic_match = re.match(".*?<(.*?)>\(", sig)
-        # if generic_match is not None:
-        #     product += "_".join(generic_match.group(1).split(", "))
-        
-        if any(args):
-            product += "-" + "-".join(args)
-
-        return product
+        return make_node_id(sig)
 
     def create_dotnet_sig_id(self, fullname: str, sig: str):
         # we only want to reformat method directives, we can leave out everything else.
         if not isinstance(self, DNMethodDirective):
             return fullname
 
-        sig = sig.strip("\n")
-
-        args_segment = sig.split("(")[1]
-        
-        if args_segment[-1] != ')':
-            args_segment = ":".join(args_segment.split(":")[:-1])[:-1]
-        else:
-            args_segment = args_segment[:-1]
-
-        arguments = args_segment.split(", ")
-       
-        if len(arguments) == 0:
-            return f"{fullname}()"
-
-        # 'args' follows the format: [{this} type, name, type, name, ...], in our 
+        # 'args' follows the format: [{modifier} type name, ...], in our 
         # case we only need the type
-        formatted_args = []
-        for arg in arguments:
-            spl = arg.strip().split(" ")
-            if len(spl) == 2:
-                formatted_args.append(spl[0])
-            elif len(spl) == 3:
-                formatted_args.append(spl[1])
-            else:
-                if spl[0] == "this":
-                    formatted_args.append(spl[1])
-                else:
-                    formatted_args.append(spl[0])
-        
-        node_id = fullname
-
-        node_id += f"({', '.join(formatted_args)})"
-
-        return node_id
+        return f"{fullname}({', '.join(parse_signature(sig).arg_types)})"
 
     def get_index_text(self, objectname: str, name_obj: Tuple[str, str]) -> str:
+        """Returns the general index entry of the object, qualified by the
+        namespace or type declaring it, ``objectname`` being the namespace."""
         name, obj = name_obj
-        if self.objtype == 'function':
-            if not obj:
-                return _('%s() (built-in function)') % name
-            return _('%s() (%s method)') % (name, obj)
-        elif self.objtype == 'class':
-            return _('%s() (class)') % name
-        elif self.objtype == 'data':
-            return _('%s (global variable or constant)') % name
-        elif self.objtype == 'attribute':
-            return _('%s (%s attribute)') % (name, obj)
-        return ''
+        if self.objtype == 'namespace':
+            return _('%s (namespace)') % '.'.join(filter(None, [objectname, name]))
+        owner = '.'.join(filter(None, [objectname, obj]))
+        if obj and name.startswith(obj + '.'):
+            name = name[len(obj) + 1:]
+        if self.objtype in CALLABLE_OBJTYPES:
+            if not owner:
+                return _('%s() (function)') % name
+            if self.objtype == 'constructor':
+                return _('%s() (%s constructor)') % (name, owner)
+            if obj:
+                return _('%s() (%s method)') % (name, owner)
+            return _('%s() (function in %s)') % (name, owner)
+        kind = {'class': _('class'), 'interface': _('interface'),
+                'struct': _('struct'), 'enum': _('enum')}.get(self.objtype)
+        if kind is None:
+            return ''
+        if owner:
+            return _('%s (%s in %s)') % (name, kind, owner)
+        return _('%s (%s)') % (name, kind)
 
     def before_content(self) -> None:
         """Handle object nesting before content
@@ -257,6 +901,10 @@ class DNObject(ObjectDescription[Tuple[str, str]]):
             dn:object
                 Current object prefix. This should generally reflect the last
                 element in the prefix history
+
+            dn:children
+                Stack of member registries of the enclosing classes and
+                namespaces. See :py:meth:`register_with_parent`.
         """
         prefix = None
         if self.names:
@@ -269,6 +917,9 @@ class DNObject(ObjectDescription[Tuple[str, str]]):
             if self.allow_nesting:
                 objects = self.env.ref_context.setdefault('dn:objects', [])
                 objects.append(prefix)
+        if self.lists_members:
+            frames = self.env.ref_context.setdefault('dn:children', [])
+            frames.append((self.objtype, []))
 
     def after_content(self) -> None:
         """Handle object de-nesting after content
@@ -286,9 +937,34 @@ class DNObject(ObjectDescription[Tuple[str, str]]):
                 objects.pop()
             except IndexError:
                 pass
+        if self.lists_members:
+            frames = self.env.ref_context.setdefault('dn:children', [])
+            if frames:
+                frames.pop()
         self.env.ref_context['dn:object'] = (objects[-1] if len(objects) > 0
                                              else None)
 
+    def register_with_parent(self, signode: desc_signature, dotnet_sig_id: str) -> None:
+        """Registers a signature and its id with the registries of the
+        enclosing directives, so that :py:meth:`transform_content` can list
+        members without walking the content tree.
+
+        Every member is registered with its direct parent. Types are also
+        registered with the innermost enclosing namespace, so nested types
+        show up in the namespace's list as well.
+        """
+        frames = self.env.ref_context.get('dn:children')
+        if not frames:
+            return
+        parent_objtype, members = frames[-1]
+        members.append((signode, dotnet_sig_id))
+        if self.objtype in CALLABLE_OBJTYPES or parent_objtype == 'namespace':
+            return
+        for objtype, namespace_members in reversed(frames[:-1]):
+            if objtype == 'namespace':
+                namespace_members.append((signode, dotnet_sig_id))
+                break
+
     def make_old_id(self, fullname: str) -> str:
         """Generate old styled node_id for .NET objects.
 
@@ -298,6 +974,7 @@ class DNObject(ObjectDescription[Tuple[str, str]]):
         self.content_id = fullname.replace('$', '_S_')
         return self.content_id
 
+    @profiled('transform_content', _directive_docname)
     def transform_content(self, contentnode: addnodes.desc_content):
         """Transforms the contents of the given node annotations and
         introspectively adds xref-based targets for child methods of
@@ -306,18 +983,23 @@ class DNObject(ObjectDescription[Tuple[str, str]]):
         MIT(c) edit, 2022 quinchs & i0bs.
         """
 
-        if not isinstance(self, DNClassDirective) and not isinstance(self, DNNamespaceDirective):
+        if not self.lists_members:
             return
 
-        child_directives = contentnode.traverse(addnodes.desc_signature)
-
-        if not len(child_directives):
+        frames = self.env.ref_context.get('dn:children')
+        if not frames:
             return
 
+        child_directives = frames[-1][1]
+
         if isinstance(self, DNNamespaceDirective):
             # only include types, not methods
-            child_directives = [x for x in child_directives if x.parent.get("desctype") != "method"]
-        
+            child_directives = [(x, sig_id) for x, sig_id in child_directives
+                                if x.parent.get("desctype") not in CALLABLE_OBJTYPES]
+
+        if not len(child_directives):
+            return
+
         rendered_child_elements = list(filter(lambda x: not isinstance(x, addnodes.desc), contentnode.children))
         existing_field_list = None
         idx = len(rendered_child_elements)
@@ -332,7 +1014,7 @@ class DNObject(ObjectDescription[Tuple[str, str]]):
             
         bullet_list_content = []
 
-        for node in child_directives:
+        for node, sig_id in child_directives:
              # gets the nodes 'ids' property and gets the last id, 
              # incase of default ids being appended
             xref_node_id = node.get("ids")[-1]
@@ -340,29 +1022,23 @@ class DNObject(ObjectDescription[Tuple[str, str]]):
             
             if isinstance(self, DNClassDirective):
                 # remove the namespace/class def from full name and
-                # add () to the end
-                params = xref_node_id.replace(node_name, "")
-                if params and params != "":
-                    params = params[1:].replace("-", ", ")
-                    params = f"({params})"
-                else:
-                    params = "()"
-
-                node_name = node_name.split(f"{self.sig_name}.")[1] + params
+                # add the argument types to the end
+                params = ", ".join(parse_signature(sig_id).arg_types)
+                node_name = node_name.split(f"{self.sig_name}.")[1] + f"({params})"
             elif isinstance(self, DNNamespaceDirective):
                 # remove the namspace bit from the full name
                 node_name = node_name.split(f"{self.sig_name}.")[1]
 
-            xref_node_id = xref_node_id.replace("<", "_").replace(">", "_")
-
             reference_node = reference('', '', literal('', node_name), internal=True, refid=xref_node_id, reftitle=node_name)
 
-            bullet_list_content.append(list_item('', reference_node))
+            bullet_list_content.append(list_item('', d_nodes.paragraph('', '', reference_node)))
 
         if isinstance(self, DNClassDirective):
             method_field_builder = DNField('methods', label=_('Methods'), has_arg=False, bodyrolename='obj')
-            method_bullet_list = bullet_list('', *bullet_list_content)
-            method_field = method_field_builder.make_field([], 'dn', (None, method_bullet_list), self.env)
+            method_bullet_list = bullet_list('', *bullet_list_content, classes=['dn-members'])
+            method_field = method_field_builder.make_field([], 'dn', (None, [method_bullet_list]), self.env)
+            # make_field puts the list in a paragraph, a list can't be in one
+            method_field[1][0].replace_self(method_bullet_list)
         
             if existing_field_list:
                 existing_field_list.append(method_field)
@@ -370,8 +1046,9 @@ class DNObject(ObjectDescription[Tuple[str, str]]):
                 contentnode.append(field_list('', method_field))
         elif isinstance(self, DNNamespaceDirective):
             class_field_builder = DNField('classes', label=_('Types'), has_arg=False, bodyrolename='obj')
-            class_bullet_list = bullet_list('', *bullet_list_content)
-            class_field = class_field_builder.make_field([], 'dn', (None, class_bullet_list), self.env)
+            class_bullet_list = bullet_list('', *bullet_list_content, classes=['dn-members'])
+            class_field = class_field_builder.make_field([], 'dn', (None, [class_bullet_list]), self.env)
+            class_field[1][0].replace_self(class_bullet_list)
         
             if existing_field_list:
                 existing_field_list.append(class_field)
@@ -422,22 +1099,64 @@ class DNCallableDirective(DNObject):
             names=('rtype'), bodyrolename='obj')
     ]
 
+    def transform_content(self, contentnode: addnodes.desc_content) -> None:
+        self.note_properties(contentnode)
+        super().transform_content(contentnode)
+
+    def note_properties(self, contentnode: addnodes.desc_content) -> None:
+        """Registers the ``:property:`` fields of a type as ``dn:property``
+        objects.
+
+        This runs before the fields are rendered, a target at the start of
+        the description of each property anchors it.
+        """
+        if (not isinstance(self, DNClassDirective) or 'no_link' in self.options
+                or 'noindex' in self.options):
+            return
+        signodes = [node for node in contentnode.parent.children
+                    if isinstance(node, desc_signature) and node['ids']]
+        if not signodes:
+            return
+        signode = signodes[0]
+        mod_name = signode.get('module')
+        prefix = (mod_name + '.' if mod_name else '') + signode['fullname']
+        names = next(field.names for field in self.doc_field_types
+                     if field.name == 'properties')
+        domain = cast(DNDomain, self.env.get_domain('dn'))
+
+        for fields in contentnode.children:
+            if not isinstance(fields, field_list):
+                continue
+            for field in fields.children:
+                # :property <type> <name>: as the DocFieldTransformer splits it
+                words = field[0].astext().split()
+                if len(words) < 2 or words[0] not in names:
+                    continue
+                fullname = f'{prefix}.{words[-1]}'
+                node_id = make_node_id(fullname)
+                target = d_nodes.target('', '', ids=[node_id], classes=['dn-property'])
+                body = field[1]
+                if len(body) and isinstance(body[0], d_nodes.paragraph):
+                    body[0].insert(0, target)
+                else:
+                    body.insert(0, target)
+                self.state.document.note_explicit_target(target)
+                domain.note_object(fullname, 'property', node_id, location=signode)
+                if 'noindexentry' not in self.options:
+                    self.indexnode['entries'].append(
+                        ('single', _('%s (%s property)') % (words[-1], prefix), node_id,
+                         '', None))
+
     def handle_signature(self, sig: str, signode: desc_signature) -> Tuple[str, str]:
         # i0: adopting this code from edgedb-js as it works well for getting the
         # return type shown in the code block rendered.
-        # if the function has a return type specified, clip it before
-        # processing the rest of signature
-        if sig[-1] != ')' and '):' in sig:
-            newsig, rettype = sig.rsplit(':', 1)
-            rettype = rettype.strip()
-        else:
-            newsig = sig
-            rettype = None
+        fullname, prefix = super().handle_signature(sig, signode)
 
-        fullname, prefix = super().handle_signature(newsig, signode)
-
-        if rettype:
-            signode += s_nodes.desc_returns(rettype, rettype)
+        parsed = parse_signature(sig)
+        if parsed.return_type:
+            signode += s_nodes.desc_returns('', '', *self.make_type_nodes(
+                parsed.return_type, self.generic_scope(parsed, prefix),
+                signode['module'], prefix))
 
         return fullname, prefix
 
@@ -478,6 +1197,7 @@ class DNClassDirective(DNCallableDirective):
     """
     display_prefix = 'class '
     allow_nesting = True
+    lists_members = True
     option_spec = {
         **DNObject.option_spec,
         **{
@@ -488,6 +1208,7 @@ class DNClassDirective(DNCallableDirective):
 class DNNamespaceDirective(DNObject):
     display_prefix = 'namespace '
     allow_nesting = True
+    lists_members = True
     has_arguments = False
     option_spec = {
         **DNObject.option_spec,
@@ -508,7 +1229,34 @@ class DNEnumDirective(DNClassDirective):
     """Represents a enum directive."""
     display_prefix = 'enum '
 
+class DNCurrentNamespaceDirective(SphinxDirective):
+    """Declares the following directives of the document in a namespace
+    without describing the namespace, like ``py:currentmodule`` does. The
+    pages :py:func:`split_document` makes of types start with it.
+
+    ```
+    .. dn:currentnamespace:: EdgeDB
+    ```
+    """
+    has_content = False
+    required_arguments = 1
+    optional_arguments = 0
+    final_argument_whitespace = False
+    option_spec: OptionSpec = {}
+
+    def run(self) -> List[Node]:
+        namespace = self.arguments[0].strip()
+        ref_context = self.env.ref_context
+        ref_context['dn:object'] = namespace
+        ref_context['dn:objects'] = [namespace]
+        # the types register with it, as they do with a dn:namespace
+        ref_context['dn:children'] = [('namespace', [])]
+        return []
+
 class DNXRefRole(XRefRole):
+    # ``Title <target>`` needs the whitespace, ``Result<T>`` is a generic name
+    explicit_title_re = re.compile(r'^(.+?)\s+(?<!\x00)<(.*?)>$', re.DOTALL)
+
     def update_title_and_target(self, title: str, target: str) -> Tuple[str, str]:
         title, target = super().update_title_and_target(title, target)
         if title.endswith(")()"):
@@ -516,6 +1264,7 @@ class DNXRefRole(XRefRole):
         
         return title, target
 
+    @profiled('process_link', lambda self, env, *args, **kwargs: env.docname)
     def process_link(self, env: BuildEnvironment, refnode: Element,
                      has_explicit_title: bool, title: str, target: str) -> Tuple[str, str]:
         # basically what sphinx.domains.python.PyXRefRole does
@@ -525,95 +1274,3369 @@ class DNXRefRole(XRefRole):
             title = title.lstrip('.')
             target = target.lstrip('~')
             if title[0:1] == '~':
-                title = title[1:]
-                dot = title.rfind('.')
-                if dot != -1:
-                    title = title[dot + 1:]
+                title = split_dotted(title[1:])[-1]
         if target[0:1] == '.':
             target = target[1:]
             refnode['refspecific'] = True
         return title, target
 
-class DNDomain(js.JavaScriptDomain):
-    name = 'dn'
-    label = 'Dotnet'
-    directives = {
-        'function': DNCallableDirective,
-        'method': DNMethodDirective,
-        'constructor': DNConstructorDirective,
-        'namespace': DNNamespaceDirective,
-        'class': DNClassDirective,
-        'interface': DNInterfaceDirective,
-        'struct': DNStructDirective,
-        'enum': DNEnumDirective
-    }
-    roles = {
-        'function':  DNXRefRole(fix_parens=True),
-        'method':  DNXRefRole(fix_parens=True),
-        'constructor': DNXRefRole(fix_parens=True),
-        'namespace': DNXRefRole(),
-        'class': DNXRefRole(),
-        'interface': DNXRefRole(),
-        'struct': DNXRefRole(),
-        'enum': DNXRefRole()
-    }
+#: version of the on-disk format written by :py:func:`load_xml_doc`
+XML_DOC_CACHE_VERSION = 2
 
-    def find_obj(self, env: BuildEnvironment, mod_name: str, prefix: str, name: str,
-                 typ: str, searchorder: int = 0) -> Tuple[str, Tuple[str, str, str]]:
-        searches = []
-        if mod_name and prefix:
-            searches.append('.'.join([mod_name, prefix, name]))
-        if mod_name:
-            searches.append('.'.join([mod_name, name]))
-        if prefix:
-            searches.append('.'.join([prefix, name]))
-        searches.append(name)
-        
-        if typ == 'method' and not typ.endswith(')'):
-            searches.append(f'{name}()')
+#: C# keywords for the framework types, as used by the doc generator
+XML_DOC_TYPE_ALIASES = {
+    'String': 'string', 'Int16': 'short', 'Int32': 'int', 'Int64': 'long',
+    'Boolean': 'bool', 'Object': 'object', 'Void': 'void', 'Byte': 'byte',
+    'SByte': 'sbyte', 'UInt16': 'ushort', 'UInt32': 'uint', 'UInt64': 'ulong',
+    'Char': 'char', 'Decimal': 'decimal', 'Double': 'double', 'Single': 'float',
+}
 
-        if searchorder == 0:
-            searches.reverse()
+_XML_TYPE_NAME = re.compile(r'[^{},\[\]@*]+')
+_XML_WHITESPACE = re.compile(r'\s+')
+#: crefs are resolved once the whole file has been streamed, see
+#: :py:func:`_resolve_crefs`
+_XML_CREF = re.compile('\x1a([^\x1a]*)\x1a')
 
-        newname = None
-        for search_name in searches:
-            if search_name in self.objects:
-                newname = search_name
+# parsed XML documentation files, keyed by (path, mtime, size)
+_xml_doc_memo: Dict[Tuple[str, int, int], Dict[str, Any]] = {}
 
-        return newname, self.objects.get(newname)
 
-    def resolve_xref(self, env: BuildEnvironment, fromdocname: str, builder: Builder,
-                     typ: str, target: str, node: pending_xref, contnode: Element
-                     ) -> Optional[Element]:
-        result = super().resolve_xref(env, fromdocname, builder, typ, target, node, contnode)
+def _generic_names(names: List[str], arity: int) -> List[str]:
+    if len(names) == arity:
+        return names
+    if arity == 1:
+        return ['T']
+    return [f'T{i + 1}' for i in range(arity)]
 
-        if result is None:
-            # generics act wierd, inner text within the ref + target form the generic str `ref_text<target>`
-            old_tgt = target
-            target = f"{node.astext()}<{target}>"
-            result = super().resolve_xref(env, fromdocname, builder, typ, target, node, contnode)
-            
-            if result is None:
-                logger.warning("Failed to resolve %s %s", typ, old_tgt)
 
+def format_xml_type(text: str, type_params: List[str], method_params: List[str],
+                    pos: int = 0) -> Tuple[str, int]:
+    """Formats a type from an XML documentation id the way the doc generator
+    renders it, e.g. ``System.Collections.Generic.IDictionary{System.String,System.Object}``
+    becomes ``IDictionary<string,object>``.
+
+    Returns the formatted type and the position after it.
+    """
+    match = _XML_TYPE_NAME.match(text, pos)
+    name = match.group() if match else ''
+    pos = match.end() if match else pos
 
-        if result is not None and target.find("<") != -1 and "refid" in result:
-            # reformat the ref node
-            result["refid"] = result["refid"].replace("<", "_").replace(">", "_")
+    nullable = name == 'System.Nullable'
+    args = []
+    if text[pos:pos + 1] == '{':
+        pos += 1
+        while pos < len(text):
+            arg, pos = format_xml_type(text, type_params, method_params, pos)
+            args.append(arg)
+            char = text[pos:pos + 1]
+            pos += 1
+            if char != ',':
+                break
 
-            if not target.endswith(")"):
-                target += "()"
+    suffix = ''
+    while text[pos:pos + 1] in ('[', '@', '*') and pos < len(text):
+        if text[pos] == '[':
+            end = text.find(']', pos)
+            end = len(text) - 1 if end < 0 else end
+            suffix += '[' + ',' * text.count(',', pos, end) + ']'
+            pos = end + 1
+        else:
+            suffix += '&' if text[pos] == '@' else '*'
+            pos += 1
 
-            result.children[0] = literal('', target)
+    if name.startswith('``'):
+        index = int(name[2:])
+        short = method_params[index] if index < len(method_params) else f'TM{index}'
+    elif name.startswith('`'):
+        index = int(name[1:])
+        short = type_params[index] if index < len(type_params) else f'T{index}'
+    else:
+        short = name.rsplit('.', 1)[-1]
+
+    if nullable and len(args) == 1:
+        return args[0] + '?' + suffix, pos
+    if args:
+        return f"{short.split('`')[0]}<{','.join(args)}>{suffix}", pos
+    if not suffix:
+        short = XML_DOC_TYPE_ALIASES.get(short, short)
+    return short + suffix, pos
+
+
+def _split_xml_args(text: str) -> List[str]:
+    args = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(text):
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            args.append(text[start:i])
+            start = i + 1
+    if text[start:]:
+        args.append(text[start:])
+    return args
+
+
+def _split_member_id(member_id: str) -> Tuple[str, str, Optional[str]]:
+    """Splits ``M:EdgeDB.Foo.Bar(System.String)`` into the declaring type
+    id, the member name and the raw argument list."""
+    path, paren, args = member_id[2:].partition('(')
+    if paren:
+        args = args[:args.rfind(')')]
+    parent, _, name = path.rpartition('.')
+    return parent, name, args if paren else None
+
+
+class _XMLDocText:
+    """Converts the inline content of an XML documentation element to reST."""
+
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+        self.current = ''
+
+    def text(self, text: Optional[str]) -> None:
+        if text:
+            self.current += _XML_WHITESPACE.sub(' ', text)
+
+    def newline(self) -> None:
+        if self.current.strip():
+            self.lines.append(self.current.strip())
+        self.current = ''
+
+    def paragraph(self) -> None:
+        self.newline()
+        if self.lines and self.lines[-1]:
+            self.lines.append('')
+
+    def convert(self, element: Any) -> None:
+        self.text(element.text)
+        for child in element:
+            tag = child.tag
+            if tag in ('see', 'seealso') and 'cref' in child.attrib:
+                self.text('\x1a' + child.attrib['cref'] + '\x1a')
+            elif tag == 'see' and 'langword' in child.attrib:
+                self.text('``' + child.attrib['langword'] + '``')
+            elif tag in ('see', 'seealso') and 'href' in child.attrib:
+                label = ''.join(child.itertext()).strip() or child.attrib['href']
+                self.text(f"`{label} <{child.attrib['href']}>`_")
+            elif tag in ('paramref', 'typeparamref'):
+                self.text('``' + child.attrib.get('name', '') + '``')
+            elif tag == 'c':
+                self.text('``' + ''.join(child.itertext()).strip() + '``')
+            elif tag == 'code':
+                self.paragraph()
+                self.lines.extend(['.. code-block:: csharp', ''])
+                code = ''.join(child.itertext()).strip('\n').splitlines()
+                indent = min((len(l) - len(l.lstrip()) for l in code if l.strip()), default=0)
+                self.lines.extend('    ' + l[indent:] for l in code)
+                self.lines.append('')
+            elif tag in ('para', 'br'):
+                self.paragraph()
+                self.convert(child)
+                self.paragraph()
+            elif tag == 'list':
+                self.paragraph()
+                for item in child:
+                    self.current = '- '
+                    self.convert(item)
+                    self.newline()
+                self.paragraph()
+            else:
+                self.convert(child)
+            self.text(child.tail)
+
+    def finish(self) -> List[str]:
+        self.newline()
+        while self.lines and not self.lines[-1]:
+            self.lines.pop()
+        return self.lines
+
+
+def _convert_xml_doc(element: Any) -> List[str]:
+    converter = _XMLDocText()
+    converter.convert(element)
+    return converter.finish()
+
+
+def _stream_xml_doc(path: str) -> Dict[str, Any]:
+    """Streams the members of an XML documentation file, converting the
+    documentation of each member as soon as its element is complete."""
+    types: Dict[str, Dict[str, Any]] = {}
+    members: Dict[str, Dict[str, Any]] = {}
+
+    def type_record(type_id: str) -> Dict[str, Any]:
+        return types.setdefault(type_id, {
+            'kind': None, 'typeparams': [], 'doc': {}, 'members': [], 'has_fields': False,
+        })
+
+    for _event, element in ElementTree.iterparse(path, events=('end',)):
+        if element.tag != 'member':
+            continue
+        member_id = element.get('name', '')
+        doc: Dict[str, Any] = {}
+        for child in element:
+            if child.tag in ('summary', 'remarks', 'returns', 'value'):
+                doc[child.tag] = _convert_xml_doc(child)
+            elif child.tag in ('param', 'typeparam'):
+                doc.setdefault(child.tag, []).append(
+                    [child.get('name', ''), _convert_xml_doc(child)])
+            elif child.tag == 'exception':
+                doc.setdefault('exception', []).append(
+                    [child.get('cref', ''), _convert_xml_doc(child)])
+            elif child.tag == 'inheritdoc':
+                doc['inheritdoc'] = True
+        element.clear()
+
+        if member_id.startswith('T:'):
+            record = type_record(member_id[2:])
+            record['doc'] = doc
+            record['typeparams'] = [name for name, _ in doc.get('typeparam', [])]
+        elif member_id[:2] in ('M:', 'P:', 'F:', 'E:'):
+            parent, name, _args = _split_member_id(member_id)
+            if '#' in name.replace('#ctor', ''):
+                # explicit interface implementations aren't part of the public API
+                continue
+            record = type_record(parent)
+            record['members'].append(member_id)
+            record['has_fields'] |= member_id.startswith('F:')
+            members[member_id] = {'doc': doc}
+
+    for type_id, record in types.items():
+        name = type_id.rsplit('.', 1)[-1]
+        if re.match(r'I[A-Z]', name):
+            record['kind'] = 'interface'
+        elif record['has_fields'] and not any(m[:2] in ('M:', 'P:') for m in record['members']):
+            record['kind'] = 'enum'
+        else:
+            record['kind'] = 'class'
+        record['name'] = format_type_name(type_id, types)
+
+    data = {'version': XML_DOC_CACHE_VERSION, 'types': types, 'members': members}
+    _resolve_crefs(data)
+    return data
+
+
+def format_type_name(type_id: str, types: Dict[str, Dict[str, Any]]) -> str:
+    """Formats a type definition name, ``EdgeDB.Group`2`` becomes
+    ``Group<TKey, TElement>``. Nested types keep their declaring types."""
+    parts = type_id.split('.')
+    declaring = []
+    for i in range(len(parts) - 1, 0, -1):
+        if '.'.join(parts[:i]) not in types:
+            break
+        declaring.insert(0, parts[i - 1])
+    formatted = []
+    for i, part in enumerate(declaring + [parts[-1]]):
+        name, _, arity = part.partition('`')
+        if arity:
+            record_id = '.'.join(parts[:len(parts) - len(declaring) + i])
+            params = _generic_names(types.get(record_id, {}).get('typeparams', []), int(arity))
+            name += f"<{', '.join(params)}>"
+        formatted.append(name)
+    return '.'.join(formatted)
+
+
+def type_namespace(type_id: str, types: Dict[str, Dict[str, Any]]) -> str:
+    """The namespace of a type id, which excludes any declaring types."""
+    parts = type_id.split('.')
+    end = len(parts) - 1
+    while end > 0 and '.'.join(parts[:end]) in types:
+        end -= 1
+    return '.'.join(parts[:end])
+
+
+def format_member_signature(member_id: str, data: Dict[str, Any],
+                            with_names: bool = True) -> str:
+    """Builds the dn signature of a method from its XML documentation id."""
+    parent, name, raw_args = _split_member_id(member_id)
+    record = data['types'].get(parent, {})
+    doc = data['members'].get(member_id, {}).get('doc', {})
+    parent_name = parent.rsplit('.', 1)[-1]
+    type_params = _generic_names(record.get('typeparams', []),
+                                 int(parent_name.partition('`')[2] or 0))
+
+    name, _, arity = name.partition('``')
+    method_params = _generic_names([n for n, _ in doc.get('typeparam', [])], int(arity or 0))
+    if name == '#ctor':
+        base, _, parent_arity = parent_name.partition('`')
+        name = base
+        if parent_arity:
+            name += f"<{','.join(type_params)}>"
+    elif method_params:
+        name += f"<{', '.join(method_params)}>"
+
+    arg_types = []
+    for arg in _split_xml_args(raw_args or ''):
+        typ = format_xml_type(arg, type_params, method_params)[0]
+        # a by-reference parameter, ``@`` in the id, is a ref one in C#
+        if typ.endswith('&'):
+            typ = 'ref ' + XML_DOC_TYPE_ALIASES.get(typ[:-1], typ[:-1])
+        arg_types.append(typ)
+    if with_names:
+        arg_names = [n for n, _ in doc.get('param', [])]
+        if len(arg_names) == len(arg_types):
+            arg_types = [f'{t} {n}' for t, n in zip(arg_types, arg_names)]
+    return f"{name}({', '.join(arg_types)})"
+
+
+def _resolve_crefs(data: Dict[str, Any]) -> None:
+    types = data['types']
+
+    def cref_role(match: Any) -> str:
+        cref = match.group(1)
+        kind, target = cref[:2], cref[2:]
+        if kind == 'T:' and target in types:
+            record = types[target]
+            namespace = type_namespace(target, types)
+            fullname = '.'.join(filter(None, [namespace, record['name']]))
+            return f":dn:{record['kind']}:`{fullname}`"
+        if kind == 'M:' and cref in data['members']:
+            parent = _split_member_id(cref)[0]
+            namespace = type_namespace(parent, types)
+            owner = '.'.join(filter(None, [namespace, types[parent]['name']]))
+            sig = format_member_signature(cref, data, with_names=False)
+            return f":dn:method:`{owner}.{sig}`"
+        return f"``{target}``"
+
+    def resolve(lines: List[str]) -> List[str]:
+        return [_XML_CREF.sub(cref_role, line) for line in lines]
+
+    for record in [*types.values(), *data['members'].values()]:
+        doc = record['doc']
+        for key, value in doc.items():
+            if key in ('param', 'typeparam', 'exception'):
+                doc[key] = [[name, resolve(lines)] for name, lines in value]
+            elif isinstance(value, list):
+                doc[key] = resolve(value)
+
+
+def load_xml_doc(path: str, cache_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Loads a compiler-produced XML documentation file.
+
+    The file is parsed with a streaming parser and the result is cached on
+    disk in ``cache_dir`` keyed by the hash of the file, so an unchanged
+    assembly is never parsed twice. Within a process the result is also
+    memoized by path, mtime and size.
+    """
+    stat = os.stat(path)
+    memo_key = (path, stat.st_mtime_ns, stat.st_size)
+    if memo_key in _xml_doc_memo:
+        return _xml_doc_memo[memo_key]
+
+    cache_file = None
+    if cache_dir:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 16), b''):
+                digest.update(chunk)
+        cache_file = os.path.join(cache_dir, f'{digest.hexdigest()}.json')
+        try:
+            with open(cache_file, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == XML_DOC_CACHE_VERSION:
+                _xml_doc_memo[memo_key] = data
+                return data
+        except (OSError, ValueError):
+            pass
+
+    data = _stream_xml_doc(path)
+
+    if cache_file:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_file, cache_file)
+
+    _xml_doc_memo[memo_key] = data
+    return data
+
+
+class DNAutoDirective(SphinxDirective):
+    """Base for the directives that document .NET constructs straight from
+    the XML documentation file the compiler produces.
+
+    The file is taken from the ``:xmldoc:`` option or the ``dn_xml_doc``
+    config value, relative to the documentation source directory. The
+    directives generate the same ``dn`` directives the doc generator would
+    write and parse them in place, so the resulting nodes are identical.
+
+    .. note::
+
+        The XML documentation file has no visibility, property type or
+        return type information, and it doesn't tell classes from structs.
+        Interfaces and enums are detected by naming convention and members,
+        the ``:exclude:`` option can be used to leave out non-public types.
+    """
+    required_arguments = 1
+    option_spec: OptionSpec = {
+        'xmldoc': directives.unchanged,
+        'exclude': directives.unchanged,
+    }
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        path = self.options.get('xmldoc') or self.config.dn_xml_doc
+        if not path:
+            logger.warning(__('no XML documentation file given, set dn_xml_doc or :xmldoc:'),
+                           location=self.get_location())
+            return None
+        rel_path, path = self.env.relfn2path(path)
+        self.env.note_dependency(rel_path)
+        try:
+            return load_xml_doc(path, os.path.join(self.env.doctreedir, 'dn_xmldoc'))
+        except (OSError, ElementTree.ParseError) as exc:
+            logger.warning(__('could not read XML documentation file %s: %s'), path, exc,
+                           location=self.get_location())
+            return None
+
+    def excluded(self) -> List[str]:
+        return [name.strip() for name in self.options.get('exclude', '').split(',') if name.strip()]
+
+    def doc_lines(self, doc: Dict[str, Any], member_id: Optional[str],
+                  data: Dict[str, Any]) -> List[str]:
+        # same order as the doc generator: summary, remarks, params,
+        # typeparams, returns, exceptions
+        lines = list(doc.get('summary', []))
+        if lines:
+            lines.append('')
+        if doc.get('remarks'):
+            lines.extend(['.. note::', ''])
+            lines.extend('    ' + line for line in doc['remarks'])
+            lines.append('')
+        arg_types: List[str] = []
+        if member_id and member_id.startswith('M:'):
+            parsed = parse_signature(format_member_signature(member_id, data, with_names=False))
+            arg_types = list(parsed.arg_types)
+        for i, (name, text) in enumerate(doc.get('param', [])):
+            typ = arg_types[i] + ' ' if i < len(arg_types) else ''
+            lines.append(f':param {typ}{name}:')
+            lines.extend('    ' + line for line in text)
+            lines.append('')
+        for name, text in doc.get('typeparam', []):
+            lines.append(f':param {name}:')
+            lines.extend('    ' + line for line in text)
+            lines.append('')
+        if doc.get('returns'):
+            lines.append(':returns:')
+            lines.extend('    ' + line for line in doc['returns'])
+            lines.append('')
+        for cref, text in doc.get('exception', []):
+            lines.append(f':throws {cref[2:]}:')
+            lines.extend('    ' + line for line in text)
+            lines.append('')
+        return lines
+
+    def type_lines(self, type_id: str, data: Dict[str, Any], kind: str,
+                   name: str) -> List[str]:
+        record = data['types'][type_id]
+        lines = [f'.. dn:{kind}:: {name}', '']
+        body = self.doc_lines(record['doc'], type_id, data)
+        for member_id in record['members']:
+            if member_id.startswith('P:'):
+                prop_name = _split_member_id(member_id)[1]
+                prop_doc = data['members'][member_id]['doc']
+                body.append(f':property {prop_name}:')
+                body.extend('    ' + line for line in
+                            prop_doc.get('summary', []) + prop_doc.get('value', []))
+                body.append('')
+        methods = [m for m in record['members'] if m.startswith('M:')]
+        # constructors first, like the doc generator
+        methods.sort(key=lambda m: _split_member_id(m)[1] != '#ctor')
+        for member_id in methods:
+            body.extend([f'.. dn:method:: {format_member_signature(member_id, data)}', ''])
+            body.extend('    ' + line for line in
+                        self.doc_lines(data['members'][member_id]['doc'], member_id, data))
+        lines.extend('    ' + line if line else '' for line in body)
+        lines.append('')
+        return lines
+
+    def parse_lines(self, lines: List[str]) -> List[Node]:
+        content = StringList()
+        source = self.get_source_info()[0]
+        for i, line in enumerate(lines):
+            content.append(line, source, self.lineno + i)
+        node = d_nodes.Element()
+        nested_parse_with_titles(self.state, content, node)
+        return node.children
+
+
+class DNAutoNamespaceDirective(DNAutoDirective):
+    """Documents every type of a namespace from the XML documentation file.
+
+    ```
+    .. dn:autonamespace:: EdgeDB
+        :xmldoc: tmp/driver.xml
+    ```
+    """
+
+    def run(self) -> List[Node]:
+        data = self.load()
+        if data is None:
+            return []
+        namespace = self.arguments[0].strip()
+        excluded = self.excluded()
+        types = data['types']
+
+        type_ids = sorted(
+            (type_id for type_id in types
+             if type_namespace(type_id, types) == namespace
+             and types[type_id]['name'] not in excluded
+             and type_id.rsplit('.', 1)[-1].split('`')[0] not in excluded),
+            key=lambda type_id: types[type_id]['name'])
+
+        lines = [f'.. dn:namespace:: {namespace}', '']
+        for type_id in type_ids:
+            record = types[type_id]
+            lines.extend('    ' + line if line else ''
+                         for line in self.type_lines(type_id, data, record['kind'], record['name']))
+        return self.parse_lines(lines)
+
+
+class DNAutoTypeDirective(DNAutoDirective):
+    """Documents a single type from the XML documentation file. The
+    directive name picks the kind, e.g. ``dn:autostruct``.
+
+    ```
+    .. dn:autoclass:: EdgeDB.EdgeDBClient
+    ```
+    """
+
+    def run(self) -> List[Node]:
+        data = self.load()
+        if data is None:
+            return []
+        target = self.arguments[0].strip()
+        types = data['types']
+
+        type_id = target if target in types else None
+        if type_id is None:
+            # allow the formatted generic name, e.g. EdgeDB.Group<TKey, TElement>
+            for candidate, record in types.items():
+                namespace = type_namespace(candidate, types)
+                if '.'.join(filter(None, [namespace, record['name']])) == target:
+                    type_id = candidate
+                    break
+        if type_id is None:
+            logger.warning(__('type %s not found in the XML documentation file'), target,
+                           location=self.get_location())
+            return []
+
+        record = types[type_id]
+        name = record['name']
+        namespace = type_namespace(type_id, types)
+        if namespace and self.env.ref_context.get('dn:object') != namespace:
+            name = f'{namespace}.{name}'
+        kind = self.name.split(':')[-1][len('auto'):]
+        return self.parse_lines(self.type_lines(type_id, data, kind, name))
+
+
+class DNObjectTable(MutableMapping):
+    """The objects of the domain, mapping fullnames to ``(docname, node_id,
+    objtype)`` like the objects of the other domains, kept compact for the
+    pickled environment.
+
+    ``data`` only holds builtins and arrays. A fullname is stored as the
+    codes of its dotted segments, its docname and objtype as codes too,
+    each in a flat array with one entry per row. The strings behind the
+    codes are interned in a single list, so a namespace or type name is
+    stored once however many members it has. Node ids are only stored when
+    they differ from :py:func:`make_node_id`. Deleted rows are marked dead
+    and dropped by :py:meth:`compact`.
+
+    The dicts mapping strings to codes and fullnames to rows are not
+    pickled, they are rebuilt on first use.
+    """
+
+    def __init__(self, data: Dict[str, Any]) -> None:
+        self.data = data
+        if 'strings' not in data:
+            self._reset()
+        self._codes: Optional[Dict[str, int]] = None
+        self._rows: Optional[Dict[str, int]] = None
+        self._doc_rows: Optional[Dict[int, List[int]]] = None
+
+    def _reset(self) -> None:
+        self.data.clear()
+        self.data.update({
+            'strings': [],  # code -> interned string
+            'segments': array('i'),  # segment codes of all fullnames
+            'offsets': array('i', [0]),  # row -> first of its segments
+            'docs': array('i'),  # row -> docname code, -1 for dead rows
+            'types': array('i'),  # row -> objtype code
+            'node_ids': {},  # row -> node id not given by make_node_id
+        })
+        self._codes = self._rows = self._doc_rows = None
+
+    @property
+    def codes(self) -> Dict[str, int]:
+        if self._codes is None:
+            self._codes = {string: i for i, string in enumerate(self.data['strings'])}
+        return self._codes
+
+    def intern(self, string: str) -> int:
+        code = self.codes.get(string)
+        if code is None:
+            code = self._codes[string] = len(self.data['strings'])
+            self.data['strings'].append(string)
+        return code
+
+    def segments(self, row: int) -> List[str]:
+        strings = self.data['strings']
+        offsets = self.data['offsets']
+        return [strings[code]
+                for code in self.data['segments'][offsets[row]:offsets[row + 1]]]
+
+    @property
+    def rows(self) -> Dict[str, int]:
+        if self._rows is None:
+            docs = self.data['docs']
+            self._rows = {'.'.join(self.segments(row)): row
+                          for row in range(len(docs)) if docs[row] >= 0}
+        return self._rows
+
+    def _entry(self, row: int, fullname: str) -> Tuple[str, str, str]:
+        strings = self.data['strings']
+        node_id = self.data['node_ids'].get(row)
+        return (strings[self.data['docs'][row]],
+                node_id if node_id is not None else make_node_id(fullname),
+                strings[self.data['types'][row]])
+
+    def __getitem__(self, fullname: str) -> Tuple[str, str, str]:
+        return self._entry(self.rows[fullname], fullname)
+
+    def __setitem__(self, fullname: str, entry: Tuple[str, str, str]) -> None:
+        docname, node_id, objtype = entry
+        row = self.rows.get(fullname)
+        if row is None:
+            row = self._rows[fullname] = len(self.data['docs'])
+            self.data['segments'].extend(self.intern(part) for part in split_dotted(fullname))
+            self.data['offsets'].append(len(self.data['segments']))
+            self.data['docs'].append(-1)
+            self.data['types'].append(-1)
+        elif self._doc_rows is not None:
+            self._doc_rows[self.data['docs'][row]].remove(row)
+        doc = self.intern(docname)
+        self.data['docs'][row] = doc
+        self.data['types'][row] = self.intern(objtype)
+        if node_id != make_node_id(fullname):
+            self.data['node_ids'][row] = node_id
+        else:
+            self.data['node_ids'].pop(row, None)
+        if self._doc_rows is not None:
+            self._doc_rows.setdefault(doc, []).append(row)
+
+    def __delitem__(self, fullname: str) -> None:
+        row = self.rows.pop(fullname)
+        if self._doc_rows is not None:
+            self._doc_rows[self.data['docs'][row]].remove(row)
+        self.data['docs'][row] = -1
+        self.data['node_ids'].pop(row, None)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, fullname: object) -> bool:
+        return fullname in self.rows
+
+    def items_with_segments(self) -> Iterator[Tuple[str, List[str], str]]:
+        """Yields the fullname, its dotted segments and the objtype of
+        every object, without splitting the fullnames again."""
+        strings = self.data['strings']
+        for fullname, row in self.rows.items():
+            yield fullname, self.segments(row), strings[self.data['types'][row]]
+
+    def fullnames_in(self, docname: str) -> List[str]:
+        """Returns the fullnames of the objects described in ``docname``."""
+        if self._doc_rows is None:
+            self._doc_rows = {}
+            for row in self.rows.values():
+                self._doc_rows.setdefault(self.data['docs'][row], []).append(row)
+        code = self.codes.get(docname)
+        return ['.'.join(self.segments(row)) for row in self._doc_rows.get(code, ())]
+
+    def compact(self) -> None:
+        """Drops the dead rows and the strings only they used, once they
+        make up most of the table."""
+        live = len(self.rows)
+        if len(self.data['docs']) <= 2 * live + 64:
+            return
+        entries = [(fullname, self[fullname]) for fullname in self.rows]
+        self._reset()
+        for fullname, entry in entries:
+            self[fullname] = entry
+
+
+class DNLookup:
+    """Finds dn objects by the names references use.
+
+    ``objects`` maps fullnames to whatever describes their target, the
+    lookup only needs the three indices next to it: ``suffixes`` maps every
+    dotted tail of a fullname to the fullnames ending in it, ``overloads``
+    every dotted tail of an :py:func:`overload_key` to the overloads of
+    the methods ending in it, simplest first, and ``generics`` every dotted
+    tail of the :py:func:`generic_key` of a generic fullname to the
+    fullnames ending in it. :py:class:`DNDomain` keeps
+    them for the objects of the project, :py:func:`resolve_inventory_reference`
+    builds them from the intersphinx inventories.
+    """
+
+    def __init__(self, objects: Dict[str, Any], suffixes: Dict[str, List[str]],
+                 overloads: Dict[str, List[str]], generics: Dict[str, List[str]]) -> None:
+        self.objects = objects
+        self.suffixes = suffixes
+        self.overloads = overloads
+        self.generics = generics
+        # name -> the candidates it was found ambiguous between
+        self.ambiguous: Dict[str, List[str]] = {}
+
+    def index(self, fullname: str, objtype: str, parts: Optional[List[str]] = None) -> None:
+        """Adds ``fullname`` to the indices, ``parts`` are its dotted
+        segments if they are known already."""
+        self.ambiguous.clear()
+        if parts is None:
+            parts = split_dotted(fullname)
+        for i in range(len(parts) - 1, -1, -1):
+            tail = '.'.join(parts[i:])
+            fullnames = self.suffixes.setdefault(tail, [])
+            if fullname not in fullnames:
+                fullnames.append(fullname)
+
+        key = generic_key(fullname)
+        if key != fullname:
+            for tail in name_suffixes(key):
+                fullnames = self.generics.setdefault(tail, [])
+                if fullname not in fullnames:
+                    fullnames.append(fullname)
+
+        if objtype not in CALLABLE_OBJTYPES or '(' not in fullname:
+            return
+        def order(name: str) -> Tuple[int, str]:
+            return len(parse_signature(name).args or ()), name
+
+        key = order(fullname)
+        base_parts = split_dotted(overload_key(fullname))
+        for i in range(len(base_parts) - 1, -1, -1):
+            fullnames = self.overloads.setdefault('.'.join(base_parts[i:]), [])
+            if fullname not in fullnames:
+                # the simplest overload first, it anchors the group; a
+                # binary search keeps adding to a big group from parsing
+                # all of its signatures again
+                lo, hi = 0, len(fullnames)
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    if order(fullnames[mid]) < key:
+                        lo = mid + 1
+                    else:
+                        hi = mid
+                fullnames.insert(lo, fullname)
+
+    def unindex(self, fullname: str) -> None:
+        self.ambiguous.clear()
+        tails = [(self.suffixes, tail) for tail in name_suffixes(fullname)]
+        if '(' in fullname:
+            tails += [(self.overloads, tail)
+                      for tail in name_suffixes(overload_key(fullname))]
+        key = generic_key(fullname)
+        if key != fullname:
+            tails += [(self.generics, tail) for tail in name_suffixes(key)]
+        for index, tail in tails:
+            fullnames = index.get(tail)
+            if fullnames is None:
+                continue
+            if fullname in fullnames:
+                fullnames.remove(fullname)
+            if not fullnames:
+                del index[tail]
+
+    def find(self, mod_name: str, prefix: str, name: str, typ: str,
+             searchorder: int = 0, location: Any = None) -> Tuple[str, Any]:
+        """Finds the object for the given name using the suffix index.
+
+        The candidates are ranked in the same order the plain lookup used to
+        probe the objects (module+prefix+name, module+name, prefix+name,
+        name, name()), but instead of probing each of them we take the
+        fullnames ending in ``name`` from the suffix index in a single lookup.
+        If none of the candidates is registered, a short name that is the
+        tail of exactly one fullname resolves to it; if it is the tail of
+        several, the ambiguity is reported and nothing is returned. Generic
+        names that match no fullname are looked up by :py:meth:`find_generic`,
+        methods that match neither by :py:meth:`find_overload`.
+        """
+        extra: Tuple[str, ...] = ()
+        matches = self.suffixes.get(name, [])
+
+        if typ == 'method' and not name.endswith(')'):
+            extra = (f'{name}()',)
+            matches = matches + self.suffixes.get(f'{name}()', [])
+
+        if not matches:
+            found = self.find_generic(mod_name, prefix, name, searchorder, location)
+            if found[1] is None and typ in CALLABLE_OBJTYPES:
+                return self.find_overload(mod_name, prefix, name, searchorder, location)
+            return found
+
+        rank = self._search_ranks(mod_name, prefix, name, searchorder, extra)
+        newname = max(matches, key=lambda m: rank.get(m, -1))
+
+        if newname not in rank:
+            if len(matches) > 1:
+                logger.warning(__('more than one target found for %r: %s'),
+                               name, ', '.join(sorted(matches)),
+                               type='ref', subtype='dn', location=location)
+                self.ambiguous[name] = sorted(matches)
+                return None, None
+
+        return newname, self.objects.get(newname)
+
+    @staticmethod
+    def _search_ranks(mod_name: str, prefix: str, name: str, searchorder: int,
+                      extra: Tuple[str, ...] = ()) -> Dict[str, int]:
+        # the fullnames name can refer to from the given context, the highest
+        # rank wins
+        searches = []
+        if mod_name and prefix:
+            searches.append('.'.join([mod_name, prefix, name]))
+        if mod_name:
+            searches.append('.'.join([mod_name, name]))
+        if prefix:
+            searches.append('.'.join([prefix, name]))
+        searches.append(name)
+        searches.extend(extra)
+
+        if searchorder == 0:
+            searches.reverse()
+        return {search_name: i for i, search_name in enumerate(searches)}
+
+    def find_type(self, mod_name: Optional[str], prefix: Optional[str], key: str
+                  ) -> Optional[str]:
+        """Finds the type a name in a signature refers to, given the
+        :py:func:`generic_key` of the name.
+
+        Like the C# compiler does, the closest of the scopes around
+        ``prefix`` that declares the type wins. A name that several types
+        end in, none of them in scope, isn't resolved; nor is a name of no
+        type of the project. Neither is reported, most of the types of a
+        signature come from elsewhere.
+        """
+        index = self.generics if '`' in key else self.suffixes
+        matches = [fullname for fullname in index.get(key, ())
+                   if self.objects[fullname][2] in TYPE_OBJTYPES]
+        if len(matches) <= 1:
+            return matches[0] if matches else None
+        candidates = {generic_key(fullname): fullname for fullname in matches}
+        scopes = split_dotted(mod_name) if mod_name else []
+        if prefix:
+            scopes += split_dotted(generic_key(prefix))
+        for i in range(len(scopes), -1, -1):
+            found = candidates.get('.'.join(scopes[:i] + [key]))
+            if found is not None:
+                return found
+        return None
+
+    def find_generic(self, mod_name: str, prefix: str, name: str,
+                     searchorder: int = 0, location: Any = None
+                     ) -> Tuple[str, Any]:
+        """Finds a generic object by the open generic a name refers to, so
+        that ``Result<T>``, ``Result<string>`` and ``Result{T}`` all find
+        ``Result<T>``. The fullname is picked like :py:meth:`find` picks it,
+        with the context and the candidates compared by their
+        :py:func:`generic_key`.
+        """
+        key = generic_key(name)
+        matches = self.generics.get(key)
+        if not matches:
+            return None, None
+
+        rank = self._search_ranks(mod_name, prefix and generic_key(prefix), key, searchorder)
+        newname = max(matches, key=lambda m: rank.get(generic_key(m), -1))
+        if generic_key(newname) not in rank and len(matches) > 1:
+            logger.warning(__('more than one target found for %r: %s'),
+                           name, ', '.join(sorted(matches)),
+                           type='ref', subtype='dn', location=location)
+            self.ambiguous[name] = sorted(matches)
+            return None, None
+        return newname, self.objects.get(newname)
+
+    def find_overload(self, mod_name: str, prefix: str, name: str,
+                      searchorder: int = 0, location: Any = None
+                      ) -> Tuple[str, Any]:
+        """Finds a method through the overload group of its name, see
+        :py:func:`overload_key`.
+
+        The group is picked like :py:meth:`find` picks a fullname. Generic
+        parameters given with the name, ``Query<T>``, narrow the group down
+        to the overloads with as many. A name without an argument list
+        resolves to the only overload of the group, or to its simplest
+        overload, which anchors the group. A name with an argument list that
+        doesn't match an overload exactly resolves to the overload with as
+        many arguments and the most argument types in common, or else to
+        the shortest overload starting with those arguments, the others
+        being optional; if that is not a single overload, the ambiguity is
+        reported and nothing is returned.
+        """
+        base = overload_key(name)
+        overloads = self.overloads.get(base)
+        if not overloads:
+            return None, None
+
+        groups: Dict[str, List[str]] = {}
+        for fullname in overloads:
+            groups.setdefault(overload_key(fullname), []).append(fullname)
+
+        rank = self._search_ranks(mod_name, prefix and generic_key(prefix), base, searchorder)
+        group_name = max(groups, key=lambda g: rank.get(g, -1))
+        if group_name not in rank and len(groups) > 1:
+            logger.warning(__('more than one target found for %r: %s'),
+                           name, ', '.join(sorted(groups)),
+                           type='ref', subtype='dn', location=location)
+            self.ambiguous[name] = sorted(groups)
+            return None, None
+        group = groups[group_name]
+        arity = method_arity(name)
+        if arity is not None:
+            group = [fullname for fullname in group if method_arity(fullname) == arity] or group
+
+        if '(' not in name:
+            return group[0], self.objects.get(group[0])
+
+        arg_types = parse_signature(name).arg_types
+        scores: Dict[str, int] = {}
+        for fullname in group:
+            types = parse_signature(fullname).arg_types
+            if len(types) == len(arg_types):
+                scores[fullname] = sum(_same_type(a, b) for a, b in zip(types, arg_types))
+        if not scores or max(scores.values()) < len(arg_types):
+            # the arguments left out may be optional ones
+            longer = {fullname: len(types) for fullname in group
+                      for types in [parse_signature(fullname).arg_types]
+                      if len(types) > len(arg_types)
+                      and all(map(_same_type, types, arg_types))}
+            if longer:
+                fewest = min(longer.values())
+                scores = {fullname: len(arg_types) for fullname, count in longer.items()
+                          if count == fewest}
+        if not scores:
+            return None, None
+
+        best = max(scores.values())
+        candidates = [fullname for fullname in group if scores.get(fullname) == best]
+        if len(candidates) > 1:
+            logger.warning(__('more than one overload of %s matches %r: %s'),
+                           group_name, name, ', '.join(candidates),
+                           type='ref', subtype='dn', location=location)
+            self.ambiguous[name] = candidates
+            return None, None
+        return candidates[0], self.objects.get(candidates[0])
+
+
+#: number of leading characters of a search key the shard manifest maps to
+#: the shards containing it
+SEARCH_PREFIX_LENGTH = 2
+
+
+def search_key(fullname: str) -> str:
+    """Returns the key an object is found by in the search shards: the
+    lowercased member name, without generic parameters and arguments."""
+    return parse_signature(fullname).name.split('<', 1)[0].lower()
+
+
+def build_search_trie(keys: Dict[str, List[int]]) -> Dict[str, Any]:
+    """Builds a radix trie of search keys.
+
+    Every node is a dict mapping edge labels to child nodes, chains of
+    single children are merged into one label. The empty label holds the
+    indices of the objects whose key ends at the node, so ``query`` and
+    ``queryasync`` give ``{'query': {'': [...], 'async': {'': [...]}}}``.
+    """
+    root: Dict[str, Any] = {}
+    for key, indices in keys.items():
+        node = root
+        for char in key:
+            node = node.setdefault(char, {})
+        node[''] = indices
+
+    def compress(node: Dict[str, Any]) -> Dict[str, Any]:
+        result = {}
+        for label, child in sorted(node.items()):
+            if label:
+                child = compress(child)
+                if len(child) == 1 and '' not in child:
+                    (rest, child), = child.items()
+                    label += rest
+            result[label] = child
+        return result
+
+    return compress(root)
+
+
+def index_sort_key(name: str) -> Tuple[str, str]:
+    """Returns the key the entries of the dn indices are sorted by: the
+    lowercased name without generic parameters and arguments, then the
+    name itself to order the overloads."""
+    return name.split('<', 1)[0].split('(', 1)[0].lower(), name
+
+
+def namespace_index_name(namespace: str) -> str:
+    """Returns the name of the :py:class:`DNNamespaceIndex` of ``namespace``,
+    its page is ``dn-<name>``. The objects outside of any namespace, under
+    ``''``, are listed on ``dn-global``."""
+    if not namespace:
+        return 'global'
+    return 'ns-' + re.sub(r'[^\w.-]', '_', namespace)
+
+
+class DNNamespacesIndex(Index):
+    """Lists the namespaces, each linking to its :py:class:`DNNamespaceIndex`."""
+    name = 'namespaces'
+    localname = _('Namespace Index')
+    shortname = _('namespaces')
+
+    def generate(self, docnames: Optional[Iterable[str]] = None
+                 ) -> Tuple[List[Tuple[str, List[IndexEntry]]], bool]:
+        domain = cast(DNDomain, self.domain)
+        content: Dict[str, List[IndexEntry]] = {}
+        for namespace, entries in sorted(domain.namespace_index.items(),
+                                         key=lambda item: index_sort_key(item[0])):
+            types = sum(1 for entry in entries if entry[5] is not None)
+            members = sum(len(entry[5] or ()) for entry in entries) + len(entries) - types
+            extra = _('types: %d, members: %d') % (types, members)
+            title = namespace or _('(global namespace)')
+            content.setdefault(title[0].upper(), []).append(IndexEntry(
+                title, 0, f'{domain.name}-{namespace_index_name(namespace)}', '',
+                extra, '', ''))
+        return sorted(content.items()), False
+
+
+class DNNamespaceIndex(Index):
+    """Lists the types of a namespace and their members, see
+    :py:meth:`DNDomain.update_indices` for the subclass made for each
+    namespace."""
+    name = 'ns'
+    localname = _('Namespace Index')
+    #: the namespace listed, set by the subclasses
+    namespace = ''
+
+    def generate(self, docnames: Optional[Iterable[str]] = None
+                 ) -> Tuple[List[Tuple[str, List[IndexEntry]]], bool]:
+        domain = cast(DNDomain, self.domain)
+        wanted = set(docnames) if docnames is not None else None
+        content: Dict[str, List[IndexEntry]] = {}
+        for _key, name, docname, node_id, objtype, members in \
+                domain.namespace_index.get(self.namespace, ()):
+            if members is None:
+                # a member of something that isn't a type, e.g. a function
+                # of the namespace
+                if wanted is None or docname in wanted:
+                    content.setdefault(name[0].upper(), []).append(IndexEntry(
+                        name, 0, docname, node_id, objtype, '', ''))
+                continue
+            shown = [member for member in members if wanted is None or member[2] in wanted]
+            if not shown and wanted is not None and docname not in wanted:
+                continue
+            entries = content.setdefault(name[0].upper(), [])
+            entries.append(IndexEntry(name, 1 if shown else 0, docname, node_id,
+                                      objtype, '', ''))
+            entries.extend(IndexEntry(member_name, 2, member_docname, member_id,
+                                      member_objtype, '', '')
+                           for _k, member_name, member_docname, member_id, member_objtype
+                           in shown)
+        return sorted(content.items()), False
+
+
+class DNDomain(js.JavaScriptDomain):
+    name = 'dn'
+    label = 'Dotnet'
+    directives = {
+        'function': DNCallableDirective,
+        'method': DNMethodDirective,
+        'constructor': DNConstructorDirective,
+        'namespace': DNNamespaceDirective,
+        'class': DNClassDirective,
+        'interface': DNInterfaceDirective,
+        'struct': DNStructDirective,
+        'enum': DNEnumDirective,
+        'autonamespace': DNAutoNamespaceDirective,
+        'autoclass': DNAutoTypeDirective,
+        'autointerface': DNAutoTypeDirective,
+        'autostruct': DNAutoTypeDirective,
+        'autoenum': DNAutoTypeDirective,
+        'currentnamespace': DNCurrentNamespaceDirective,
+    }
+    roles = {
+        'function':  DNXRefRole(fix_parens=True),
+        'method':  DNXRefRole(fix_parens=True),
+        'constructor': DNXRefRole(fix_parens=True),
+        'namespace': DNXRefRole(),
+        'class': DNXRefRole(),
+        'interface': DNXRefRole(),
+        'struct': DNXRefRole(),
+        'enum': DNXRefRole(),
+        'property': DNXRefRole(),
+    }
+    # the DNNamespaceIndex of every namespace is added by update_indices
+    indices = [DNNamespacesIndex]
+
+    initial_data: Dict[str, Dict[str, Any]] = {
+        'objects': {},  # see DNObjectTable
+        'modules': {},  # modname  -> docname, node_id
+        'references': {},  # docname -> {lookup name, ...}
+        'fragments': {},  # docname -> [fragment key, ...], see DNObject.run
+    }
+    data_version = 1
+
+    #: maximum number of memoized :py:meth:`resolve_xref` lookups
+    xref_cache_size = 4096
+
+    def __init__(self, env: BuildEnvironment) -> None:
+        super().__init__(env)
+        # (typ, target, dn:module, dn:object, refspecific) -> (name, obj) or
+        # None for targets that failed to resolve
+        self._xref_cache: OrderedDict[Tuple[str, str, str, str, bool],
+                                      Optional[Tuple[str, Tuple[str, str, str]]]] = OrderedDict()
+        # docname -> (typ, target) -> [occurrences, line of the first], for
+        # the documents resolved by this build, see report_unresolved
+        self._unresolved: Dict[str, Dict[Tuple[str, str], List[Any]]] = {}
+        # fullname -> entry before the current read phase touched it
+        self._touched: Dict[str, Optional[Tuple[str, str, str]]] = {}
+        # documents (re-)read in the current read phase
+        self._read_docs: Set[str] = set()
+        # intersphinx inventory name -> lookup, see get_inventory_lookup
+        self._inventory_lookups: Dict[Optional[str], DNLookup] = {}
+        self._objects = DNObjectTable(self.data.setdefault('objects', {}))
+        # built on first use, see lookup
+        self._lookup: Optional[DNLookup] = None
+        # lookup name -> the equal string already referenced, see note_reference
+        self._reference_names: Optional[Dict[str, str]] = None
+        # docname -> fragment keys of the previous read of the document
+        self._previous_fragments: Dict[str, Set[str]] = {}
+        # the records of the blocks being rendered, see DNObject.run
+        self._fragment_records: List[Dict[str, Any]] = []
+        # the blocks rendered from source, see DNFragmentTransform
+        self._pending_fragments: List[Tuple[str, List[Node], Dict[str, Any]]] = []
+        # see namespace_index
+        self._namespace_index: Optional[Dict[str, List[Tuple[Any, ...]]]] = None
+        # see config_digest
+        self._config_digest: Optional[str] = None
+        # fragments stored after this are kept by prune_fragments
+        self._loaded_at = time.time()
+
+    @property
+    def objects(self) -> DNObjectTable:  # type: ignore
+        return self._objects
+
+    @property
+    def lookup(self) -> DNLookup:
+        """Finds the objects described in this project.
+
+        Its indices are derived from the objects, so rather than being
+        pickled with the environment they are built when they are first
+        needed, usually when the first reference is resolved, and kept up
+        to date from then on.
+        """
+        if self._lookup is None:
+            self._lookup = DNLookup(self.objects, {}, {}, {})
+            for fullname, parts, objtype in self.objects.items_with_segments():
+                self._lookup.index(fullname, objtype, parts)
+        return self._lookup
+
+    @property
+    def references(self) -> Dict[str, Set[str]]:
+        return self.data.setdefault('references', {})  # docname -> {lookup name, ...}
+
+    @property
+    def fragments(self) -> Dict[str, List[str]]:
+        return self.data.setdefault('fragments', {})  # docname -> [fragment key, ...]
+
+    @property
+    def shared_cache(self) -> Optional[str]:
+        """The directory of ``dn_shared_cache``, if the builds of several
+        releases share their fragments and highlighted code."""
+        path = self.env.config.dn_shared_cache
+        return os.path.join(self.env.srcdir, path) if path else None
+
+    @property
+    def fragment_dir(self) -> str:
+        return os.path.join(self.shared_cache or self.env.doctreedir, 'dn_fragments')
+
+    def fragment_path(self, key: str) -> str:
+        return os.path.join(self.fragment_dir, f'{key}.pickle')
+
+    @property
+    def config_digest(self) -> str:
+        """Hashes the configuration values a change of which has Sphinx
+        read the documents again, so that a fragment rendered with other
+        values isn't reused, by another release sharing the cache notably.
+
+        The release and the version only reach the documents through
+        substitutions, which aren't cached, see :py:func:`_fragment_cacheable`,
+        so they are left out.
+        """
+        if self._config_digest is None:
+            values = sorted((item.name, repr(item.value)) for item in self.env.config
+                            if item.rebuild == 'env'
+                            and item.name not in ('release', 'version', 'today'))
+            self._config_digest = hashlib.sha256(repr(values).encode('utf-8')).hexdigest()
+        return self._config_digest
+
+    def load_fragment(self, docname: str, key: str) -> Optional[Dict[str, Any]]:
+        """Returns the record stored by :py:meth:`store_fragment`, if the
+        previous read of ``docname`` rendered a block with this key, or any
+        build sharing the cache did."""
+        if self.shared_cache is None and key not in self._previous_fragments.get(docname, ()):
+            return None
+        # a tree of nodes is a lot of objects referring to each other, they
+        # would set the cyclic garbage collector off over and over
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(self.fragment_path(key), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def store_fragment(self, key: str, fragment: List[Node], record: Dict[str, Any]) -> None:
+        # the nodes are detached from the document while they are pickled,
+        # it would be pickled along with them otherwise
+        parents = [top.parent for top in fragment]
+        documents = [(node, node._document) for top in fragment
+                     for node in top.findall() if node._document is not None]
+        for top in fragment:
+            top.parent = None
+        for node, _document in documents:
+            node.document = None
+        try:
+            data = pickle.dumps({**record, 'nodes': fragment}, pickle.HIGHEST_PROTOCOL)
+        finally:
+            for top, parent in zip(fragment, parents):
+                top.parent = parent
+            for node, document in documents:
+                node.document = document
+        path = self.fragment_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def note_fragment(self, docname: str, key: str, nested_keys: List[str]) -> None:
+        """Records that ``docname`` uses a fragment, along with the fragments
+        of the blocks nested in it, so that they are kept for its next read."""
+        keys = [key] + nested_keys
+        self.fragments.setdefault(docname, []).extend(keys)
+        for record in self._fragment_records:
+            record['keys'].extend(keys)
+
+    def prune_fragments(self) -> None:
+        """Removes the cached fragments no document uses anymore.
+
+        A shared cache has a manifest of the fragments used by each build
+        sharing it, named after its doctree directory. The fragments none
+        of them uses are removed, except those stored since this build
+        started, by a build running alongside it.
+        """
+        self._previous_fragments.clear()
+        live = {key for keys in self.fragments.values() for key in keys}
+        dirname = self.fragment_dir
+        shared = self.shared_cache is not None
+        if shared:
+            live |= self._update_manifests(sorted(live))
+        try:
+            filenames = os.listdir(dirname)
+        except OSError:
+            return
+        for filename in filenames:
+            key, ext = os.path.splitext(filename)
+            if ext != '.pickle' or key in live:
+                continue
+            path = os.path.join(dirname, filename)
+            try:
+                if not shared or os.stat(path).st_mtime < self._loaded_at:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def _update_manifests(self, keys: List[str]) -> Set[str]:
+        """Writes the manifest of this build to the shared cache, returns
+        the keys in the manifests of the other builds. The manifests of
+        builds whose doctree directory is gone are removed."""
+        dirname = os.path.join(cast(str, self.shared_cache), 'dn_manifests')
+        doctreedir = os.path.abspath(self.env.doctreedir)
+        name = hashlib.sha256(doctreedir.encode('utf-8')).hexdigest()[:16] + '.json'
+        os.makedirs(dirname, exist_ok=True)
+        tmp_path = os.path.join(dirname, f'{name}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'doctreedir': doctreedir, 'keys': keys}, f)
+        os.replace(tmp_path, os.path.join(dirname, name))
+        others: Set[str] = set()
+        for filename in os.listdir(dirname):
+            if filename == name or not filename.endswith('.json'):
+                continue
+            path = os.path.join(dirname, filename)
+            try:
+                with open(path, encoding='utf-8') as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if os.path.isdir(manifest['doctreedir']):
+                others.update(manifest['keys'])
+            else:
+                os.remove(path)
+        return others
+
+    def _touch(self, fullname: str) -> None:
+        if fullname not in self._touched:
+            self._touched[fullname] = self.objects.get(fullname)
+
+    def note_reference(self, docname: str, name: str) -> None:
+        """Records that ``docname`` looks up ``name`` when resolving its dn
+        references, see :py:meth:`get_referencing_docs`.
+
+        Names referenced by several documents are stored as a single string,
+        which the pickled environment then only holds once.
+        """
+        if self._reference_names is None:
+            self._reference_names = {}
+            for referenced in self.references.values():
+                for referenced_name in referenced:
+                    self._reference_names.setdefault(referenced_name, referenced_name)
+        name = self._reference_names.setdefault(name, name)
+        self.references.setdefault(docname, set()).add(name)
+
+    def get_lookup_names(self, fullname: str) -> Set[str]:
+        """Returns the names a reference can look up to find ``fullname``."""
+        names = set(name_suffixes(fullname))
+        names.update([name[:-2] for name in names if name.endswith('()')])
+        if '(' in fullname:
+            # short links resolve through the overload group
+            names.update(name_suffixes(overload_key(fullname)))
+        key = generic_key(fullname)
+        if key != fullname:
+            names.update(name_suffixes(key))
+        return names
+
+    def get_changed_targets(self) -> Set[str]:
+        """Returns the fullnames that were added, removed or moved since the
+        last call."""
+        changed = {fullname for fullname, entry in self._touched.items()
+                   if self.objects.get(fullname) != entry}
+        self._touched.clear()
+        self._read_docs.clear()
+        self.objects.compact()
+        return changed
+
+    def get_referencing_docs(self, fullnames: Set[str]) -> Set[str]:
+        """Returns the documents with dn references that can resolve to one
+        of ``fullnames``."""
+        names: Set[str] = set()
+        for fullname in fullnames:
+            names.update(self.get_lookup_names(fullname))
+        return {docname for docname, referenced in self.references.items()
+                if not names.isdisjoint(referenced)}
+
+    def get_objects(self) -> Iterator[Tuple[str, str, str, str, str, int]]:
+        # with dn_search_shards the objects stay in the inventory but are
+        # left out of searchindex.js, the search page loads them from the
+        # shards written by write_search_shards instead
+        priority = -1 if self.env.config.dn_search_shards else 1
+        for refname, (docname, node_id, typ) in list(self.objects.items()):
+            yield refname, refname, typ, docname, node_id, priority
+        for modname, (docname, node_id) in list(self.modules.items()):
+            yield modname, modname, 'module', docname, node_id, priority
+
+        # the anchors of the overload groups, so that other projects can link
+        # to a method without giving its arguments; they never show up in
+        # search results
+        for base in sorted({overload_base(name) for name in self.objects if '(' in name}):
+            if base in self.objects:
+                continue
+            anchor = next(name for name in self.lookup.overloads[overload_key(base)]
+                          if overload_base(name) == base)
+            docname, node_id, typ = self.objects[anchor]
+            yield base, base, typ, docname, node_id, -1
+
+    def get_inventory_lookup(self, inv_name: Optional[str] = None) -> DNLookup:
+        """Finds the dn objects of the intersphinx inventory ``inv_name``, or
+        of all inventories.
+
+        The lookups are built on first use and kept until the inventories
+        are loaded again, see :py:func:`resolve_inventory_reference`.
+        """
+        lookup = self._inventory_lookups.get(inv_name)
+        if lookup is not None:
+            return lookup
+
+        if inv_name is None:
+            inventory = self.env.intersphinx_inventory
+        else:
+            inventory = self.env.intersphinx_named_inventory[inv_name]
+        lookup = DNLookup({}, {}, {}, {})
+        for key, entries in sorted(inventory.items()):
+            domain_name, _sep, objtype = key.partition(':')
+            if domain_name != self.name:
+                continue
+            for fullname, item in sorted(entries.items()):
+                lookup.objects[fullname] = item
+                lookup.index(fullname, objtype)
+        self._inventory_lookups[inv_name] = lookup
+        return lookup
+
+    def get_ambiguous_candidates(self, name: str) -> Optional[List[str]]:
+        """Returns the fullnames a lookup of ``name`` couldn't decide
+        between, in this project or in an intersphinx inventory."""
+        for lookup in [self.lookup, *self._inventory_lookups.values()]:
+            candidates = lookup.ambiguous.get(name)
+            if candidates is not None:
+                return candidates
+        return None
+
+    def get_namespace(self, fullname: str) -> Optional[str]:
+        """Returns the innermost namespace declaring ``fullname``, None when
+        it is declared outside of any namespace."""
+        parts = split_dotted(fullname)
+        for i in range(len(parts), 0, -1):
+            entry = self.objects.get('.'.join(parts[:i]))
+            if entry is not None and entry[2] == 'namespace':
+                return '.'.join(parts[:i])
+        return None
+
+    @property
+    def namespace_index(self) -> Dict[str, List[Tuple[Any, ...]]]:
+        """The entries of the :py:class:`DNNamespaceIndex` pages.
+
+        Maps each namespace, ``''`` for the objects declared outside of any
+        namespace, to its types and the objects outside of a type,
+        as ``(sort key, name, docname, anchor, objtype, members)`` in
+        :py:func:`index_sort_key` order. ``members`` lists the methods,
+        constructors and properties of a type as ``(sort key, name,
+        docname, anchor, objtype)``, it is None for the members of anything
+        else. Built on first use, and again after every read phase, see
+        :py:meth:`update_indices`.
+        """
+        if self._namespace_index is not None:
+            return self._namespace_index
+
+        types: Dict[str, List[Tuple[Any, ...]]] = {}
+        members: Dict[str, List[Tuple[str, str, Tuple[Any, ...]]]] = {}
+        for fullname, (docname, node_id, objtype) in self.objects.items():
+            if objtype == 'namespace':
+                continue
+            namespace = self.get_namespace(fullname) or ''
+            name = fullname[len(namespace) + 1:] if namespace else fullname
+            if objtype in MEMBER_OBJTYPES:
+                parts = split_dotted(fullname)
+                entry = (index_sort_key(parts[-1]), parts[-1], docname, node_id, objtype)
+                members.setdefault('.'.join(parts[:-1]), []).append((namespace, name, entry))
+            else:
+                types.setdefault(namespace, []).append(
+                    (index_sort_key(name), name, docname, node_id, objtype, fullname))
+
+        index: Dict[str, List[Tuple[Any, ...]]] = {}
+        for namespace, entries in types.items():
+            index[namespace] = [
+                (key, name, docname, node_id, objtype,
+                 sorted(entry for _ns, _name, entry in members.pop(fullname, ())))
+                for key, name, docname, node_id, objtype, fullname in entries]
+        # members of objects that aren't described as a type
+        for owned in members.values():
+            for namespace, name, (_key, _n, docname, node_id, objtype) in owned:
+                index.setdefault(namespace, []).append(
+                    (index_sort_key(name), name, docname, node_id, objtype, None))
+        for entries in index.values():
+            entries.sort(key=lambda entry: entry[0])
+        self._namespace_index = index
+        return index
+
+    def update_indices(self) -> None:
+        """Gives every namespace a :py:class:`DNNamespaceIndex` of its own.
+
+        The builders write a page per index, so rather than one general
+        index listing every member of the project there is a page per
+        namespace, ``dn-ns-<namespace>``, which can be linked to with
+        :rst:role:`ref` like ``dn-namespaces``.
+        """
+        self._namespace_index = None
+        namespaces = sorted(self.namespace_index)
+        self.indices[:] = [index for index in self.indices
+                           if not issubclass(index, DNNamespaceIndex)]
+        std = self.env.get_domain('std')
+        labels = {f'{self.name}-{namespace_index_name(namespace)}': namespace
+                  for namespace in namespaces}
+        prefix = f'{self.name}-{DNNamespaceIndex.name}-'
+        global_label = f"{self.name}-{namespace_index_name('')}"
+        for label in [label for label in std.anonlabels  # type: ignore
+                      if (label.startswith(prefix) or label == global_label)
+                      and label not in labels]:
+            std.anonlabels.pop(label)  # type: ignore
+            std.labels.pop(label, None)  # type: ignore
+        for label, namespace in labels.items():
+            index = type(f'DNNamespaceIndex_{namespace}', (DNNamespaceIndex,), {
+                'name': namespace_index_name(namespace),
+                'localname': (_('%s Namespace Index') % namespace if namespace
+                              else _('Global Namespace Index')),
+                'namespace': namespace,
+            })
+            self.indices.append(index)
+            std.note_hyperlink_target(label, label, '',  # type: ignore
+                                      index.localname)
+
+    def get_search_shards(self, docnames: Set[str]) -> Dict[str, Dict[str, Any]]:
+        """Splits the objects described in ``docnames`` into one search
+        shard per namespace.
+
+        A shard lists its objects as ``[fullname, docname index, anchor,
+        objtype index]`` and finds them through a trie of their
+        :py:func:`search_key`, see :py:func:`build_search_trie`.
+        """
+        entries: Dict[str, List[Tuple[str, str, str, str]]] = {}
+        for fullname, (docname, node_id, objtype) in sorted(self.objects.items()):
+            if docname in docnames:
+                entries.setdefault(self.get_namespace(fullname) or '', []).append(
+                    (fullname, docname, node_id, objtype))
+
+        shards = {}
+        for namespace, objects in entries.items():
+            shard_docnames = sorted({docname for _f, docname, _n, _t in objects})
+            objtypes = sorted({objtype for _f, _d, _n, objtype in objects})
+            keys: Dict[str, List[int]] = {}
+            for i, (fullname, _d, _n, _t) in enumerate(objects):
+                keys.setdefault(search_key(fullname), []).append(i)
+            shards[namespace] = {
+                'objects': [[fullname, shard_docnames.index(docname), node_id,
+                             objtypes.index(objtype)]
+                            for fullname, docname, node_id, objtype in objects],
+                'docnames': shard_docnames,
+                'objtypes': objtypes,
+                'trie': build_search_trie(keys),
+            }
+        return shards
+
+    def _keeps_existing(self, fullname: str, docname: str) -> bool:
+        # When an object is described in more than one document, the
+        # description in the document that sorts last wins. This is what a
+        # serial read of all documents ends up with, and it doesn't depend
+        # on the order parallel readers are merged in.
+        existing = self.objects.get(fullname)
+        return existing is not None and existing[0] > docname
+
+    def note_object(self, fullname: str, objtype: str, node_id: str,
+                    location: Any = None) -> None:
+        docname = self.env.docname
+        for record in self._fragment_records:
+            record['objects'].append((location, fullname, objtype, node_id))
+        if fullname in self.objects:
+            logger.warning(__('duplicate %s description of %s, other %s in %s'),
+                           objtype, fullname, objtype, self.objects[fullname][0],
+                           location=location)
+            if self._keeps_existing(fullname, docname):
+                return
+        self._touch(fullname)
+        self.objects[fullname] = (docname, node_id, objtype)
+        if self._lookup is not None:
+            self._lookup.index(fullname, objtype)
+        self._xref_cache.clear()
+
+    def clear_doc(self, docname: str) -> None:
+        self._read_docs.add(docname)
+        fragments = self.fragments.pop(docname, None)
+        if fragments and self.env.config_status == CONFIG_OK:
+            # whatever changed the config may change the rendering too
+            self._previous_fragments[docname] = set(fragments)
+        for fullname in self.objects.fullnames_in(docname):
+            self._touch(fullname)
+            if self._lookup is not None:
+                self._lookup.unindex(fullname)
+            del self.objects[fullname]
+        for mod_name, (pkg_docname, _node_id) in list(self.modules.items()):
+            if pkg_docname == docname:
+                del self.modules[mod_name]
+        self.references.pop(docname, None)
+        self._xref_cache.clear()
+
+    def merge_domaindata(self, docnames: List[str], otherdata: Dict) -> None:
+        """Merges the objects read by a parallel reader.
+
+        The reader saw every object of the documents that weren't re-read,
+        and warned about duplicates among those itself. Duplicates of an
+        object read by another reader are reported here. Either way the
+        winner is picked by :py:meth:`_keeps_existing`, so the result is the
+        same for any number of readers.
+        """
+        other_objects = DNObjectTable(otherdata['objects'])
+        merged = sorted((fullname, other_objects[fullname])
+                        for docname in docnames
+                        for fullname in other_objects.fullnames_in(docname))
+        for fullname, entry in merged:
+            fn, _node_id, objtype = entry
+            existing = self.objects.get(fullname)
+            if existing is not None and existing[0] != fn:
+                if existing[0] in self._read_docs:
+                    # word it like a serial read would: reported in the
+                    # document that sorts last, against the earlier one
+                    (first, _), (second, second_type) = sorted(
+                        [(existing[0], existing[2]), (fn, objtype)])
+                    logger.warning(__('duplicate %s description of %s, other %s in %s'),
+                                   second_type, fullname, second_type, first,
+                                   location=second)
+                if self._keeps_existing(fullname, fn):
+                    continue
+            self._touch(fullname)
+            self.objects[fullname] = entry
+            if self._lookup is not None:
+                self._lookup.index(fullname, objtype)
+        for mod_name, (pkg_docname, node_id) in otherdata['modules'].items():
+            if pkg_docname in docnames:
+                self.modules[mod_name] = (pkg_docname, node_id)
+        for docname, referenced in otherdata['references'].items():
+            if docname in docnames:
+                self.references.pop(docname, None)
+                for name in referenced:
+                    self.note_reference(docname, name)
+        for docname, keys in otherdata.get('fragments', {}).items():
+            if docname in docnames:
+                self.fragments[docname] = keys
+        self._xref_cache.clear()
+
+    @profiled('find_obj', lambda self, *args, **kwargs: profiler.current_docname)
+    def find_obj(self, env: BuildEnvironment, mod_name: str, prefix: str, name: str,
+                 typ: str, searchorder: int = 0, location: Any = None
+                 ) -> Tuple[str, Tuple[str, str, str]]:
+        """Finds the object for the given name, see :py:meth:`DNLookup.find`."""
+        return self.lookup.find(mod_name, prefix, name, typ, searchorder, location)
+
+    def _find_cached(self, typ: str, target: str, node: pending_xref
+                     ) -> Optional[Tuple[str, Tuple[str, str, str]]]:
+        key = (typ, target, node.get('dn:module'), node.get('dn:object'),
+               node.hasattr('refspecific'))
+        try:
+            found = self._xref_cache[key]
+        except KeyError:
+            pass
+        else:
+            self._xref_cache.move_to_end(key)
+            return found
+
+        _typ, _target, mod_name, prefix, refspecific = key
+        name, obj = self.find_obj(self.env, mod_name, prefix, target, typ,
+                                  1 if refspecific else 0, location=node)
+        found = (name, obj) if obj else None
+
+        self._xref_cache[key] = found
+        if len(self._xref_cache) > self.xref_cache_size:
+            self._xref_cache.popitem(last=False)
+        return found
+
+    def resolve_types(self, keys: Iterable[Tuple[str, Optional[str], Optional[str]]]
+                      ) -> Dict[Tuple[str, Optional[str], Optional[str]],
+                                Optional[Tuple[str, Tuple[str, str, str]]]]:
+        """Resolves the types named in dn signatures, given as ``(key,
+        dn:module, dn:object)``, to ``(fullname, object)`` or None, see
+        :py:meth:`DNLookup.find_type`. The results are memoized along with
+        those of :py:meth:`resolve_xref`."""
+        lookup = self.lookup
+        results = {}
+        for key in keys:
+            cache_key = ('*type', *key, False)
+            try:
+                found = self._xref_cache[cache_key]
+            except KeyError:
+                fullname = lookup.find_type(key[1], key[2], key[0])
+                found = (fullname, self.objects[fullname]) if fullname else None
+                self._xref_cache[cache_key] = found
+                if len(self._xref_cache) > self.xref_cache_size:
+                    self._xref_cache.popitem(last=False)
+            else:
+                self._xref_cache.move_to_end(cache_key)
+            results[key] = found
+        return results
+
+    def note_unresolved(self, docname: str, typ: str, target: str,
+                        node: pending_xref) -> None:
+        occurrences = self._unresolved.setdefault(docname, {})
+        occurrence = occurrences.get((typ, target))
+        if occurrence is None:
+            # the line of a role counts from the paragraph it is in when
+            # that is nested in a directive
+            line = next((ancestor.line for ancestor in traverse_parent(node)
+                         if ancestor.line and not isinstance(ancestor, d_nodes.Inline)),
+                        node.line)
+            occurrences[(typ, target)] = [1, line]
+        else:
+            occurrence[0] += 1
+
+    def note_resolved_document(self, docname: str) -> None:
+        """Notes that the references of ``docname`` were resolved by this
+        build, those that failed to included."""
+        self._unresolved.setdefault(docname, {})
+
+    def report_unresolved(self, path: str) -> None:
+        """Logs one warning per dn target that failed to resolve, along with
+        the number of references to it.
+
+        The failures of the documents resolved by this build replace those
+        recorded in ``path`` by the builds before, so an incremental build
+        reports the failures of the documents it didn't write again too.
+        """
+        recorded: Dict[str, List[List[Any]]] = {}
+        try:
+            with open(path, encoding='utf-8') as f:
+                recorded = json.load(f)
+        except (OSError, ValueError):
+            pass
+        for docname, occurrences in self._unresolved.items():
+            recorded[docname] = [[typ, target, count, line] for (typ, target), (count, line)
+                                 in sorted(occurrences.items())]
+        self._unresolved.clear()
+        recorded = {docname: failures for docname, failures in sorted(recorded.items())
+                    if failures and docname in self.env.all_docs}
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(recorded, f)
+
+        totals: Dict[Tuple[str, str], List[Any]] = {}
+        for docname, failures in recorded.items():
+            for typ, target, count, line in failures:
+                total = totals.setdefault((typ, target), [0, (docname, line)])
+                total[0] += count
+        for (typ, target), (count, location) in sorted(totals.items()):
+            if count > 1:
+                logger.warning("Failed to resolve %s %s (%d references)", typ, target, count,
+                               location=location)
+            else:
+                logger.warning("Failed to resolve %s %s", typ, target, location=location)
+
+    @profiled('resolve_xref', lambda self, env, fromdocname, *args, **kwargs: fromdocname)
+    def resolve_xref(self, env: BuildEnvironment, fromdocname: str, builder: Builder,
+                     typ: str, target: str, node: pending_xref, contnode: Element
+                     ) -> Optional[Element]:
+        found = self._find_cached(typ, target, node)
+        if found is None:
+            if profiler.enabled:
+                profiler.note_failure(typ, target, fromdocname)
+            # see note_unresolved_reference
+            return None
+
+        name, obj = found
+        return make_refnode(builder, fromdocname, obj[0], obj[1], contnode, name)
+
+
+class DNFragmentTransform(SphinxTransform):
+    """Completes the fragment cache of :py:meth:`DNObject.run` once the
+    transforms are done with the content of the document, right before
+    the domains collect what it describes.
+
+    The nodes of cached blocks replace their placeholders only now, they
+    were transformed when they were cached and the transforms are the
+    bigger part of reading a document. The blocks rendered from source are
+    cached now, transformed.
+    """
+    # after SphinxSmartQuotes, before SphinxDomains
+    default_priority = 845
+
+    def apply(self, **kwargs: Any) -> None:
+        domain = cast(DNDomain, self.env.get_domain('dn'))
+        current_line = self.document.current_line
+        # the cached nodes got their lines when they were first inserted,
+        # keep the document from filling in the ones that are still missing
+        self.document.current_line = None
+        for placeholder in list(self.document.findall(dn_fragment)):
+            placeholder.replace_self(placeholder.fragment)
+        self.document.current_line = current_line
+        for key, fragment, record in domain._pending_fragments:
+            domain.store_fragment(key, fragment, record)
+        domain._pending_fragments.clear()
+
+
+class DNTypeReferenceResolver(SphinxPostTransform):
+    """Links the types named in the dn signatures of a document.
+
+    Rather than one ``pending_xref`` each, they are looked up in a single
+    batch, each name once per context: the signatures of a big API page
+    name the same few types thousands of times. A type that isn't a dn type
+    of the project, like those of the base class library, stays text.
+    """
+    # ahead of the ReferencesResolver
+    default_priority = 5
+
+    def run(self, **kwargs: Any) -> None:
+        refs = list(self.document.findall(dn_type_reference))
+        if not refs:
+            return
+        domain = cast(DNDomain, self.env.get_domain('dn'))
+        keys = [(ref['reftarget'], ref.get('dn:module'), ref.get('dn:object')) for ref in refs]
+        found = domain.resolve_types(set(keys))
+        for ref, key in zip(refs, keys):
+            target = found[key]
+            newnode: Any = list(ref.children)
+            if target is not None:
+                fullname, (docname, node_id, _objtype) = target
+                try:
+                    newnode = make_refnode(self.app.builder, self.env.docname, docname,
+                                           node_id, newnode, fullname)
+                except NoUri:
+                    pass
+            ref.replace_self(newnode)
+
+
+def note_references(app: Sphinx, doctree: d_nodes.document) -> None:
+    """Records the names the dn references of a document look up, so that
+    changes to their targets can mark the document as updated."""
+    domain = cast(DNDomain, app.env.get_domain('dn'))
+    docname = app.env.docname
+    for node in doctree.findall(lambda node: isinstance(node, (pending_xref, dn_type_reference))):
+        if isinstance(node, dn_type_reference):
+            # already a generic_key
+            domain.note_reference(docname, node['reftarget'])
+            continue
+        if node.get('refdomain') != 'dn':
+            continue
+        target = node['reftarget']
+        domain.note_reference(docname, target)
+        # links with arguments fall back to the overload group
+        domain.note_reference(docname, overload_key(target))
+        # and generic ones to the open generic
+        domain.note_reference(docname, generic_key(target))
+
+
+def get_updated_docs(app: Sphinx, env: BuildEnvironment) -> List[str]:
+    """Marks the documents referencing a dn target that was added, removed
+    or moved in this build as updated, so their references get resolved
+    again while every other document stays cached."""
+    domain = cast(DNDomain, env.get_domain('dn'))
+    changed = domain.get_changed_targets()
+    if not changed:
+        return []
+    return sorted(domain.get_referencing_docs(changed))
+
+
+#: the first line of the pages split_documents writes, how it tells them
+#: from the documents of the project
+SPLIT_PAGE_MARKER = '.. Generated from %s by the dn extension, edit that document instead.'
+
+_SPLIT_DIRECTIVE = re.compile(r'^( *)\.\. +dn:(namespace|class|struct|interface|enum):: *(.+?) *$')
+_SPLIT_LABEL = re.compile(r'^\.\. +_[^:`]+: *$')
+
+
+def split_page_name(fullname: str) -> str:
+    """Returns the name of the page of a type or namespace split off its
+    document: ``EdgeDB.Optional<T>`` gives ``EdgeDB.Optional-1``, which
+    doesn't change with the names of the generic parameters."""
+    return re.sub(r'[^\w.-]', '_', generic_key(overload_base(fullname)).replace('`', '-'))
+
+
+def _block_end(lines: List[str], start: int, indent: str) -> int:
+    """Returns the index after the last line of the directive at ``start``,
+    its content being the lines indented deeper than ``indent``."""
+    end = start + 1
+    for i in range(start + 1, len(lines)):
+        line = lines[i]
+        if line.strip():
+            if len(line) - len(line.lstrip()) <= len(indent):
+                break
+            end = i + 1
+    return end
+
+
+def _take_labels(lines: List[str], indent: str) -> List[str]:
+    """Removes the labels right above a block from the end of ``lines``
+    and returns them, they go where the block goes."""
+    start = end = len(lines)
+    while start > 0:
+        line = lines[start - 1]
+        if line.strip() and not (line.startswith(indent)
+                                 and _SPLIT_LABEL.match(line[len(indent):])):
+            break
+        start -= 1
+    while start < end and not lines[start].strip():
+        start += 1
+    labels = [line.strip() for line in lines[start:end] if line.strip()]
+    del lines[start:end]
+    return labels
+
+
+def _split_page(docname: str, title: str, labels: List[str], body: List[str],
+                namespace: Optional[str] = None, toctree: Sequence[str] = ()) -> str:
+    title = re.sub(r'([\\`*_|])', r'\\\1', title)
+    lines = [SPLIT_PAGE_MARKER % docname, '']
+    if labels:
+        lines += [*labels, '']
+    lines += [title, '=' * len(title), '']
+    if namespace:
+        lines += [f'.. dn:currentnamespace:: {namespace}', '']
+    lines += textwrap.dedent('\n'.join(body)).rstrip().split('\n')
+    if toctree:
+        lines += ['', '.. toctree::', '    :maxdepth: 1', '']
+        lines += ['    ' + entry for entry in toctree]
+    return '\n'.join(lines) + '\n'
+
+
+def split_document(docname: str, text: str) -> Tuple[str, Dict[str, str]]:
+    """Splits the namespaces and types at the top level of a document, and
+    the types of those namespaces, off to pages of their own, see
+    :py:func:`split_documents`.
+
+    Returns the text left of the document, with a toctree of the pages
+    where the first of them was, and the text of the pages by docname.
+    A page is ``<docname>/<name>``, see :py:func:`split_page_name`; a
+    namespace page has a toctree of the pages of its types. Labels right
+    above a block go to its page. A block declaring a page again stays
+    where it is.
+    """
+    lines = text.splitlines()
+    base = posixpath.basename(docname)
+    kept: List[str] = []
+    pages: Dict[str, str] = {}
+    entries: List[str] = []
+    toctree_at: Optional[int] = None
+    i = 0
+    while i < len(lines):
+        match = _SPLIT_DIRECTIVE.match(lines[i])
+        end = _block_end(lines, i, '') if match else i + 1
+        name = split_page_name(match.group(3)) if match else None
+        if match is None or match.group(1) or f'{docname}/{name}' in pages:
+            kept.extend(lines[i:end])
+            i = end
+            continue
+        labels = _take_labels(kept, '')
+        if toctree_at is None:
+            toctree_at = len(kept)
+        block = lines[i:end]
+        if match.group(2) == 'namespace':
+            namespace = match.group(3)
+            children = _split_namespace(docname, namespace, block, pages)
+            pages[f'{docname}/{name}'] = _split_page(docname, namespace, labels, block,
+                                                     toctree=children)
+        else:
+            parsed = parse_signature(match.group(3))
+            pages[f'{docname}/{name}'] = _split_page(
+                docname, '.'.join((*parsed.prefix, parsed.name)), labels, block)
+        entries.append(f'{base}/{name}')
+        i = end
+    if toctree_at is not None:
+        kept[toctree_at:toctree_at] = ['', '.. toctree::', '    :maxdepth: 1', '',
+                                       *('    ' + entry for entry in entries), '']
+    return '\n'.join(kept) + '\n', pages
+
+
+def _split_namespace(docname: str, namespace: str, block: List[str],
+                     pages: Dict[str, str]) -> List[str]:
+    """Moves the types of a namespace block to their pages, leaving the
+    rest in ``block``. Returns the names of the pages."""
+    indent = next((line[:len(line) - len(line.lstrip())] for line in block[1:]
+                   if line.strip()), '')
+    kept = block[:1]
+    children = []
+    i = 1
+    while i < len(block):
+        match = _SPLIT_DIRECTIVE.match(block[i])
+        if match is None or match.group(1) != indent or match.group(2) == 'namespace':
+            kept.append(block[i])
+            i += 1
+            continue
+        end = _block_end(block, i, indent)
+        name = split_page_name(f'{namespace}.{match.group(3)}')
+        if f'{docname}/{name}' in pages:
+            kept.extend(block[i:end])
+            i = end
+            continue
+        parsed = parse_signature(match.group(3))
+        pages[f'{docname}/{name}'] = _split_page(
+            docname, '.'.join((*parsed.prefix, parsed.name)), _take_labels(kept, indent),
+            block[i:end], namespace)
+        children.append(name)
+        i = end
+    # drop the blank lines left between the types
+    block[:] = [line for i, line in enumerate(kept)
+                if line.strip() or (0 < i < len(kept) - 1 and kept[i - 1].strip())]
+    return children
+
+
+def split_documents(app: Sphinx, env: BuildEnvironment, added: Set[str], changed: Set[str],
+                    removed: Set[str]) -> List[str]:
+    """Splits the documents of ``dn_split_docs`` into a page per namespace
+    and type, so that Sphinx reads, writes and resolves a big API reference
+    one type at a time, in parallel too.
+
+    Sphinx reads documents from files only, so the pages are written to the
+    directory named like the document, next to it. A page is written when
+    its part of the document changed and Sphinx reads those pages only. The
+    pages of types that are gone are removed. The document itself is read
+    without the parts split off, see :py:func:`read_split_document`.
+    """
+    encoding = app.config.source_encoding
+    # without a byte order mark, which Sphinx reads either way
+    write_encoding = 'utf-8' if encoding.lower() == 'utf-8-sig' else encoding
+    wanted: Set[str] = set()
+    written: Set[str] = set()
+    for docname in app.config.dn_split_docs:
+        if docname not in env.found_docs:
+            logger.warning(__('dn_split_docs: document %s not found'), docname)
+            continue
+        with open(env.doc2path(docname), encoding=encoding) as f:
+            _rest, pages = split_document(docname, f.read())
+        for page, text in pages.items():
+            wanted.add(page)
+            path = env.doc2path(page)
+            try:
+                with open(path, encoding=encoding) as f:
+                    if f.read() == text:
+                        continue
+            except OSError:
+                pass
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding=write_encoding) as f:
+                f.write(text)
+            written.add(page)
+
+    for page in sorted(env.found_docs - wanted):
+        path = env.doc2path(page)
+        try:
+            with open(path, encoding=encoding) as f:
+                first_line = f.readline()
+        except OSError:
+            continue
+        if not first_line.startswith(SPLIT_PAGE_MARKER.split('%s')[0]):
+            continue
+        os.remove(path)
+        env.found_docs.discard(page)
+        added.discard(page)
+        changed.discard(page)
+        if page in env.all_docs:
+            removed.add(page)
+
+    for page in written - env.found_docs:
+        env.found_docs.add(page)
+        removed.discard(page)
+        if page not in env.all_docs:
+            added.add(page)
+    return sorted(written & set(env.all_docs))
+
+
+def read_split_document(app: Sphinx, docname: str, source: List[str]) -> None:
+    if docname in app.config.dn_split_docs:
+        source[0] = split_document(docname, source[0])[0]
+
+
+SPLIT_REDIRECT_JS = '''\
+(function () {
+  // the anchors this page had before its types were split off
+  const pages = %s;
+  let id = window.location.hash.slice(1);
+  try {
+    id = decodeURIComponent(id);
+  } catch (e) {}
+  if (!id || document.getElementById(id))
+    return;
+  for (let end = id.length; end > 0; end = id.lastIndexOf(".", end - 1)) {
+    const page = pages[id.slice(0, end)];
+    if (page !== undefined) {
+      window.location.replace(page + window.location.hash);
+      return;
+    }
+  }
+})();
+'''
+
+
+def add_split_redirects(app: Sphinx, doctree: d_nodes.document, docname: str) -> None:
+    """Has the HTML page of a split document forward the links to the
+    anchors of the types it had to their pages."""
+    if docname not in app.config.dn_split_docs or app.builder.format != 'html':
+        return
+    domain = cast(DNDomain, app.env.get_domain('dn'))
+    prefix = docname + '/'
+    pages = {node_id: app.builder.get_relative_uri(docname, page)
+             for _fullname, (page, node_id, objtype) in domain.objects.items()
+             if objtype in TYPE_OBJTYPES | {'namespace'} and page.startswith(prefix)}
+    if pages:
+        script = SPLIT_REDIRECT_JS % json.dumps(pages, sort_keys=True, separators=(',', ':'))
+        doctree += d_nodes.raw('', f'<script>{script}</script>', format='html')
+
+
+def init_profiler(app: Sphinx) -> None:
+    profiler.enabled = bool(app.config.dn_profile)
+    profiler.reset()
+
+
+def save_profile_state(app: Sphinx, doctree: d_nodes.document) -> None:
+    # picked up by merge_profile_state when this runs in a parallel reader
+    if profiler.enabled:
+        app.env.dn_profile = profiler.state()
+
+
+def merge_profile_state(app: Sphinx, env: BuildEnvironment, docnames: Set[str],
+                        other: BuildEnvironment) -> None:
+    if profiler.enabled and hasattr(other, 'dn_profile'):
+        profiler.merge(set(docnames), other.dn_profile)
+
+
+def drop_profile_state(app: Sphinx, env: BuildEnvironment) -> List[str]:
+    # keep the profile out of the pickled environment
+    if hasattr(env, 'dn_profile'):
+        del env.dn_profile
+    return []
+
+
+def prune_fragments(app: Sphinx, env: BuildEnvironment) -> List[str]:
+    cast(DNDomain, env.get_domain('dn')).prune_fragments()
+    return []
+
+
+def update_indices(app: Sphinx, env: BuildEnvironment) -> List[str]:
+    cast(DNDomain, env.get_domain('dn')).update_indices()
+    return []
+
+
+def write_profile(app: Sphinx, exception: Optional[Exception]) -> None:
+    if not profiler.enabled or exception is not None:
+        return
+    path = app.config.dn_profile
+    if not isinstance(path, str):
+        path = 'dn-profile.json'
+    path = os.path.join(app.outdir, path)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(profiler.report(), f, indent=2)
+    logger.info(__('dn profile written to %s'), path)
+
+
+#: loads the search shards a query on the search page needs
+SEARCH_LOADER_JS = r'''/*
+ * dn_search.js
+ * ~~~~~~~~~~~~
+ *
+ * Lists the :dn: objects matching a search query above the full text
+ * results. Only the shards of the namespaces declaring a name that starts
+ * like one of the query terms are loaded.
+ */
+"use strict";
+
+const DNSearch = {
+  _base: document.currentScript.src.replace(/[^/]*$/, "dn-search/"),
+  _manifest: null,
+  _shards: {},
+
+  setManifest: (manifest) => {
+    DNSearch._manifest = manifest;
+  },
+
+  addShard: (name, shard) => {
+    DNSearch._shards[name] = shard;
+  },
+
+  _load: (file) =>
+    new Promise((resolve, reject) => {
+      const script = document.createElement("script");
+      script.src = DNSearch._base + file;
+      script.onload = resolve;
+      script.onerror = reject;
+      document.head.appendChild(script);
+    }),
+
+  _key: (term) => term.split(".").pop().split(/[<(]/)[0],
+
+  _neededShards: (terms) => {
+    const { shards, prefixes, prefix_length } = DNSearch._manifest;
+    const needed = new Set();
+    terms.forEach((term) => {
+      const start = DNSearch._key(term).slice(0, prefix_length);
+      if (!start) return;
+      Object.entries(prefixes).forEach(([prefix, indices]) => {
+        if (prefix.startsWith(start) || start.startsWith(prefix))
+          indices.forEach((index) => needed.add(shards[index]));
+      });
+    });
+    return [...needed];
+  },
+
+  _collect: (node, out) => {
+    Object.entries(node).forEach(([label, child]) => {
+      if (label) DNSearch._collect(child, out);
+      else out.push(...child);
+    });
+  },
+
+  _find: (node, key, out) => {
+    if (!key) return DNSearch._collect(node, out);
+    for (const [label, child] of Object.entries(node)) {
+      if (!label) continue;
+      if (key.startsWith(label))
+        return DNSearch._find(child, key.slice(label.length), out);
+      if (label.startsWith(key)) return DNSearch._collect(child, out);
+    }
+  },
+
+  query: (terms) => {
+    const results = new Map();
+    Object.values(DNSearch._shards).forEach((shard) => {
+      terms.forEach((term) => {
+        const key = DNSearch._key(term);
+        if (!key) return;
+        const found = [];
+        DNSearch._find(shard.trie, key, found);
+        found.forEach((index) => {
+          const [fullname, docIndex, anchor, typeIndex] = shard.objects[index];
+          if (term.includes(".") && !fullname.toLowerCase().includes(term)) return;
+          results.set(fullname, {
+            fullname,
+            docname: shard.docnames[docIndex],
+            anchor,
+            objtype: shard.objtypes[typeIndex],
+            exact: DNSearch._key(fullname.toLowerCase()) === key,
+          });
+        });
+      });
+    });
+    return [...results.values()].sort(
+      (a, b) => b.exact - a.exact || a.fullname.length - b.fullname.length
+    );
+  },
+
+  _url: (docname, anchor) => {
+    let url;
+    if (DOCUMENTATION_OPTIONS.BUILDER === "dirhtml") {
+      url = docname === "index" ? "" : docname.replace(/\/index$/, "") + "/";
+      url = DOCUMENTATION_OPTIONS.URL_ROOT + url;
+    } else {
+      url = DOCUMENTATION_OPTIONS.URL_ROOT + docname + DOCUMENTATION_OPTIONS.LINK_SUFFIX;
+    }
+    return url + "#" + encodeURIComponent(anchor);
+  },
+
+  render: (results) => {
+    const out = document.getElementById("search-results");
+    if (!results.length || !out) return;
+    const section = document.createElement("div");
+    section.id = "dn-search-results";
+    section.appendChild(document.createElement("h2")).textContent =
+      Documentation.gettext("API Results");
+    const list = section.appendChild(document.createElement("ul"));
+    list.classList.add("search");
+    results.forEach((result) => {
+      const item = list.appendChild(document.createElement("li"));
+      const link = item.appendChild(document.createElement("a"));
+      link.href = DNSearch._url(result.docname, result.anchor);
+      link.textContent = result.fullname;
+      item.appendChild(document.createElement("span")).textContent =
+        " (" + result.objtype + ")";
+    });
+    out.parentNode.insertBefore(section, out);
+  },
+
+  init: () => {
+    const query = new URLSearchParams(window.location.search).get("q");
+    if (!query || !document.getElementById("search-results")) return;
+    const terms = query.toLowerCase().split(/\s+/).filter((term) => term);
+    DNSearch._load("index.js")
+      .then(() =>
+        Promise.all(
+          DNSearch._neededShards(terms)
+            .filter((name) => !(name in DNSearch._shards))
+            .map((name) => DNSearch._load(DNSearch._manifest.files[name]))
+        )
+      )
+      .then(() => DNSearch.render(DNSearch.query(terms)));
+  },
+};
+
+_ready(DNSearch.init);
+'''
+
+
+def _search_shards_enabled(app: Sphinx) -> bool:
+    return bool(app.config.dn_search_shards) and getattr(app.builder, 'search', False)
+
+
+def add_search_loader(app: Sphinx, pagename: str, templatename: str,
+                      context: Dict[str, Any], doctree: Optional[Node]) -> None:
+    if pagename == 'search' and _search_shards_enabled(app):
+        app.add_js_file('dn_search.js')
+
+
+def write_search_loader(app: Sphinx) -> None:
+    """Writes ``dn_search.js``, the loader of the search shards, before any
+    page is, so that the pages refer to it with the hash of its content the
+    same way in clean and incremental builds."""
+    if not _search_shards_enabled(app):
+        return
+    static_dir = os.path.join(app.outdir, '_static')
+    os.makedirs(static_dir, exist_ok=True)
+    with open(os.path.join(static_dir, 'dn_search.js'), 'w', encoding='utf-8') as f:
+        f.write(SEARCH_LOADER_JS)
+
+
+def write_search_shards(app: Sphinx, exception: Optional[Exception]) -> None:
+    """Writes the dn search data as ``_static/dn-search/<namespace>.js``,
+    one shard per namespace, along with a manifest mapping the first
+    :py:data:`SEARCH_PREFIX_LENGTH` characters of every search key to the
+    shards containing it."""
+    if exception is not None or not _search_shards_enabled(app):
+        return
+    domain = cast(DNDomain, app.env.get_domain('dn'))
+    shards = domain.get_search_shards(set(app.env.all_docs))
+
+    shard_dir = os.path.join(app.outdir, '_static', 'dn-search')
+    os.makedirs(shard_dir, exist_ok=True)
+
+    names = sorted(shards)
+    # the objects outside of any namespace are in the shard named ''
+    files = {name: (re.sub(r'[^\w.-]', '_', name) or '-global') + '.js' for name in names}
+    prefixes: Dict[str, List[int]] = {}
+    for i, name in enumerate(names):
+        for key in _trie_keys(shards[name]['trie']):
+            indices = prefixes.setdefault(key[:SEARCH_PREFIX_LENGTH], [])
+            if not indices or indices[-1] != i:
+                indices.append(i)
+
+    for filename in os.listdir(shard_dir):
+        if filename != 'index.js' and filename not in files.values():
+            os.remove(os.path.join(shard_dir, filename))
+    for name in names:
+        data = json.dumps(shards[name], separators=(',', ':'))
+        with open(os.path.join(shard_dir, files[name]), 'w', encoding='utf-8') as f:
+            f.write(f'DNSearch.addShard({json.dumps(name)},{data})\n')
+    manifest = json.dumps({'shards': names, 'files': files, 'prefixes': prefixes,
+                           'prefix_length': SEARCH_PREFIX_LENGTH}, separators=(',', ':'))
+    with open(os.path.join(shard_dir, 'index.js'), 'w', encoding='utf-8') as f:
+        f.write(f'DNSearch.setManifest({manifest})\n')
+
+
+def _trie_keys(node: Dict[str, Any], prefix: str = '') -> Iterator[str]:
+    for label, child in node.items():
+        if label:
+            yield from _trie_keys(child, prefix + label)
+        else:
+            yield prefix
+
+
+class dn_member_table(d_nodes.General, d_nodes.Element):
+    """Stands in for the entries of a member list that are loaded on
+    demand, see :py:func:`defer_member_tables`."""
+
+
+def visit_member_table(self: Any, node: dn_member_table) -> None:
+    self.body.append(self.starttag(node, 'div', '', CLASS='dn-members-more',
+                                   **{'data-file': node['file'], 'data-table': node['table']}))
+    label = _('Show %d more') % node['count']
+    self.body.append(f'<button type="button">{self.encode(label)}</button>')
+
+
+def depart_member_table(self: Any, node: dn_member_table) -> None:
+    self.body.append('</div>\n')
+
+
+#: renders the member list entries left out of a page when they are asked for
+MEMBER_TABLES_JS = r'''/*
+ * dn_members.js
+ * ~~~~~~~~~~~~~
+ *
+ * Completes the member lists of the :dn: descriptions, of which a page
+ * only contains the first entries. The rest of the entries of a page are
+ * loaded from its table file the first time one of its lists is expanded.
+ */
+"use strict";
+
+const DNMembers = {
+  _base: document.currentScript.src.replace(/[^/]*$/, "dn-members/"),
+  _tables: {},
+  _loading: {},
+
+  addTables: (file, tables) => {
+    DNMembers._tables[file] = tables;
+  },
+
+  _load: (file) => {
+    if (!DNMembers._loading[file])
+      DNMembers._loading[file] = new Promise((resolve, reject) => {
+        const script = document.createElement("script");
+        script.src = DNMembers._base + file;
+        script.onload = resolve;
+        script.onerror = reject;
+        document.head.appendChild(script);
+      });
+    return DNMembers._loading[file];
+  },
+
+  _entry: ([title, refid]) => {
+    const item = document.createElement("li");
+    const link = item
+      .appendChild(document.createElement("p"))
+      .appendChild(document.createElement("a"));
+    link.className = "reference internal";
+    link.href = "#" + refid;
+    link.title = title;
+    const code = link.appendChild(document.createElement("code"));
+    code.className = "docutils literal notranslate";
+    const text = code.appendChild(document.createElement("span"));
+    text.className = "pre";
+    text.textContent = title;
+    return item;
+  },
+
+  expand: (placeholder) => {
+    const { file, table } = placeholder.dataset;
+    return DNMembers._load(file).then(() => {
+      // the placeholder follows the list of the entries on the page
+      const list = placeholder.previousElementSibling;
+      DNMembers._tables[file][table].forEach((entry) =>
+        list.appendChild(DNMembers._entry(entry))
+      );
+      placeholder.remove();
+    });
+  },
+
+  init: () => {
+    const placeholders = document.querySelectorAll(".dn-members-more");
+    placeholders.forEach((placeholder) =>
+      placeholder
+        .querySelector("button")
+        .addEventListener("click", () => DNMembers.expand(placeholder))
+    );
+  },
+};
+
+_ready(DNMembers.init);
+'''
+
+
+def _member_tables_enabled(app: Sphinx) -> bool:
+    return (app.config.dn_member_tables > 0 and app.builder.format == 'html'
+            and not getattr(app.builder, 'embedded', False))
+
+
+def _member_table_file(docname: str) -> str:
+    return re.sub(r'[^\w.-]', '_', docname) + '.js'
+
+
+def defer_member_tables(app: Sphinx, doctree: d_nodes.document, docname: str) -> None:
+    """Keeps only the first ``dn_member_tables`` entries of the member
+    lists rendered by :py:meth:`DNObject.transform_content` in the page,
+    unless it is 0.
+
+    The rest of the entries of a page are written to
+    ``_static/dn-members/<docname>.js``, compact, and the page gets a
+    placeholder for them that ``dn_members.js`` fills in on demand.
+
+    This doesn't make the pages much lighter: the member lists are a small
+    part of a page next to the descriptions of the members themselves.
+    With 10 entries kept, ``api.html`` of the driver documentation goes
+    from 299 to 293 kB, and the split page of ``EdgeDBClient``, its longest
+    list, from 61 to 59 kB, about 2% each.
+    """
+    if not _member_tables_enabled(app):
+        return
+    limit = app.config.dn_member_tables
+    file = _member_table_file(docname)
+    tables: Dict[str, List[Tuple[str, str]]] = {}
+    for member_list in list(doctree.findall(bullet_list)):
+        if 'dn-members' not in member_list['classes'] or len(member_list) <= limit:
+            continue
+        desc = member_list.parent
+        while not isinstance(desc, addnodes.desc):
+            desc = desc.parent
+        signode = desc[0]
+        table = signode['ids'][0] if signode['ids'] else str(len(tables))
+        tables[table] = [(ref.astext(), ref['refid']) for item in member_list[limit:]
+                         for ref in item.findall(reference)]
+        del member_list[limit:]
+        member_list.parent.insert(member_list.parent.index(member_list) + 1,
+                                  dn_member_table(file=file, table=table,
+                                                  count=len(tables[table])))
+
+    path = os.path.join(app.outdir, '_static', 'dn-members', file)
+    if not tables:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = json.dumps(tables, separators=(',', ':'))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'DNMembers.addTables({json.dumps(file)},{data})\n')
+
+
+def add_member_tables_loader(app: Sphinx, pagename: str, templatename: str,
+                             context: Dict[str, Any], doctree: Optional[Node]) -> None:
+    if doctree is not None and next(doctree.findall(dn_member_table), None) is not None:
+        app.add_js_file('dn_members.js')
+
+
+def write_member_tables_loader(app: Sphinx) -> None:
+    """Writes ``dn_members.js`` before any page is, see
+    :py:func:`write_search_loader`."""
+    if not _member_tables_enabled(app):
+        return
+    static_dir = os.path.join(app.outdir, '_static')
+    os.makedirs(static_dir, exist_ok=True)
+    with open(os.path.join(static_dir, 'dn_members.js'), 'w', encoding='utf-8') as f:
+        f.write(MEMBER_TABLES_JS)
+
+
+def prune_member_tables(app: Sphinx, exception: Optional[Exception]) -> None:
+    """Removes the table files of documents that are gone."""
+    if exception is not None or not _member_tables_enabled(app):
+        return
+    table_dir = os.path.join(app.outdir, '_static', 'dn-members')
+    if os.path.isdir(table_dir):
+        files = {_member_table_file(docname) for docname in app.env.all_docs}
+        for filename in os.listdir(table_dir):
+            if filename not in files:
+                os.remove(os.path.join(table_dir, filename))
+
+
+#: bump when the way highlighted code is cached changes
+HIGHLIGHT_CACHE_VERSION = 1
+
+
+class DNHighlightCache:
+    """Highlighted code blocks on disk, by the hash of everything the
+    output of Pygments depends on.
+
+    Each block is a file of its own, so parallel writers share the cache,
+    and so do builds using the same doctree directory, clean ones included.
+    The modification time of a file is its last use; once the cache grows
+    beyond ``max_bytes`` the least recently used blocks are evicted.
+    """
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.out')
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                highlighted = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return highlighted
+
+    def put(self, key: str, highlighted: str) -> None:
+        path = self.path(key)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(highlighted)
+        os.replace(tmp_path, path)
+
+    def evict(self) -> None:
+        """Removes the least recently used blocks until the cache fits in
+        ``max_bytes``, and the temporary files writers left behind a day
+        ago or earlier. Those of writers still running are left alone."""
+        try:
+            filenames = os.listdir(self.directory)
+        except OSError:
+            return
+        stale = time.time_ns() - 24 * 60 * 60 * 10**9
+        entries = []
+        for filename in filenames:
+            path = os.path.join(self.directory, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if filename.endswith('.out'):
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+            elif filename.endswith('.tmp') and stat.st_mtime_ns < stale:
+                self._remove(path)
+        total = 0
+        for _mtime, size, path in sorted(entries, reverse=True):
+            total += size
+            if total > self.max_bytes:
+                self._remove(path)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        # another build may have evicted it first
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class DNCachedHighlighter:
+    """Stands in for the ``PygmentsBridge`` of a builder and only has it
+    highlight the code blocks :py:class:`DNHighlightCache` doesn't have."""
+
+    def __init__(self, bridge: PygmentsBridge, cache: DNHighlightCache) -> None:
+        self.bridge = bridge
+        self.cache = cache
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.bridge, name)
+
+    def highlight_block(self, source: str, lang: str, opts: Optional[Dict] = None,
+                        force: bool = False, location: Any = None, **kwargs: Any) -> str:
+        if not isinstance(source, str):
+            source = source.decode()
+        bridge = self.bridge
+        context = (
+            HIGHLIGHT_CACHE_VERSION, pygments_version, sphinx_version,
+            bridge.dest, type(bridge).__qualname__, sorted(bridge.formatter_args.items()),
+            bridge.latex_engine, lang, sorted((opts or {}).items()), force,
+            sorted(kwargs.items()), source,
+        )
+        key = hashlib.sha256(repr(context).encode('utf-8')).hexdigest()
+        highlighted = self.cache.get(key)
+        if highlighted is not None:
+            return highlighted
+
+        with count_warnings() as warnings:
+            highlighted = bridge.highlight_block(source, lang, opts, force, location, **kwargs)
+        # the warnings of a block that failed to lex are issued again next time
+        if not warnings.count:
+            self.cache.put(key, highlighted)
+        return highlighted
+
+
+def init_highlight_cache(app: Sphinx) -> None:
+    bridge = getattr(app.builder, 'highlighter', None)
+    if app.config.dn_highlight_cache_size > 0 and isinstance(bridge, PygmentsBridge):
+        shared = cast(DNDomain, app.env.get_domain('dn')).shared_cache
+        cache = DNHighlightCache(os.path.join(shared or app.doctreedir, 'dn_highlight'),
+                                 app.config.dn_highlight_cache_size)
+        app.builder.highlighter = DNCachedHighlighter(bridge, cache)
+
+
+def evict_highlight_cache(app: Sphinx, exception: Optional[Exception]) -> None:
+    highlighter = getattr(app.builder, 'highlighter', None)
+    if isinstance(highlighter, DNCachedHighlighter):
+        highlighter.cache.evict()
+
+
+def clear_inventory_lookups(app: Sphinx) -> None:
+    # intersphinx (re)loads the inventories when the builder is inited
+    cast(DNDomain, app.env.get_domain('dn'))._inventory_lookups.clear()
+
+
+def resolve_inventory_reference(app: Sphinx, env: BuildEnvironment, node: pending_xref,
+                                contnode: Element) -> Optional[Element]:
+    """Resolves dn references to the objects of other projects, listed in
+    the inventories loaded by ``sphinx.ext.intersphinx``.
+
+    Targets are found the way the objects of the project itself are, by
+    :py:class:`DNLookup`, in lookups built once from the inventories rather
+    than by scanning them for every reference. A target can name the
+    inventory to look in, as in ``edgedb-net:EdgeDB.EdgeDBClient``.
+    """
+    if node.get('refdomain') != 'dn' or not hasattr(env, 'intersphinx_named_inventory'):
+        return None
+
+    target = node['reftarget']
+    inv_name = None
+    if ':' in target:
+        name, rest = target.split(':', 1)
+        if name in env.intersphinx_named_inventory:
+            inv_name, target = name, rest
+    disabled = env.config.intersphinx_disabled_reftypes
+    if inv_name is None and ('*' in disabled or 'dn:*' in disabled):
+        return None
+
+    domain = cast(DNDomain, env.get_domain('dn'))
+    lookup = domain.get_inventory_lookup(inv_name)
+    typ = node['reftype']
+    _name, item = lookup.find(node.get('dn:module'), node.get('dn:object'), target, typ,
+                              1 if node.hasattr('refspecific') else 0, location=node)
+    if item is None:
+        return None
+
+    proj, version, uri, _dispname = item
+    if '://' not in uri and node.get('refdoc'):
+        # get correct path in case of subdirectories
+        uri = posixpath.join(relative_path(node['refdoc'], '.'), uri)
+    if version:
+        reftitle = _('(in %s v%s)') % (proj, version)
+    else:
+        reftitle = _('(in %s)') % (proj,)
+    newnode = reference('', '', internal=False, refuri=uri, reftitle=reftitle)
+    title = contnode.astext()
+    if inv_name is not None and not node.get('refexplicit') and title.startswith(inv_name + ':'):
+        title = title[len(inv_name) + 1:]
+        contnode = contnode.__class__(title, title)
+    newnode.append(contnode)
+    return newnode
+
+
+def note_unresolved_reference(app: Sphinx, env: BuildEnvironment, node: pending_xref,
+                              contnode: Element) -> None:
+    """Records a dn reference that neither the domain nor the
+    ``missing-reference`` handlers ahead of this one, intersphinx included,
+    could resolve."""
+    if node.get('refdomain') == 'dn':
+        domain = cast(DNDomain, env.get_domain('dn'))
+        domain.note_unresolved(node.get('refdoc') or env.docname, node['reftype'],
+                               node['reftarget'], node)
+
+
+def note_resolved_document(app: Sphinx, doctree: d_nodes.document, docname: str) -> None:
+    cast(DNDomain, app.env.get_domain('dn')).note_resolved_document(docname)
+
+
+def report_unresolved_after_writing(app: Sphinx) -> None:
+    """Has the builder report the dn references that failed to resolve as
+    soon as it has written the documents.
+
+    Warnings logged at ``build-finished`` come after Sphinx has settled
+    the exit status of the build, a ``-W`` build would pass with them.
+    """
+    builder = app.builder
+    write = builder.write
+
+    @functools.wraps(write)
+    def write_and_report(*args: Any, **kwargs: Any) -> None:
+        write(*args, **kwargs)
+        domain = cast(DNDomain, app.env.get_domain('dn'))
+        domain.report_unresolved(os.path.join(app.doctreedir,
+                                              f'dn_unresolved.{builder.name}.json'))
+
+    builder.write = write_and_report  # type: ignore
+
+
+class DNLinkCheckBuilder(Builder):
+    """Checks the dn links of every document without writing any output.
+
+    Only the read phase runs, in parallel with ``-j``, followed by the
+    resolution of the :dn: references; none of the other post-transforms,
+    templates or highlighting. The member lists rendered by
+    :py:meth:`DNObject.transform_content` are checked to link to ids of
+    their document. Broken and ambiguous links are reported in
+    ``dn-linkcheck.json`` in the output directory and make the build exit
+    with status 1.
+    """
+    name = 'dn-linkcheck'
+    epilog = __('Look for any errors in the above output or in '
+                '%(outdir)s/dn-linkcheck.json')
+    # nothing is written, there is nothing to gain from forking writers
+    allow_parallel = False
+
+    def init(self) -> None:
+        self.checked = 0
+        self.broken: List[Dict[str, Any]] = []
+
+    def get_outdated_docs(self) -> Set[str]:
+        # a link breaks when its target goes away, its document need not
+        # have changed
+        return self.env.found_docs
+
+    def get_target_uri(self, docname: str, typ: Optional[str] = None) -> str:
+        return ''
+
+    def write(self, build_docnames: Iterable[str], updated_docnames: Sequence[str],
+              method: str = 'update') -> None:
+        domain = cast(DNDomain, self.env.get_domain('dn'))
+        docnames = sorted(self.env.found_docs)
+        for docname in status_iterator(docnames, __('checking dn links... '), 'darkgreen',
+                                       len(docnames), self.app.verbosity):
+            domain.note_resolved_document(docname)
+            doctree = self.env.get_doctree(docname)
+            self.check_references(domain, docname, doctree)
+            self.check_member_links(docname, doctree)
+
+    def check_references(self, domain: DNDomain, docname: str,
+                         doctree: d_nodes.document) -> None:
+        """Resolves the dn references of a document the way the
+        ``ReferencesResolver`` post-transform does."""
+        for node in doctree.findall(pending_xref):
+            if node.get('refdomain') != 'dn':
+                continue
+            self.checked += 1
+            typ = node['reftype']
+            target = node['reftarget']
+            contnode = cast(Element, node[0].deepcopy())
+            try:
+                newnode = domain.resolve_xref(self.env, docname, self, typ, target,
+                                              node, contnode)
+                if newnode is None:
+                    newnode = self.app.emit_firstresult('missing-reference', self.env, node,
+                                                        contnode, allowed_exceptions=(NoUri,))
+            except NoUri:
+                # resolved, this builder just has no URIs
+                continue
+            if newnode is not None:
+                continue
+            candidates = (domain.get_ambiguous_candidates(target)
+                          or domain.get_ambiguous_candidates(target.partition(':')[2]))
+            entry = self.make_entry(docname, node, typ, target)
+            if candidates:
+                entry.update(reason='ambiguous', candidates=candidates)
+            else:
+                entry.update(reason='unresolved')
+            self.broken.append(entry)
+
+    def check_member_links(self, docname: str, doctree: d_nodes.document) -> None:
+        """Checks that the links of the member lists of the dn descriptions
+        of a document point to ids in it."""
+        ids = {node_id for node in doctree.findall(Element) for node_id in node['ids']}
+        for node in doctree.findall(reference):
+            refid = node.get('refid')
+            if not refid:
+                continue
+            parent = node.parent
+            while parent is not None and not isinstance(parent, addnodes.desc):
+                parent = parent.parent
+            if parent is None or parent.get('domain') != 'dn':
+                continue
+            self.checked += 1
+            if refid in ids:
+                continue
+            logger.warning(__('dn member link to missing id %r'), refid,
+                           type='ref', subtype='dn', location=node)
+            self.broken.append({**self.make_entry(docname, node, 'member', refid),
+                                'reason': 'missing-id'})
+
+    def make_entry(self, docname: str, node: Element, typ: str, target: str) -> Dict[str, Any]:
+        # inline nodes and field names count their lines from the paragraph
+        # or field they are in, the first block around them has the line
+        # in the source
+        block = node
+        while block.parent is not None and (
+                block.line is None or isinstance(block, (d_nodes.Inline, d_nodes.field_name))):
+            block = block.parent
+        return {'docname': docname, 'source': block.source, 'line': block.line,
+                'type': typ, 'target': target}
+
+    def finish(self) -> None:
+        self.broken.sort(key=lambda entry: (entry['docname'], entry['line'] or 0,
+                                            entry['type'], entry['target']))
+        path = os.path.join(self.outdir, 'dn-linkcheck.json')
+        os.makedirs(self.outdir, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'checked': self.checked, 'broken': self.broken}, f, indent=2)
+        if self.broken:
+            logger.info(__('%d of %d dn links are broken'), len(self.broken), self.checked)
+            self.app.statuscode = 1
+        else:
+            logger.info(__('all %d dn links are fine'), self.checked)
+
+
+#: bump when scan_csharp finds other declarations, so that the cached scans
+#: of the sources are not reused
+COVERAGE_CACHE_VERSION = 1
+
+_CS_MODIFIERS = frozenset((
+    'public', 'private', 'protected', 'internal', 'static', 'sealed', 'abstract',
+    'virtual', 'override', 'async', 'readonly', 'unsafe', 'extern', 'new', 'partial',
+    'ref', 'volatile', 'const', 'required', 'file', 'fixed',
+))
+_CS_ACCESS = frozenset(('public', 'private', 'protected', 'internal', 'file'))
+_CS_PARAMETER_MODIFIERS = frozenset(('this', 'params', 'ref', 'out', 'in', 'scoped', 'readonly'))
+_CS_TYPE_RE = re.compile(r'(class|struct|interface|enum|record(?: class| struct)?) (\w+) ?(<[^>]*>)?')
+_CS_NAMESPACE_RE = re.compile(r'namespace ([\w.]+)$')
+_CS_MEMBER_RE = re.compile(r'(?:([\w.<>,\[\]?() ]+?) )?(\w+) ?(<[^()]*>)?$')
+_CS_ALIASES = {
+    'Boolean': 'bool', 'Byte': 'byte', 'SByte': 'sbyte', 'Char': 'char', 'Decimal': 'decimal',
+    'Double': 'double', 'Single': 'float', 'Int16': 'short', 'UInt16': 'ushort', 'Int32': 'int',
+    'UInt32': 'uint', 'Int64': 'long', 'UInt64': 'ulong', 'Object': 'object', 'String': 'string',
+}
+
+
+def _strip_csharp(text: str) -> str:
+    """Blanks out the comments, string and character literals and the
+    preprocessor lines of C# source, keeping its newlines."""
+    out = []
+    i = 0
+    n = len(text)
+    at_line_start = True
+    while i < n:
+        char = text[i]
+        start = i
+        if char == '#' and at_line_start:
+            i = text.find('\n', i)
+            i = n if i < 0 else i
+        elif text.startswith('//', i):
+            i = text.find('\n', i)
+            i = n if i < 0 else i
+        elif text.startswith('/*', i):
+            i = text.find('*/', i + 2)
+            i = n if i < 0 else i + 2
+        elif char == "'":
+            i += 1
+            while i < n and text[i] not in "'\n":
+                i += 2 if text[i] == '\\' else 1
+            i += 1
+        elif char in '@$"':
+            prefix = re.match(r'[@$]*"', text[i:i + 4])
+            if prefix is None:
+                out.append(char)
+                i += 1
+                at_line_start = False
+                continue
+            i += len(prefix.group())
+            if text.startswith('""', i) and '@' not in prefix.group():
+                # a raw literal, closed by as many quotes as opened it
+                quotes = len(re.match(r'"+', text[i - 1:]).group())
+                end = text.find('"' * quotes, i + quotes - 1)
+                i = n if end < 0 else end + quotes
+            elif '@' in prefix.group():
+                while i < n:
+                    if text.startswith('""', i):
+                        i += 2
+                    elif text[i] == '"':
+                        i += 1
+                        break
+                    else:
+                        i += 1
+            else:
+                while i < n and text[i] not in '"\n':
+                    i += 2 if text[i] == '\\' else 1
+                i += 1
+        else:
+            out.append(char)
+            if char == '\n':
+                at_line_start = True
+            elif not char.isspace():
+                at_line_start = False
+            i += 1
+            continue
+        i = min(i, n)
+        out.append('""' if char in '@$"' else ' ')
+        out.append('\n' * text.count('\n', start, i))
+    return ''.join(out)
+
+
+def _split_cs_top_level(text: str) -> List[str]:
+    """Splits a list on the commas outside of brackets."""
+    parts = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(text):
+        if char in '<([{':
+            depth += 1
+        elif char in '>)]}':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _find_cs_top_level(text: str, char: str) -> int:
+    """Returns the index of the first ``char`` outside of brackets, or -1."""
+    depth = 0
+    for i, c in enumerate(text):
+        if c == char and depth == 0:
+            return i
+        if c in '<([{':
+            depth += 1
+        elif c in '>)]}' and not (c == '>' and text[i - 1:i] == '='):
+            depth -= 1
+    return -1
+
+
+def _skip_cs_attributes(text: str) -> int:
+    """Returns the index of the declaration after the whitespace and the
+    attributes at the start of ``text``."""
+    i = 0
+    while True:
+        while i < len(text) and text[i].isspace():
+            i += 1
+        if not text.startswith('[', i):
+            return i
+        depth = 0
+        for j in range(i, len(text)):
+            if text[j] == '[':
+                depth += 1
+            elif text[j] == ']':
+                depth -= 1
+                if depth == 0:
+                    break
+        i = j + 1
+
+
+def _cs_parameter_type(parameter: str) -> str:
+    parameter = ' '.join(parameter.split())
+    parameter = parameter[_skip_cs_attributes(parameter):]
+    default = _find_cs_top_level(parameter, '=')
+    if default >= 0:
+        parameter = parameter[:default].strip()
+    words = parameter.split(' ')
+    while len(words) > 2 and words[0] in _CS_PARAMETER_MODIFIERS:
+        words.pop(0)
+    if len(words) > 1:
+        words.pop()
+    return re.sub(r' ?, ?', ',', ' '.join(words))
+
+
+def _parse_cs_header(header: str, scope: Tuple[str, str, bool, str],
+                     terminator: str) -> Optional[Tuple[str, str, bool]]:
+    """Returns the objtype and the fullname of the declaration in a header,
+    the code from the end of the previous one up to ``terminator``, and
+    whether it is public. Returns None if it doesn't declare a namespace,
+    a type or a public member :py:func:`scan_csharp` reports."""
+    kind, owner, public, owner_name = scope
+    header = ' '.join(header.split())
+    header = header[_skip_cs_attributes(header):]
+    if not header:
+        return None
+    match = _CS_NAMESPACE_RE.match(header)
+    if match:
+        return 'namespace', match.group(1), True
+
+    words = header.split(' ')
+    modifiers = set()
+    while words and words[0] in _CS_MODIFIERS:
+        modifiers.add(words.pop(0))
+    visible = public and ('public' in modifiers or (
+        kind == 'interface' and not modifiers & _CS_ACCESS))
+    rest = ' '.join(words)
+    prefix = owner + '.' if owner else ''
+
+    match = _CS_TYPE_RE.match(rest)
+    if match:
+        objtype = match.group(1).split(' ')[-1]
+        if objtype == 'record':
+            objtype = 'class'
+        generics = re.sub(r'\b(?:in|out) ', '', match.group(3) or '')
+        return objtype, f'{prefix}{match.group(2)}{generics}', visible
+    if kind not in ('class', 'struct', 'interface') or not visible:
+        return None
+    if {'event', 'delegate', 'operator', 'implicit', 'explicit'} & set(words):
+        return None
+
+    arrow = _find_cs_top_level(rest, '=')
+    if arrow >= 0 and rest[arrow + 1:arrow + 2] == '>':
+        rest = rest[:arrow].strip()
+        terminator = '=>'
+    paren = _find_cs_top_level(rest, '(')
+    if paren < 0 and re.search(r'\bthis ?\[', rest):
+        # an indexer, which .NET names Item
+        return 'property', f'{prefix}Item', True
+    if paren < 0:
+        if terminator == ';':
+            # a field
+            return None
+        match = _CS_MEMBER_RE.match(rest)
+        if match is None or not match.group(1) or match.group(3):
+            return None
+        return 'property', f'{prefix}{match.group(2)}', True
+
+    match = _CS_MEMBER_RE.match(rest[:paren].strip())
+    if match is None:
+        return None
+    rettype, name, generics = match.groups()
+    if not rettype and name != owner_name:
+        return None
+    arglist = rest[paren + 1:]
+    depth = 1
+    for i, char in enumerate(arglist):
+        depth += {'(': 1, ')': -1}.get(char, 0)
+        if depth == 0:
+            arglist = arglist[:i]
+            break
+    args = [_cs_parameter_type(arg) for arg in _split_cs_top_level(arglist) if arg.strip()]
+    objtype = 'constructor' if not rettype else 'method'
+    return objtype, f"{prefix}{name}{generics or ''}({', '.join(args)})", True
+
+
+def scan_csharp(text: str) -> List[Tuple[str, str, int]]:
+    """Finds the public namespaces, types, methods, constructors and
+    properties declared in C# source.
+
+    Returns ``(objtype, fullname, line)`` in the order they are declared,
+    the fullnames of methods and constructors list the types of their
+    parameters like the dn objects do. This reads declarations, not C#:
+    fields, events, operators, indexers and delegates are left out, and
+    so is anything it can't make sense of.
+    """
+    code = _strip_csharp(text)
+    declarations = []
+    # (kind, fullname, whether it and all around it are public, short name)
+    stack: List[Tuple[str, str, bool, str]] = [('namespace', '', True, '')]
+    start = 0
+    line = 1
+    start_line = 1
+    for i, char in enumerate(code):
+        if char == '\n':
+            line += 1
+            continue
+        if char not in '{};':
+            continue
+        scope = stack[-1]
+        found = None
+        if scope[0] in ('namespace', 'class', 'struct', 'interface'):
+            found = _parse_cs_header(code[start:i], scope, char)
+        if found is not None:
+            objtype, fullname, public = found
+            is_type = objtype in ('namespace', 'class', 'struct', 'interface', 'enum')
+            if objtype == 'namespace':
+                # nested and file scoped namespaces are named in full
+                fullname = f'{scope[1]}.{fullname}' if scope[1] and char == '{' else fullname
+            if public:
+                header = code[start:i]
+                declarations.append((objtype, fullname,
+                                     start_line + header.count('\n', 0, _skip_cs_attributes(header))))
+            if char == '{':
+                if is_type:
+                    short = split_dotted(fullname)[-1].split('<', 1)[0]
+                    stack.append((objtype, fullname, public, short))
+                else:
+                    stack.append(('other', '', False, ''))
+            elif objtype == 'namespace':
+                stack[0] = ('namespace', fullname, True, '')
+        elif char == '{':
+            stack.append(('other', '', False, ''))
+        elif char == '}' and len(stack) > 1:
+            stack.pop()
+        start = i + 1
+        start_line = line
+    return declarations
+
+
+def _scan_source_files(files: List[Tuple[str, Optional[str]]]
+                       ) -> List[Tuple[str, Optional[str], Optional[List[Tuple[str, str, int]]]]]:
+    """Scans the files of ``(path, hash of the previous scan)`` whose hash
+    changed, returns ``(path, hash, declarations or None if unchanged)``."""
+    results = []
+    for path, previous in files:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            results.append((path, None, None))
+            continue
+        digest = hashlib.sha256(data).hexdigest()
+        if digest == previous:
+            results.append((path, digest, None))
+        else:
+            results.append((path, digest, scan_csharp(data.decode('utf-8-sig', 'replace'))))
+    return results
+
+
+def coverage_key(fullname: str) -> str:
+    """Returns the key a dn object and a declaration scanned from the
+    sources are matched by.
+
+    Generics count by their number only, the constructor of a generic
+    type is named without them, and the parameter types are compared
+    without nullable annotations, by-reference markers or whitespace, with
+    the aliases of the built-in types of ``System``.
+    """
+    base = overload_base(fullname)
+    parts = split_dotted(generic_key(base))
+    if len(parts) > 1 and parts[-1].split('`')[0] == parts[-2].split('`')[0]:
+        parts[-1] = parts[-1].split('`')[0]
+    key = '.'.join(parts)
+    if base == fullname:
+        return key
+    args = []
+    for arg in _split_cs_top_level(fullname[len(base) + 1:fullname.rindex(')')]):
+        arg = re.sub(r'[\s?&]', '', arg).replace('System.', '')
+        args.append(re.sub(r'\w+', lambda m: _CS_ALIASES.get(m.group(), m.group()), arg))
+    return f"{key}({','.join(arg for arg in args if arg)})"
+
+
+class DNCoverageBuilder(Builder):
+    """Compares the public API declared in the C# sources with the dn
+    objects of the documentation, without writing any documents.
+
+    The sources are the ``.cs`` files below the directories listed in
+    ``dn_coverage_paths``, relative to the configuration directory, read
+    by :py:func:`scan_csharp`. The declarations of each file are cached in
+    the doctree directory along with its modification time, size and hash;
+    only the files that changed are scanned again, in parallel with
+    ``-j``. Declarations and objects are matched by :py:func:`coverage_key`,
+    an object described by a short name, outside of its namespace, matches
+    the one declaration whose key ends in its own. ``dn-coverage.json`` in
+    the output directory lists the public declarations no dn object
+    describes and the dn objects other than namespaces no declaration
+    matches anymore.
+    """
+    name = 'dn-coverage'
+    epilog = __('The coverage report is in %(outdir)s/dn-coverage.json')
+    # nothing is written, the scan forks workers of its own
+    allow_parallel = False
+
+    def init(self) -> None:
+        self.sources: Dict[str, List[Tuple[str, str, int]]] = {}
+        self.rescanned = 0
+
+    def get_outdated_docs(self) -> Set[str]:
+        # the sources may have changed while the documents didn't
+        return self.env.found_docs
+
+    def get_target_uri(self, docname: str, typ: Optional[str] = None) -> str:
+        return ''
+
+    @property
+    def cache_path(self) -> str:
+        return os.path.join(self.doctreedir, 'dn_coverage.pickle')
+
+    def find_sources(self) -> List[str]:
+        paths = []
+        for directory in self.config.dn_coverage_paths:
+            directory = os.path.join(self.confdir, directory)
+            if not os.path.isdir(directory):
+                logger.warning(__('dn_coverage_paths entry %r is not a directory'), directory)
+                continue
+            for root, dirs, files in os.walk(directory):
+                dirs[:] = sorted(d for d in dirs if d not in ('bin', 'obj') and not d.startswith('.'))
+                paths.extend(os.path.join(root, name) for name in sorted(files)
+                             if name.endswith('.cs'))
+        return paths
+
+    def write(self, build_docnames: Iterable[str], updated_docnames: Sequence[str],
+              method: str = 'update') -> None:
+        try:
+            with open(self.cache_path, 'rb') as f:
+                cache = pickle.load(f)
+            if cache.get('version') != COVERAGE_CACHE_VERSION:
+                cache = {}
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            cache = {}
+        cached: Dict[str, Tuple[int, int, str, List[Tuple[str, str, int]]]] = cache.get('files', {})
+
+        files: Dict[str, Tuple[int, int, str, List[Tuple[str, str, int]]]] = {}
+        todo: List[Tuple[str, Optional[str]]] = []
+        for path in self.find_sources():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entry = cached.get(path)
+            if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                files[path] = entry
+            else:
+                todo.append((path, entry[2] if entry is not None else None))
+
+        def scanned(chunk: Any, results: List[Tuple[str, Optional[str], Any]]) -> None:
+            for path, digest, declarations in results:
+                if digest is None:
+                    continue
+                if declarations is None:
+                    declarations = cached[path][3]
+                else:
+                    self.rescanned += 1
+                stat = os.stat(path)
+                files[path] = (stat.st_mtime_ns, stat.st_size, digest, declarations)
+
+        if todo:
+            logger.info(bold(__('scanning %d C# sources... ')) % len(todo), nonl=True)
+            nproc = self.app.parallel
+            if nproc > 1 and parallel_available and len(todo) > nproc:
+                tasks = ParallelTasks(nproc)
+                for chunk in make_chunks(todo, nproc):
+                    tasks.add_task(_scan_source_files, chunk, scanned)
+                tasks.join()
+            else:
+                scanned(todo, _scan_source_files(todo))
+            logger.info(__('done'))
+
+        with open(self.cache_path, 'wb') as f:
+            pickle.dump({'version': COVERAGE_CACHE_VERSION, 'files': files}, f,
+                        pickle.HIGHEST_PROTOCOL)
+        self.sources = {path: entry[3] for path, entry in files.items()}
+
+    def finish(self) -> None:
+        domain = cast(DNDomain, self.env.get_domain('dn'))
+        # the first declaration of each key, partial types are declared
+        # many times; namespaces are only counted by what they declare
+        declared: Dict[str, Tuple[str, str, str, int]] = {}
+        for path, declarations in sorted(self.sources.items()):
+            for objtype, fullname, line in declarations:
+                if objtype != 'namespace':
+                    declared.setdefault(coverage_key(fullname), (objtype, fullname, path, line))
+        suffixes: Dict[str, List[str]] = {}
+        for key in declared:
+            for tail in name_suffixes(key):
+                suffixes.setdefault(tail, []).append(key)
+
+        documented: Set[str] = set()
+        stale = []
+        for fullname, (docname, node_id, objtype) in sorted(domain.objects.items()):
+            if objtype == 'namespace':
+                continue
+            key = coverage_key(fullname)
+            if key not in declared:
+                # a short name matches the one declaration it is the tail
+                # of, like it resolves in DNLookup.find
+                candidates = suffixes.get(key, [])
+                key = candidates[0] if len(candidates) == 1 else None
+            if key is None:
+                stale.append({'name': fullname, 'type': objtype, 'docname': docname,
+                              'anchor': node_id})
+            else:
+                documented.add(key)
+
+        undocumented = [{'name': fullname, 'type': objtype, 'line': line,
+                         'file': relative_path(self.confdir, path)}
+                        for key, (objtype, fullname, path, line) in declared.items()
+                        if key not in documented]
+        total = len(declared)
+
+        report = {
+            'files': len(self.sources),
+            'rescanned': self.rescanned,
+            'declarations': total,
+            'documented': total - len(undocumented),
+            'undocumented': undocumented,
+            'stale': stale,
+        }
+        path = os.path.join(self.outdir, 'dn-coverage.json')
+        os.makedirs(self.outdir, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        logger.info(__('%d of %d public declarations are documented, '
+                       '%d dn objects match no declaration'),
+                    report['documented'], total, len(stale))
 
-        return result
 
 def setup(app: Sphinx) -> Dict[str, Any]:
     app.add_domain(DNDomain)
+    app.add_builder(DNLinkCheckBuilder)
+    app.add_builder(DNCoverageBuilder)
+    app.add_transform(DNFragmentTransform)
+    app.add_post_transform(DNTypeReferenceResolver)
+    app.add_config_value('dn_xml_doc', None, 'env')
+    app.add_config_value('dn_profile', False, '')
+    app.add_config_value('dn_search_shards', True, 'html')
+    app.add_config_value('dn_member_tables', 0, 'html')
+    app.add_config_value('dn_highlight_cache_size', 64 * 1024 * 1024, '')
+    app.add_config_value('dn_coverage_paths', [], '')
+    app.add_config_value('dn_split_docs', [], 'env')
+    app.add_config_value('dn_shared_cache', None, '')
+    app.add_node(dn_member_table, html=(visit_member_table, depart_member_table))
+    app.connect('doctree-read', note_references)
+    app.connect('env-get-outdated', split_documents)
+    app.connect('source-read', read_split_document)
+    app.connect('env-get-updated', get_updated_docs)
+    app.connect('builder-inited', report_unresolved_after_writing)
+    # after intersphinx and the other resolvers
+    app.connect('missing-reference', note_unresolved_reference, priority=900)
+    app.connect('doctree-resolved', note_resolved_document)
+    app.connect('builder-inited', init_profiler)
+    app.connect('doctree-read', save_profile_state)
+    app.connect('env-merge-info', merge_profile_state)
+    app.connect('env-updated', drop_profile_state)
+    app.connect('env-updated', prune_fragments)
+    app.connect('env-updated', update_indices)
+    app.connect('build-finished', write_profile)
+    app.connect('html-page-context', add_search_loader)
+    app.connect('builder-inited', clear_inventory_lookups)
+    # ahead of intersphinx, which only looks up targets verbatim
+    app.connect('missing-reference', resolve_inventory_reference, priority=400)
+    app.connect('builder-inited', write_search_loader)
+    app.connect('build-finished', write_search_shards)
+    app.connect('doctree-resolved', defer_member_tables)
+    app.connect('doctree-resolved', add_split_redirects)
+    app.connect('html-page-context', add_member_tables_loader)
+    app.connect('builder-inited', write_member_tables_loader)
+    app.connect('build-finished', prune_member_tables)
+    app.connect('builder-inited', init_highlight_cache)
+    app.connect('build-finished', evict_highlight_cache)
 
     return {
         'version': 'builtin',
-        'env_version': 2,
+        'env_version': 12,
         'parallel_read_safe': True,
         'parallel_write_safe': True,
     }
\ No newline at end of file
@@ -0,0 +1,269 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2019-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+r"""
+=================================
+Live preview of the documentation
+=================================
+
+Builds the documentation, serves the HTML and rebuilds it whenever a
+source changes, in a single process::
+
+    python docs/preview.py --port 8000
+
+The Sphinx application stays in memory between builds, and with it the
+environment and the object tables of the :dn: domain. A rebuild doesn't
+import the extensions, load the intersphinx inventories or unpickle the
+environment again. It reads the documents that changed and writes them
+along with the documents whose dn references they may affect, see
+``get_updated_docs`` in ``dotnetdomain.py``.
+
+The sources of the documents are watched, so are the files they depend
+on, like the XML documentation of the ``dn:auto*`` directives. The files
+the doc generator rewrites together are picked up as one change. An edit
+of ``conf.py`` starts over with a new application. Open pages reload
+themselves when a build finishes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+
+from typing import Any, Dict, List, Optional, Set
+
+DOCS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+#: the pages poll this for the number of the last build
+BUILD_PATH = '/_dn_preview/build'
+
+RELOAD_JS = '''\
+(function () {
+  var seen = null;
+  function poll() {
+    fetch('%s', {cache: 'no-store'})
+      .then(function (response) { return response.json(); })
+      .then(function (state) {
+        if (seen !== null && state.build !== seen) {
+          window.location.reload();
+          return;
+        }
+        seen = state.build;
+        setTimeout(poll, 500);
+      })
+      .catch(function () { setTimeout(poll, 2000); });
+  }
+  poll();
+})();
+''' % BUILD_PATH
+
+
+class Preview:
+    """Rebuilds the documentation with the same Sphinx application for as
+    long as ``conf.py`` doesn't change."""
+
+    def __init__(self, srcdir: str, outdir: str, builder: str, interval: float,
+                 quiet: bool) -> None:
+        self.srcdir = srcdir
+        self.outdir = outdir
+        self.builder = builder
+        self.interval = interval
+        self.quiet = quiet
+        self.conf_path = os.path.join(srcdir, 'conf.py')
+        #: bumped after every build, see PreviewHandler
+        self.build_number = 0
+        self.app: Any = None
+
+    def run(self) -> None:
+        from sphinx.util.docutils import docutils_namespace, patch_docutils
+
+        while True:
+            with patch_docutils(self.srcdir), docutils_namespace():
+                self.app = self.make_app()
+                snapshot = self.snapshot()
+                if self.build():
+                    self.watch(snapshot)
+                else:
+                    # the environment may be half updated, start over once
+                    # the sources change
+                    self.wait_for_change(snapshot)
+
+    def make_app(self) -> Any:
+        from sphinx.application import Sphinx
+
+        app = Sphinx(self.srcdir, self.srcdir, self.outdir,
+                     os.path.join(self.outdir, '.doctrees'), self.builder,
+                     status=None if self.quiet else sys.stdout, warning=sys.stderr)
+        if self.builder in ('html', 'dirhtml'):
+            app.add_js_file(None, body=RELOAD_JS)
+        return app
+
+    def build(self, changed: Optional[Set[str]] = None) -> bool:
+        from dotnetdomain import count_warnings
+
+        start = time.perf_counter()
+        try:
+            # Sphinx sums up the warnings of all the builds of the
+            # application, count those of this one
+            with count_warnings() as warnings:
+                self.app.build()
+        except Exception:
+            traceback.print_exc()
+            return False
+        finally:
+            self.build_number += 1
+        elapsed = time.perf_counter() - start
+        summary = f'{elapsed:.2f}s, {warnings.count} warning(s)'
+        if changed:
+            names = ', '.join(sorted(os.path.relpath(path, self.srcdir) for path in changed))
+            print(f'rebuilt in {summary} after changes to {names}', file=sys.stderr)
+        else:
+            print(f'built in {summary}', file=sys.stderr)
+        return True
+
+    def watched_paths(self) -> Set[str]:
+        paths = {self.conf_path}
+        env = self.app.env if self.app is not None else None
+        suffixes = tuple(self.app.config.source_suffix) if self.app is not None else ('.rst',)
+        outdir = os.path.join(self.outdir, '')
+        # the pages the dn extension splits documents into are written by
+        # the builds, the documents are watched instead
+        split_docs = getattr(self.app.config, 'dn_split_docs', ()) if self.app is not None else ()
+        split_dirs = {os.path.join(self.srcdir, docname, '') for docname in split_docs}
+        for root, dirs, files in os.walk(self.srcdir):
+            # the sources can't be below the output
+            dirs[:] = [d for d in dirs
+                       if not os.path.join(root, d, '').startswith(outdir)
+                       and os.path.join(root, d, '') not in split_dirs
+                       and not d.startswith('.')]
+            paths.update(os.path.join(root, name) for name in files if name.endswith(suffixes))
+        if env is not None:
+            for dependencies in env.dependencies.values():
+                paths.update(os.path.join(self.srcdir, path) for path in dependencies)
+        return paths
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        mtimes: Dict[str, Optional[float]] = {}
+        for path in self.watched_paths():
+            try:
+                mtimes[path] = os.stat(path).st_mtime
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def wait_for_change(self, snapshot: Dict[str, Optional[float]]
+                        ) -> Dict[str, Optional[float]]:
+        """Returns a snapshot that differs from ``snapshot``, once the
+        watched files stopped changing."""
+        while True:
+            time.sleep(self.interval)
+            current = self.snapshot()
+            if current == snapshot:
+                continue
+            # the doc generator rewrites several files one after another
+            while True:
+                time.sleep(self.interval)
+                settled = self.snapshot()
+                if settled == current:
+                    return current
+                current = settled
+
+    def watch(self, snapshot: Dict[str, Optional[float]]) -> None:
+        """Rebuilds after every change since ``snapshot``, returns when the
+        configuration changed or a build failed."""
+        while True:
+            current = self.wait_for_change(snapshot)
+            changed = {path for path in snapshot.keys() | current.keys()
+                       if snapshot.get(path) != current.get(path)}
+            if self.conf_path in changed:
+                print('conf.py changed, starting over', file=sys.stderr)
+                return
+            if not self.build(changed):
+                return
+            # the build may have found new dependencies; the files that
+            # changed while it ran keep their old times to be built next
+            snapshot = {**self.snapshot(), **current}
+
+
+class PreviewHandler(http.server.SimpleHTTPRequestHandler):
+    preview: Preview
+
+    def do_GET(self) -> None:
+        if self.path != BUILD_PATH:
+            super().do_GET()
+            return
+        body = json.dumps({'build': self.preview.build_number}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def serve(preview: Preview, host: str, port: int) -> http.server.ThreadingHTTPServer:
+    os.makedirs(preview.outdir, exist_ok=True)
+    handler = type('Handler', (PreviewHandler,), {'preview': preview})
+    server = http.server.ThreadingHTTPServer(
+        (host, port), functools.partial(handler, directory=preview.outdir))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f'serving {preview.outdir} on http://{host}:{server.server_address[1]}/',
+          file=sys.stderr)
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--srcdir', default=DOCS_DIR)
+    parser.add_argument('--outdir', help='defaults to _build/preview in the srcdir')
+    parser.add_argument('--builder', '-b', default='html')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', '-p', type=int, default=8000)
+    parser.add_argument('--interval', type=float, default=0.2,
+                        help='seconds between checks of the sources')
+    parser.add_argument('--quiet', '-q', action='store_true',
+                        help='only print warnings and build times')
+    args = parser.parse_args(argv)
+
+    srcdir = os.path.abspath(args.srcdir)
+    outdir = os.path.abspath(args.outdir or os.path.join(srcdir, '_build', 'preview'))
+    preview = Preview(srcdir, outdir, args.builder, args.interval, args.quiet)
+    server = serve(preview, args.host, args.port)
+    try:
+        preview.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
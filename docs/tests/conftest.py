@@ -0,0 +1,61 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2019-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import io
+import os
+import sys
+import textwrap
+
+from typing import Callable, Dict, Tuple
+
+import pytest
+
+DOCS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DOCS_DIR)
+
+CONF_PY = '''\
+extensions = ['dotnetdomain']
+master_doc = 'index'
+'''
+
+
+@pytest.fixture
+def build(tmp_path) -> Callable[..., Tuple[object, str]]:
+    """Builds a project of the given documents, returns the application
+    and the warnings. The project is in ``tmp_path``, or in the directory
+    ``path`` below it, for tests building several."""
+    from sphinx.application import Sphinx
+    from sphinx.util.docutils import docutils_namespace, patch_docutils
+
+    def build(documents: Dict[str, str], builder: str = 'html',
+              conf: str = '', path: str = '') -> Tuple[Sphinx, str]:
+        root = tmp_path / path
+        srcdir = root / 'src'
+        srcdir.mkdir(parents=True, exist_ok=True)
+        (srcdir / 'conf.py').write_text(CONF_PY + conf)
+        for docname, text in documents.items():
+            (srcdir / f'{docname}.rst').write_text(textwrap.dedent(text))
+        warnings = io.StringIO()
+        with patch_docutils(str(srcdir)), docutils_namespace():
+            app = Sphinx(str(srcdir), str(srcdir), str(root / builder),
+                         str(root / 'doctrees'), builder,
+                         status=None, warning=warnings)
+            app.build()
+        return app, warnings.getvalue()
+
+    return build
@@ -0,0 +1,79 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2019-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import json
+import os
+
+SOURCE = '''
+namespace EdgeDB;
+
+public sealed class EdgeDBConnection
+{
+    public static EdgeDBConnection FromDSN(string dsn) => Parse(dsn);
+
+    public static EdgeDBConnection FromInstanceName(string name, string? cloudProfile = null)
+        => Parse(name);
+
+    internal static EdgeDBConnection Parse(string value) => new();
+}
+
+public interface IEdgeDBQueryable
+{
+    Task<TResult?> QuerySingleAsync<TResult>(string query, IDictionary<string, object?>? args = null);
+}
+'''
+
+DOCUMENT = '''
+.. dn:namespace:: EdgeDB
+
+    .. dn:interface:: IEdgeDBQueryable
+
+        .. dn:method:: QuerySingleAsync(string query, IDictionary<string,object> args): Task<object>
+
+.. dn:namespace:: EdgeDB.Binary.Packets
+
+.. dn:class:: EdgeDBConnection
+
+    .. dn:method:: FromDSN(string dsn): EdgeDBConnection
+
+    .. dn:method:: FromInstanceName(string name): EdgeDBConnection
+'''
+
+
+def test_coverage_report(build, tmp_path):
+    (tmp_path / 'src' / 'cs').mkdir(parents=True)
+    (tmp_path / 'src' / 'cs' / 'EdgeDBConnection.cs').write_text(SOURCE)
+    app, warnings = build({'index': DOCUMENT}, 'dn-coverage',
+                          "dn_coverage_paths = ['cs']\n")
+    assert not warnings
+    with open(os.path.join(app.outdir, 'dn-coverage.json'), encoding='utf-8') as f:
+        report = json.load(f)
+
+    assert report['declarations'] == 5
+    assert report['documented'] == 3
+    # the class and FromDSN are described by their short names
+    assert [(entry['name'], entry['type']) for entry in report['undocumented']] == [
+        ('EdgeDB.EdgeDBConnection.FromInstanceName(string, string?)', 'method'),
+        ('EdgeDB.IEdgeDBQueryable.QuerySingleAsync<TResult>(string, IDictionary<string,object?>?)',
+         'method'),
+    ]
+    # the namespace declares nothing, but isn't a declaration of its own
+    assert [(entry['name'], entry['type']) for entry in report['stale']] == [
+        ('EdgeDB.IEdgeDBQueryable.QuerySingleAsync(string, IDictionary<string,object>)', 'method'),
+        ('EdgeDBConnection.FromInstanceName(string)', 'method'),
+    ]
@@ -0,0 +1,82 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2019-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import shutil
+
+import dotnetdomain
+
+DOCUMENT = '''
+API
+===
+
+.. dn:namespace:: EdgeDB
+
+    .. dn:class:: EdgeDBClient
+
+        Represents a client pool.
+
+        :property int PoolSize: The size of the pool.
+
+        .. dn:method:: QueryAsync(string query): Task<object>
+
+            Runs a query, see :dn:class:`EdgeDBConnection`.
+
+    .. dn:class:: EdgeDBConnection
+
+        :property string Hostname: The host to connect to.
+
+        .. dn:method:: FromDSN(string dsn): EdgeDBConnection
+
+            Parses a DSN into a :dn:class:`EdgeDBConnection`.
+
+    .. dn:struct:: Range<T>
+
+        A range, unlike :dn:struct:`Missing`.
+
+        .. dn:method:: Contains(T value): bool
+'''
+
+
+def test_replay_matches_fresh_build(build, tmp_path, monkeypatch):
+    build({'index': DOCUMENT})
+    replayed = []
+    replay_fragment = dotnetdomain.DNObject.replay_fragment
+
+    def replay(self, domain, record):
+        replayed.append(self.arguments[0])
+        return replay_fragment(self, domain, record)
+
+    monkeypatch.setattr(dotnetdomain.DNObject, 'replay_fragment', replay)
+    # the blocks after the edit move down
+    edited = DOCUMENT.replace('Represents a client pool.',
+                              'Represents a client pool.\n\n        It is thread safe.')
+    app, cached_warnings = build({'index': edited})
+    assert replayed == ['EdgeDBConnection', 'Range<T>']
+    with open(tmp_path / 'html' / 'index.html', 'rb') as f:
+        cached = f.read()
+
+    shutil.rmtree(tmp_path / 'html')
+    shutil.rmtree(tmp_path / 'doctrees')
+    replayed.clear()
+    app, fresh_warnings = build({'index': edited})
+    assert not replayed
+    with open(tmp_path / 'html' / 'index.html', 'rb') as f:
+        assert f.read() == cached
+    # the line of the unresolved reference moved with its block
+    assert 'Failed to resolve struct Missing' in fresh_warnings
+    assert cached_warnings == fresh_warnings
@@ -0,0 +1,56 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2019-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import os
+import time
+
+from dotnetdomain import DNHighlightCache
+
+
+def touch(path, age: float, size: int = 10) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('x' * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+
+def test_evict_keeps_recent_blocks(tmp_path):
+    cache = DNHighlightCache(str(tmp_path), max_bytes=25)
+    for age, key in enumerate(['new', 'mid', 'old']):
+        touch(cache.path(key), age * 60)
+    cache.evict()
+    assert sorted(os.listdir(tmp_path)) == ['mid.out', 'new.out']
+
+
+def test_evict_leaves_files_being_written(tmp_path):
+    cache = DNHighlightCache(str(tmp_path), max_bytes=0)
+    touch(tmp_path / 'block.out.123.tmp', 60)
+    touch(tmp_path / 'crashed.out.456.tmp', 2 * 24 * 60 * 60)
+    touch(tmp_path / 'README', 2 * 24 * 60 * 60)
+    cache.evict()
+    assert sorted(os.listdir(tmp_path)) == ['README', 'block.out.123.tmp']
+
+
+def test_evict_tolerates_concurrent_eviction(tmp_path, monkeypatch):
+    cache = DNHighlightCache(str(tmp_path), max_bytes=0)
+    touch(cache.path('block'), 0)
+
+    def remove(path):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(os, 'remove', remove)
+    cache.evict()
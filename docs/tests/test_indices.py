@@ -0,0 +1,65 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2019-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import os
+
+DOCUMENT = '''
+.. dn:namespace:: EdgeDB
+
+    .. dn:struct:: Range<T>
+
+        :property T Lower: The lower bound.
+
+        .. dn:method:: Range<T>(T lower): Range<T>
+
+        .. dn:method:: Empty(): Range<T>
+
+    .. dn:interface:: IQueryable
+
+.. dn:class:: EdgeDBConnection
+
+    .. dn:method:: FromDSN(string dsn): EdgeDBConnection
+'''
+
+
+def index_entries(app):
+    return sorted(entry[1] for _docname, entries in app.env.get_domain('index').entries.items()
+                  for entry in entries)
+
+
+def test_index_text(build):
+    app, warnings = build({'index': DOCUMENT})
+    assert not warnings
+    assert index_entries(app) == [
+        'EdgeDB (namespace)',
+        'EdgeDBConnection (class)',
+        'Empty() (EdgeDB.Range<T> method)',
+        'FromDSN() (EdgeDBConnection method)',
+        'IQueryable (interface in EdgeDB)',
+        'Lower (EdgeDB.Range<T> property)',
+        'Range<T> (struct in EdgeDB)',
+        'Range<T>() (EdgeDB.Range<T> method)',
+    ]
+
+
+def test_objects_outside_namespaces(build):
+    app, _warnings = build({'index': DOCUMENT})
+    domain = app.env.get_domain('dn')
+    assert domain.get_namespace('EdgeDB.Range<T>.Empty()') == 'EdgeDB'
+    assert domain.get_namespace('EdgeDBConnection.FromDSN(string)') is None
+    pages = sorted(name for name in os.listdir(app.outdir) if name.startswith('dn-'))
+    assert pages == ['dn-global.html', 'dn-namespaces.html', 'dn-ns-EdgeDB.html']
@@ -0,0 +1,75 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2019-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import os
+
+CLASS = '''\
+.. dn:namespace:: EdgeDB
+
+    .. dn:class:: EdgeDBClient
+
+        .. dn:method:: QueryAsync(string query): Task
+
+        .. dn:method:: ExecuteAsync(string query): Task
+'''
+
+
+def test_text_builder(build):
+    app, warnings = build({'index': CLASS}, 'text')
+    with open(os.path.join(app.outdir, 'index.txt'), encoding='utf-8') as f:
+        text = f.read()
+    assert '* "QueryAsync(string)"' in text
+    assert '* "ExecuteAsync(string)"' in text
+
+
+def test_member_list_is_a_list(build):
+    app, warnings = build({'index': CLASS})
+    with open(os.path.join(app.outdir, 'index.html'), encoding='utf-8') as f:
+        html = f.read()
+    assert '<ul class="dn-members' in html
+    assert '<p class="dn-members' not in html
+
+
+def test_deferred_member_table(build):
+    app, warnings = build({'index': CLASS}, conf='dn_member_tables = 1\n')
+    with open(os.path.join(app.outdir, 'index.html'), encoding='utf-8') as f:
+        html = f.read()
+    # the rest of the entries go to the end of the list on the page
+    assert '</ul>\n<div class="dn-members-more"' in html
+    assert 'ExecuteAsync(string)' not in html.split('<div class="dn-members-more"')[0]
+    with open(os.path.join(app.outdir, '_static', 'dn-members', 'index.js'),
+              encoding='utf-8') as f:
+        assert 'ExecuteAsync(string)' in f.read()
+
+
+def test_loader_written_before_pages(build):
+    conf = '''dn_member_tables = 1
+
+import os
+
+def note_loader(app, pagename, templatename, context, doctree):
+    if pagename == 'index':
+        assert os.path.exists(os.path.join(app.outdir, '_static', 'dn_members.js'))
+
+def setup(app):
+    app.connect('html-page-context', note_loader)
+'''
+    app, warnings = build({'index': CLASS}, conf=conf)
+    assert not warnings
+    assert app.statuscode == 0
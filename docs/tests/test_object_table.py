@@ -0,0 +1,78 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2019-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import pickle
+
+from dotnetdomain import DNObjectTable
+
+DOCUMENT = '''
+.. dn:namespace:: EdgeDB
+
+    .. dn:class:: EdgeDBClient
+
+        .. dn:method:: QueryAsync(string query): Task<object>
+
+        :property int PoolSize: The size of the pool.
+'''
+
+
+def test_table_round_trip():
+    data = {}
+    table = DNObjectTable(data)
+    table['EdgeDB.EdgeDBClient'] = ('api', 'EdgeDB.EdgeDBClient', 'class')
+    table['EdgeDB.EdgeDBClient.QueryAsync(string)'] = ('api', 'custom-id', 'method')
+    table['EdgeDB.EdgeDBClient.Dispose()'] = ('api', 'EdgeDB.EdgeDBClient.Dispose', 'method')
+    del table['EdgeDB.EdgeDBClient.Dispose()']
+    # the namespace, the class and the docname are stored once
+    assert data['strings'].count('EdgeDB') == 1
+    assert data['strings'].count('EdgeDBClient') == 1
+    assert data['strings'].count('api') == 1
+    assert data['node_ids'] == {1: 'custom-id'}
+
+    copy = DNObjectTable(pickle.loads(pickle.dumps(data)))
+    assert dict(copy) == {
+        'EdgeDB.EdgeDBClient': ('api', 'EdgeDB.EdgeDBClient', 'class'),
+        'EdgeDB.EdgeDBClient.QueryAsync(string)': ('api', 'custom-id', 'method'),
+    }
+    assert copy.fullnames_in('api') == ['EdgeDB.EdgeDBClient',
+                                        'EdgeDB.EdgeDBClient.QueryAsync(string)']
+
+
+def test_compact_drops_dead_rows():
+    table = DNObjectTable({})
+    for i in range(100):
+        table[f'EdgeDB.Type{i}'] = ('api', f'EdgeDB.Type{i}', 'class')
+    for i in range(1, 100):
+        del table[f'EdgeDB.Type{i}']
+    table.compact()
+    assert len(table.data['docs']) == 1
+    assert table.data['strings'] == ['EdgeDB', 'Type0', 'api', 'class']
+    assert dict(table) == {'EdgeDB.Type0': ('api', 'EdgeDB.Type0', 'class')}
+
+
+def test_pickled_environment(build):
+    app, _warnings = build({'index': DOCUMENT, 'other': 'Other\n=====\n'})
+    objects = dict(app.env.get_domain('dn').objects)
+    assert sorted(objects) == ['EdgeDB', 'EdgeDB.EdgeDBClient', 'EdgeDB.EdgeDBClient.PoolSize',
+                               'EdgeDB.EdgeDBClient.QueryAsync(string)']
+    # the data of the domain pickles as builtins and arrays only
+    assert isinstance(app.env.domaindata['dn']['objects'], dict)
+
+    # an incremental build loads the table from the pickled environment
+    app, _warnings = build({'other': 'Other\n=====\n\nChanged.\n'})
+    assert dict(app.env.get_domain('dn').objects) == objects
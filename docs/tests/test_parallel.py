@@ -0,0 +1,41 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2019-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import os
+import sys
+
+import pytest
+from sphinx.util.parallel import parallel_available
+
+from conftest import DOCS_DIR
+
+sys.path.insert(0, os.path.join(DOCS_DIR, 'benchmarks'))
+
+from bench_dotnetdomain import Corpus, check_parallel  # noqa: E402
+
+
+@pytest.mark.skipif(not parallel_available, reason='needs parallel builds')
+@pytest.mark.parametrize('builder', ['html', 'dn-linkcheck'])
+def test_parallel_build_matches_serial(tmp_path, builder):
+    # two guides describe an API class again, so the readers of different
+    # processes find duplicate definitions the merge has to report
+    corpus = Corpus(namespaces=2, classes=5, methods=3, refs=3, guides=8, seed=0,
+                    duplicates=2)
+    corpus.write(str(tmp_path))
+    result = check_parallel(str(tmp_path), builder, [1, 2, 4])
+    assert result['mismatches'] == []
+    assert result['jobs']['1']['warnings'] >= 2
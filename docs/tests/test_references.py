@@ -0,0 +1,195 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2019-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import os
+import re
+
+import pytest
+
+from dotnetdomain import DNLookup, method_arity, overload_key
+
+CLIENT = 'EdgeDB.EdgeDBClient'
+GENERIC_QUERY = f'{CLIENT}.QueryAsync<TResult>(string, IDictionary<string,object>, CancellationToken)'
+QUERY = f'{CLIENT}.QueryAsync(string)'
+
+
+def make_lookup(*fullnames: str) -> DNLookup:
+    lookup = DNLookup({}, {}, {}, {})
+    for fullname in fullnames:
+        lookup.objects[fullname] = ('api', fullname, 'method')
+        lookup.index(fullname, 'method')
+    return lookup
+
+
+@pytest.mark.parametrize('name, key', [
+    ('EdgeDB.Client.Query<T>(string, int)', 'EdgeDB.Client.Query'),
+    ('Client.Query{T}', 'Client.Query'),
+    ('Client.Query``1', 'Client.Query'),
+    ('Result<T>.Get<U>(T)', 'Result`1.Get'),
+])
+def test_overload_key(name, key):
+    assert overload_key(name) == key
+
+
+def test_method_arity():
+    assert method_arity('Client.Query<T>') == 1
+    assert method_arity('Client.Query{TKey, TValue}(int)') == 2
+    assert method_arity('Client.Query``1') == 1
+    assert method_arity('Result<T>.Query(T)') is None
+
+
+@pytest.mark.parametrize('name', [
+    'EdgeDBClient.QueryAsync<T>',
+    'EdgeDBClient.QueryAsync{TResult}',
+    'EdgeDBClient.QueryAsync``1',
+    'EdgeDB.EdgeDBClient.QueryAsync<T>',
+])
+def test_generic_method(name):
+    lookup = make_lookup(GENERIC_QUERY, QUERY)
+    assert lookup.find(None, None, name, 'method')[0] == GENERIC_QUERY
+
+
+def test_short_method_name():
+    lookup = make_lookup(GENERIC_QUERY)
+    assert lookup.find(None, None, 'EdgeDBClient.QueryAsync', 'method')[0] == GENERIC_QUERY
+    assert lookup.find(None, CLIENT, 'QueryAsync', 'method')[0] == GENERIC_QUERY
+
+
+def test_argument_list_with_spaces():
+    lookup = make_lookup(GENERIC_QUERY, QUERY)
+    name = 'EdgeDBClient.QueryAsync(string, IDictionary<string, object>, CancellationToken)'
+    assert lookup.find(None, None, name, 'method')[0] == GENERIC_QUERY
+    # the cancellation token is optional
+    name = 'EdgeDBClient.QueryAsync(string, IDictionary<string, object>)'
+    assert lookup.find(None, None, name, 'method')[0] == GENERIC_QUERY
+    assert lookup.find(None, None, 'EdgeDBClient.QueryAsync(string)', 'method')[0] == QUERY
+
+
+def test_method_links(build):
+    app, warnings = build({'index': '''\
+        .. dn:namespace:: EdgeDB
+
+            .. dn:class:: EdgeDBClient
+
+                .. dn:method:: QueryAsync<TResult>(string query, IDictionary<string,object> args): Task<TResult>
+
+        * :dn:method:`EdgeDBClient.QueryAsync`
+        * :dn:method:`EdgeDBClient.QueryAsync{TResult}`
+        * :dn:method:`EdgeDB.EdgeDBClient.QueryAsync`
+        * :dn:method:`EdgeDBClient.QueryAsync(string, IDictionary<string, object>)`
+        '''})
+    assert 'reference target not found' not in warnings
+    with open(os.path.join(app.outdir, 'index.html'), encoding='utf-8') as f:
+        html = f.read()
+    links = re.findall(r'href="#EdgeDB\.EdgeDBClient\.QueryAsync_TResult_[^"]*"[^>]*>'
+                       r'<code class="xref dn dn-method', html)
+    assert len(links) == 4
+
+
+def test_generic_type_links(build):
+    app, warnings = build({'index': '''\
+        .. dn:namespace:: EdgeDB
+
+            .. dn:struct:: Result<T>
+
+            .. dn:struct:: Result<TValue, TError>
+
+        * :dn:struct:`Result{T}`
+        * :dn:struct:`Result<string>`
+        * :dn:struct:`EdgeDB.Result<T>`
+        * :dn:struct:`Result\\`2`
+        * :dn:struct:`Result<int, Exception>`
+        * :dn:struct:`Result<int, string, Exception>`
+        '''})
+    # the open generics differ by their number of parameters
+    assert 'more than one target found' not in warnings
+    assert 'Failed to resolve struct Result<int, string, Exception>' in warnings
+    with open(os.path.join(app.outdir, 'index.html'), encoding='utf-8') as f:
+        html = f.read()
+    links = re.findall(r'<a class="reference internal" href="#([^"]+)"[^>]*>'
+                       r'<code class="xref dn dn-struct', html)
+    assert links == ['EdgeDB.Result_T_'] * 3 + ['EdgeDB.Result_TValue,TError_'] * 2
+
+
+def test_property_links(build):
+    app, warnings = build({'index': '''\
+        .. dn:namespace:: EdgeDB
+
+            .. dn:class:: EdgeDBClient
+
+                :property int PoolSize: The size of the pool.
+                :prop bool IsConnected: Whether the client is connected.
+
+            .. dn:class:: Hidden
+                :noindex:
+
+                :property int Size: Not registered.
+
+        * :dn:property:`EdgeDBClient.PoolSize`
+        * :dn:property:`EdgeDB.EdgeDBClient.IsConnected`
+        * :dn:property:`PoolSize`
+        '''})
+    assert 'Failed to resolve' not in warnings
+    objects = app.env.get_domain('dn').objects
+    assert objects['EdgeDB.EdgeDBClient.PoolSize'][2] == 'property'
+    assert objects['EdgeDB.EdgeDBClient.IsConnected'][2] == 'property'
+    assert 'EdgeDB.Hidden.Size' not in objects
+    with open(os.path.join(app.outdir, 'index.html'), encoding='utf-8') as f:
+        html = f.read()
+    # the description of each property starts with its anchor
+    assert html.count('<span class="dn-property target" id="EdgeDB.EdgeDBClient.PoolSize">') == 1
+    links = re.findall(r'href="#([^"]+)"[^>]*><code class="xref dn dn-property', html)
+    assert links == ['EdgeDB.EdgeDBClient.PoolSize', 'EdgeDB.EdgeDBClient.IsConnected',
+                     'EdgeDB.EdgeDBClient.PoolSize']
+
+
+def test_signature_type_links(build, monkeypatch):
+    import dotnetdomain
+
+    batches = []
+    resolve_types = dotnetdomain.DNDomain.resolve_types
+
+    def resolve(self, keys):
+        keys = list(keys)
+        batches.append(sorted(key[0] for key in keys))
+        return resolve_types(self, keys)
+
+    monkeypatch.setattr(dotnetdomain.DNDomain, 'resolve_types', resolve)
+    app, warnings = build({'index': '''\
+        .. dn:namespace:: EdgeDB
+
+            .. dn:struct:: Range<T>
+
+            .. dn:class:: EdgeDBConnection
+
+            .. dn:class:: EdgeDBClient
+
+                .. dn:method:: QueryAsync<TResult>(string query, Range<int> range, Stream stream): Task<TResult>
+
+                .. dn:method:: Connect(EdgeDBConnection connection, Range<long> range): EdgeDBConnection
+        '''})
+    assert not warnings
+    # one batch for the document, one lookup per name and context
+    assert len(batches) == 1
+    assert batches[0].count('Range`1') == 1
+    with open(os.path.join(app.outdir, 'index.html'), encoding='utf-8') as f:
+        html = f.read()
+    links = re.findall(r'<a class="reference internal" href="#([^"]+)" title="[^"]*">'
+                       r'<span class="n"><span class="pre">(\w+)', html)
+    assert links == [('EdgeDB.Range_T_', 'Range'), ('EdgeDB.EdgeDBConnection', 'EdgeDBConnection'),
+                     ('EdgeDB.Range_T_', 'Range'), ('EdgeDB.EdgeDBConnection', 'EdgeDBConnection')]
@@ -0,0 +1,47 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2019-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import os
+
+# records which static files of the dn extension exist when the search
+# page is rendered
+CONF = '''
+import os
+
+def note_static_files(app, pagename, templatename, context, doctree):
+    if pagename == 'search':
+        static = os.listdir(os.path.join(app.outdir, '_static'))
+        with open(os.path.join(app.outdir, 'static.txt'), 'w') as f:
+            f.write(' '.join(sorted(name for name in static if name.startswith('dn'))))
+
+def setup(app):
+    app.connect('html-page-context', note_static_files)
+'''
+
+DOCUMENT = '''
+.. dn:namespace:: EdgeDB
+
+    .. dn:class:: EdgeDBClient
+'''
+
+
+def test_loader_written_before_pages(build):
+    app, warnings = build({'index': DOCUMENT}, conf=CONF)
+    assert not warnings
+    with open(os.path.join(app.outdir, 'static.txt')) as f:
+        assert 'dn_search.js' in f.read().split()
+    assert os.path.exists(os.path.join(app.outdir, '_static', 'dn-search', 'EdgeDB.js'))
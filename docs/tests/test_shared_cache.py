@@ -0,0 +1,98 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2019-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import json
+import os
+import shutil
+
+import dotnetdomain
+
+DOCUMENT = '''
+API
+===
+
+.. dn:namespace:: EdgeDB
+
+    .. dn:class:: EdgeDBClient
+
+        Represents a client pool.
+
+    .. dn:class:: EdgeDBConnection
+
+        Represents the connection details.
+'''
+
+EDITED = DOCUMENT.replace('the connection details', 'the details of a connection')
+
+
+def release_conf(tmp_path):
+    return f'dn_shared_cache = {str(tmp_path / "shared")!r}\n'
+
+
+def manifests(tmp_path):
+    dirname = tmp_path / 'shared' / 'dn_manifests'
+    result = {}
+    for filename in os.listdir(dirname):
+        with open(dirname / filename, encoding='utf-8') as f:
+            manifest = json.load(f)
+        result[os.path.basename(os.path.dirname(manifest['doctreedir']))] = set(manifest['keys'])
+    return result
+
+
+def fragments(tmp_path):
+    return {os.path.splitext(name)[0]
+            for name in os.listdir(tmp_path / 'shared' / 'dn_fragments')}
+
+
+def test_releases_share_fragments(build, tmp_path, monkeypatch):
+    conf = release_conf(tmp_path)
+    build({'index': DOCUMENT}, conf=conf, path='v1')
+    replayed = []
+    replay_fragment = dotnetdomain.DNObject.replay_fragment
+
+    def replay(self, domain, record):
+        replayed.append(self.arguments[0])
+        return replay_fragment(self, domain, record)
+
+    monkeypatch.setattr(dotnetdomain.DNObject, 'replay_fragment', replay)
+    _app, warnings = build({'index': EDITED}, conf=conf, path='v2')
+    assert not warnings
+    # the first build of the second release reuses the unchanged type
+    assert replayed == ['EdgeDBClient']
+
+    found = manifests(tmp_path)
+    assert sorted(found) == ['v1', 'v2']
+    shared, = found['v1'] & found['v2']
+    old, = found['v1'] - found['v2']
+    new, = found['v2'] - found['v1']
+    # both versions of the edited type are kept, each release uses one
+    assert fragments(tmp_path) == {shared, old, new}
+
+
+def test_removed_release(build, tmp_path):
+    conf = release_conf(tmp_path)
+    build({'index': DOCUMENT}, conf=conf, path='v1')
+    build({'index': EDITED}, conf=conf, path='v2')
+    old, = manifests(tmp_path)['v1'] - manifests(tmp_path)['v2']
+
+    shutil.rmtree(tmp_path / 'v1')
+    build({'index': EDITED + '\nChanged.\n'}, conf=conf, path='v2')
+    # the manifest and the fragments only the removed release used are gone
+    assert sorted(manifests(tmp_path)) == ['v2']
+    assert old not in fragments(tmp_path)
+    assert fragments(tmp_path) == manifests(tmp_path)['v2']
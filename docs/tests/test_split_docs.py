@@ -0,0 +1,108 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2019-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import json
+import os
+import re
+
+API = '''
+API
+===
+
+The reference of the driver.
+
+.. dn:namespace:: EdgeDB
+
+    .. _range:
+
+    .. dn:struct:: Range<T>
+
+        .. dn:method:: Contains(T value): bool
+
+    .. dn:class:: EdgeDBClient
+
+        Uses a :dn:struct:`Range<int>`.
+
+.. dn:class:: Outside
+'''
+
+INDEX = '''
+Index
+=====
+
+.. toctree::
+
+    api
+
+See :dn:class:`EdgeDBClient` and :ref:`range`.
+'''
+
+CONF = "dn_split_docs = ['api']\n"
+
+
+def test_split_pages(build, tmp_path):
+    app, warnings = build({'index': INDEX, 'api': API}, conf=CONF)
+    assert not warnings
+    pages = tmp_path / 'src' / 'api'
+    assert sorted(os.listdir(pages)) == ['EdgeDB.EdgeDBClient.rst', 'EdgeDB.Range-1.rst',
+                                         'EdgeDB.rst', 'Outside.rst']
+    text = (pages / 'EdgeDB.Range-1.rst').read_text()
+    assert text.startswith('.. Generated from api by the dn extension')
+    assert '.. _range:\n\nRange<T>\n========\n\n.. dn:currentnamespace:: EdgeDB\n' in text
+
+    # the types are declared in their namespace on their pages
+    objects = app.env.get_domain('dn').objects
+    assert objects['EdgeDB.Range<T>'][0] == 'api/EdgeDB.Range-1'
+    assert objects['EdgeDB.Range<T>.Contains(T)'][0] == 'api/EdgeDB.Range-1'
+    assert objects['EdgeDB.EdgeDBClient'][0] == 'api/EdgeDB.EdgeDBClient'
+    assert objects['EdgeDB'][0] == 'api/EdgeDB'
+    assert objects['Outside'][0] == 'api/Outside'
+
+    with open(os.path.join(app.outdir, 'index.html'), encoding='utf-8') as f:
+        html = f.read()
+    assert 'href="api/EdgeDB.EdgeDBClient.html#EdgeDB.EdgeDBClient"' in html
+    assert 'href="api/EdgeDB.Range-1.html#range"' in html
+
+
+def test_redirects(build):
+    app, _warnings = build({'index': INDEX, 'api': API}, conf=CONF)
+    with open(os.path.join(app.outdir, 'api.html'), encoding='utf-8') as f:
+        html = f.read()
+    pages = json.loads(re.search(r'const pages = (\{.*?\});', html).group(1))
+    assert pages == {
+        'EdgeDB': 'api/EdgeDB.html',
+        'EdgeDB.EdgeDBClient': 'api/EdgeDB.EdgeDBClient.html',
+        'EdgeDB.Range_T_': 'api/EdgeDB.Range-1.html',
+        'Outside': 'api/Outside.html',
+    }
+    # the pages split off don't forward anything
+    with open(os.path.join(app.outdir, 'api', 'EdgeDB.html'), encoding='utf-8') as f:
+        assert 'const pages' not in f.read()
+
+
+def test_removed_type(build, tmp_path):
+    build({'index': INDEX, 'api': API}, conf=CONF)
+    pages = tmp_path / 'src' / 'api'
+    mtime = os.stat(pages / 'EdgeDB.Range-1.rst').st_mtime_ns
+    edited = API.replace('.. dn:class:: Outside\n', '')
+    app, warnings = build({'api': edited}, conf=CONF)
+    assert not warnings
+    assert not (pages / 'Outside.rst').exists()
+    assert 'Outside' not in app.env.get_domain('dn').objects
+    # the pages of the other types are left as they are
+    assert os.stat(pages / 'EdgeDB.Range-1.rst').st_mtime_ns == mtime
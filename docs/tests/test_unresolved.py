@@ -0,0 +1,82 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2019-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import os
+
+from sphinx.cmd.build import build_main
+
+DOCUMENTS = {
+    'index': 'Index\n=====\n\n.. toctree::\n\n   broken\n   other\n',
+    'broken': 'Broken\n======\n\nSee :dn:class:`Missing` and :dn:class:`Missing` again.\n',
+    'other': 'Other\n=====\n\n.. dn:class:: Present\n',
+}
+
+
+def write_project(path, documents=DOCUMENTS):
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, 'conf.py'), 'w') as f:
+        f.write("extensions = ['dotnetdomain']\n")
+    for docname, text in documents.items():
+        with open(os.path.join(path, f'{docname}.rst'), 'w') as f:
+            f.write(text)
+
+
+def sphinx_build(tmp_path, *args):
+    return build_main(['-q', *args, '-b', 'html', str(tmp_path / 'src'),
+                       str(tmp_path / 'out')])
+
+
+def test_warning_is_error(tmp_path):
+    write_project(tmp_path / 'src')
+    assert sphinx_build(tmp_path, '-W') != 0
+    assert sphinx_build(tmp_path, '-W', '--keep-going') == 1
+
+
+def test_one_warning_per_target(tmp_path, capsys):
+    write_project(tmp_path / 'src')
+    assert sphinx_build(tmp_path) == 0
+    warnings = capsys.readouterr().err
+    assert warnings.count('Failed to resolve') == 1
+    assert 'broken.rst:4: WARNING: Failed to resolve class Missing (2 references)' in warnings
+
+
+def test_incremental_build_reports_documents_not_written(tmp_path, capsys):
+    write_project(tmp_path / 'src')
+    assert sphinx_build(tmp_path) == 0
+    capsys.readouterr()
+    with open(tmp_path / 'src' / 'other.rst', 'a') as f:
+        f.write('\n.. dn:class:: Added\n')
+    assert sphinx_build(tmp_path, '-W') != 0
+    assert 'Failed to resolve class Missing (2 references)' in capsys.readouterr().err
+
+
+def test_fixed_references_are_forgotten(tmp_path, capsys):
+    write_project(tmp_path / 'src')
+    assert sphinx_build(tmp_path) == 0
+    with open(tmp_path / 'src' / 'broken.rst', 'w') as f:
+        f.write('Broken\n======\n\nSee :dn:class:`Present`.\n')
+    capsys.readouterr()
+    assert sphinx_build(tmp_path, '-W') == 0
+    assert 'Failed to resolve' not in capsys.readouterr().err
+
+
+def test_line_of_nested_reference(tmp_path, capsys):
+    write_project(tmp_path / 'src', {
+        'index': 'Index\n=====\n\n.. dn:class:: Present\n\n    Unlike :dn:class:`Missing`.\n',
+    })
+    assert sphinx_build(tmp_path) == 0
+    assert 'index.rst:6: WARNING: Failed to resolve class Missing' in capsys.readouterr().err
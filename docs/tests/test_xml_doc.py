@@ -0,0 +1,52 @@
+#
+# This source file is part of the EdgeDB open source project.
+#
+# Copyright 2019-present MagicStack Inc. and the EdgeDB authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import pytest
+
+from dotnetdomain import format_member_signature, format_xml_type
+
+
+@pytest.mark.parametrize('text, formatted', [
+    ('System.Collections.Generic.IDictionary{System.String,System.Object}',
+     'IDictionary<string,object>'),
+    ('System.Nullable{System.Int32}', 'int?'),
+    ('System.Nullable{EdgeDB.Capabilities}', 'Capabilities?'),
+    ('System.Threading.Tasks.Task{System.Nullable{System.Int64}}', 'Task<long?>'),
+    ('``0@', 'TOut&'),
+])
+def test_format_xml_type(text, formatted):
+    assert format_xml_type(text, [], ['TOut'])[0] == formatted
+
+
+def member_data(member_id, *params):
+    return {
+        'types': {'EdgeDB.Cache': {'typeparams': []}},
+        'members': {member_id: {'doc': {
+            'typeparam': [['TOut', []]],
+            'param': [[name, []] for name in params],
+        }}},
+    }
+
+
+@pytest.mark.parametrize('with_names, signature', [
+    (True, 'Get<TOut>(string key, ref TOut result, ref int count)'),
+    (False, 'Get<TOut>(string, ref TOut, ref int)'),
+])
+def test_ref_parameters(with_names, signature):
+    member_id = 'M:EdgeDB.Cache.Get``1(System.String,``0@,System.Int32@)'
+    data = member_data(member_id, 'key', 'result', 'count')
+    assert format_member_signature(member_id, data, with_names) == signature